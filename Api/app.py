@@ -0,0 +1,296 @@
+"""Read-only REST API over the service layer for other internal tools.
+
+    python -m Api.app --port 8000
+    uvicorn Api.app:app --host 0.0.0.0 --port 8000 --workers 4
+
+Handlers are coroutines on the async DAOs and quote provider, so a worker
+keeps accepting requests while its queries are in flight. Responses are
+cached for ``API_CACHE_TTL`` seconds in the shared store and carry an ETag:
+a client that sends it back in ``If-None-Match`` gets an empty 304. Needs
+``fastapi`` and ``uvicorn``.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+
+from config import API_CACHE_MAX_KEYS, API_CACHE_TTL, CHANGE_FEED
+from DAO.models import Holding, Model, Transaction
+from DAO.user_dao import AsyncUserDAO
+from DAO.money import to_amount, to_cents
+from Service.portfolio_service import PortfolioService
+from Service.shared_store import shared_store
+from Service.change_feed import cache_ttl, start_change_feed
+from Service import metrics
+
+MAX_PAGE_SIZE = 500
+MAX_BULK_IDS = 100  # Portfolios or symbols per bulk request
+HOLDING_ORDER_COLUMNS = ("symbol", "price", "quantity", "stock_id")
+JSON_TYPE = "application/json"
+
+_inflight = {}  # cache key -> task building that response
+
+
+def _json_default(value):
+    if isinstance(value, Holding):
+        return dict(value.to_dict(), total_value=value.total_value)
+    if isinstance(value, Transaction):
+        return dict(value.to_dict(), value=value.value)
+    if isinstance(value, Model):
+        return value.to_dict()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(payload):
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+
+
+def paginate(items, total, offset, limit):
+    total = total or 0
+    return {"items": items, "total": total, "offset": offset, "limit": limit,
+            "next_offset": offset + limit if offset + limit < total else None}
+
+
+def split_ids(value):
+    """Distinct non-empty entries of a comma separated query value, in order"""
+    ids = list(dict.fromkeys(v.strip() for v in value.split(",") if v.strip()))
+    if not ids:
+        raise HTTPException(400, "No ids given")
+    if len(ids) > MAX_BULK_IDS:
+        raise HTTPException(400, f"At most {MAX_BULK_IDS} ids per request")
+    return ids
+
+
+def _request_key(request):
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+def _not_modified(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip() for tag in header.split(",")}
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def _build(key, load, ttl):
+    generation = shared_store.generation  # A write invalidated while loading must not be cached over
+    body = encode(await load())
+    entry = (body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest())
+    shared_store.put(("api", key), entry, ttl, since=generation)
+    return entry
+
+
+async def cached_response(request, load, watched=True):
+    """JSON response for load()'s payload with an ETag, reused for API_CACHE_TTL seconds.
+
+    Payloads read only from tables the change feed watches (watched) are
+    kept for LIVE_CACHE_TTL while it is live. Concurrent misses for the
+    same URL await a single load.
+    """
+    key = _request_key(request)
+    entry = shared_store.get(("api", key))
+    metrics.CACHE_REQUESTS.labels("api", "miss" if entry is None else "hit").inc()
+    if entry is None:
+        task = _inflight.get(key)
+        if task is None:
+            ttl = cache_ttl(API_CACHE_TTL) if watched else API_CACHE_TTL
+            task = _inflight[key] = asyncio.ensure_future(_build(key, load, ttl))
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
+        entry = await asyncio.shield(task)
+
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(API_CACHE_TTL)}"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=JSON_TYPE, headers=headers)
+
+
+def create_app(portfolio_service=None):
+    """FastAPI app over portfolio_service and the stock and transaction services it owns"""
+    portfolios = portfolio_service or PortfolioService()
+    stocks = portfolios.stock_service
+    transactions = portfolios.transaction_service
+    user_dao = AsyncUserDAO()
+    page_offset = Query(0, ge=0)
+    page_limit = Query(100, ge=1, le=MAX_PAGE_SIZE)
+    shared_store.limit("api", API_CACHE_MAX_KEYS)  # Any query string is a new key
+
+    app = FastAPI(title="Smart Stock Tracker API", version="1")
+    if CHANGE_FEED:
+        start_change_feed()
+
+    @app.middleware("http")
+    async def record_latency(request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        metrics.API_LATENCY.labels(route.path if route else "unmatched", str(response.status_code)).observe(
+            time.perf_counter() - started)
+        return response
+
+    @app.exception_handler(ValueError)
+    async def value_error(request, exc):
+        # Services raise ValueError for missing rows and bad input alike
+        status = 404 if "not found" in str(exc).lower() else 400
+        return JSONResponse({"detail": str(exc)}, status_code=status)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/metrics")
+    async def prometheus_metrics():
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+    @app.get("/v1/users")
+    async def find_user(request: Request, email: str):
+        async def load():
+            user = await user_dao.get_user_by_email(email)
+            if user is None:
+                raise HTTPException(404, "User not found")
+            return user
+        return await cached_response(request, load, watched=False)
+
+    @app.get("/v1/users/{user_id}")
+    async def get_user(request: Request, user_id: str):
+        async def load():
+            user = await user_dao.get_user_by_id(user_id)
+            if user is None:
+                raise HTTPException(404, "User not found")
+            return user
+        return await cached_response(request, load, watched=False)
+
+    @app.get("/v1/users/{user_id}/portfolios")
+    async def user_portfolios(request: Request, user_id: str, offset: int = page_offset, limit: int = page_limit):
+        async def load():
+            rows, total = await portfolios.async_portfolio_dao.get_portfolios_page(user_id, offset, limit)
+            return paginate(rows, total, offset, limit)
+        return await cached_response(request, load)
+
+    @app.get("/v1/users/{user_id}/summary")
+    async def user_summary(request: Request, user_id: str):
+        async def load():
+            summaries = await portfolios.get_portfolio_summary_async(user_id)
+            valid = [s for s in summaries if 'error' not in s]
+            return {
+                "portfolios": summaries,
+                "total_value": to_amount(sum(to_cents(s['current_value']) for s in valid)),
+                "total_gain_loss": to_amount(sum(to_cents(s['total_gain_loss']) for s in valid)),
+            }
+        return await cached_response(request, load)
+
+    # Declared before /v1/portfolios/{portfolio_id} so "summary" is not taken for an id
+    @app.get("/v1/portfolios/summary")
+    async def bulk_summary(request: Request, ids: str = Query(..., description="comma separated portfolio ids")):
+        """Performance of up to MAX_BULK_IDS portfolios; their queries run concurrently"""
+        wanted = split_ids(ids)
+
+        async def load():
+            found = {p.portfolio_id: p for p in await portfolios.async_portfolio_dao.get_portfolios_by_ids(wanted)}
+            present = [pid for pid in wanted if pid in found]
+            performances = await asyncio.gather(
+                *(transactions.get_portfolio_performance_async(pid) for pid in present))
+            items = [{'portfolio_id': pid, 'portfolio_name': found[pid].portfolio_name, **performance}
+                     for pid, performance in zip(present, performances)]
+            return {"items": items, "missing": [pid for pid in wanted if pid not in found]}
+        return await cached_response(request, load)
+
+    @app.get("/v1/portfolios/{portfolio_id}")
+    async def portfolio_detail(request: Request, portfolio_id: str):
+        async def load():
+            analytics = await portfolios.get_portfolio_analytics_async(portfolio_id)
+            return {
+                "portfolio": analytics['portfolio_info'],
+                "performance": analytics['performance'],
+                "stock_count": analytics['stock_count'],
+                "top_stock": analytics['top_stock'],
+                "highest_quantity_stock": analytics['highest_quantity_stock'],
+            }
+        return await cached_response(request, load)
+
+    @app.get("/v1/portfolios/{portfolio_id}/holdings")
+    async def portfolio_holdings(request: Request, portfolio_id: str, offset: int = page_offset,
+                                 limit: int = page_limit, order_by: str = "symbol", descending: bool = False):
+        if order_by not in HOLDING_ORDER_COLUMNS:
+            raise HTTPException(400, f"order_by must be one of: {', '.join(HOLDING_ORDER_COLUMNS)}")
+
+        async def load():
+            rows, total = await stocks.async_stock_dao.get_stocks_page(
+                [portfolio_id], offset, limit, order_by, descending)
+            return paginate(rows, total, offset, limit)
+        return await cached_response(request, load)
+
+    @app.get("/v1/portfolios/{portfolio_id}/transactions")
+    async def portfolio_transactions(request: Request, portfolio_id: str, offset: int = page_offset,
+                                     limit: int = page_limit):
+        async def load():
+            rows, total = await transactions.async_trans_dao.get_transactions_page(
+                [portfolio_id], offset, limit, (("date", True), ("trans_id", True)))
+            return paginate(rows, total, offset, limit)
+        return await cached_response(request, load)
+
+    @app.get("/v1/portfolios/{portfolio_id}/analytics")
+    async def portfolio_analytics(request: Request, portfolio_id: str):
+        async def load():
+            analytics = await transactions.get_transaction_analytics_async(portfolio_id)
+            if 'error' in analytics:
+                raise HTTPException(404, analytics['error'])
+            return analytics
+        return await cached_response(request, load)
+
+    @app.get("/v1/stocks/{stock_id}/performance")
+    async def stock_performance(request: Request, stock_id: str):
+        async def load():
+            performance = await transactions.get_stock_performance_async(stock_id)
+            if 'error' in performance:
+                raise HTTPException(404, performance['error'])
+            return performance
+        return await cached_response(request, load)
+
+    @app.get("/v1/quotes")
+    async def quotes(request: Request, symbols: str = Query(..., description="comma separated symbols")):
+        wanted = [s.upper() for s in split_ids(symbols)]
+
+        async def load():
+            prices = await stocks.get_quotes_async(wanted)
+            return {"quotes": prices, "missing": [s for s in wanted if s not in prices],
+                    "stale": [s for s in prices if stocks.quote_cache.get(s) is None]}
+        return await cached_response(request, load, watched=False)
+
+    return app
+
+
+app = create_app()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the read-only REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, each with its own event loop")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ The API server needs uvicorn: pip install uvicorn")
+        return 1
+    uvicorn.run("Api.app:app", host=args.host, port=args.port, workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Cold-start import benchmark for the CLI entry points.
+
+Each target is imported in a fresh interpreter under ``python -X importtime``
+and the cumulative time of the target module is reported (median of several
+runs), along with the slowest imports it pulls in. The run fails when a
+target is over its budget or loads a module that should only be imported on
+first use (yfinance, pandas, the Supabase SDK, ...).
+
+    python -m Benchmarks.import_time
+    python -m Benchmarks.import_time --module Client.batch_cli --budget-ms 150 --runs 9
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry point -> cold start budget in milliseconds
+TARGETS = {
+    "Client.main": 250,
+    "Client.batch_cli": 250,
+}
+
+# Loaded lazily by the app; importing any of these at startup is a regression
+LAZY_MODULES = ("yfinance", "pandas", "numpy", "supabase", "postgrest", "httpx", "requests", "pyarrow", "openpyxl")
+
+
+def parse_importtime(stderr):
+    """Rows of (module, depth, self_us, cumulative_us) from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_once(module):
+    """Import module in a new interpreter; returns the parsed importtime rows"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"Importing {module} failed: {error}")
+    return parse_importtime(result.stderr)
+
+
+def measure(module, runs=5, top=10):
+    """Median cold import time of module plus its slowest direct and indirect imports"""
+    import_once(module)  # Warm-up: writes .pyc files so compilation is not measured
+    totals, samples = [], []
+    for _ in range(runs):
+        rows = import_once(module)
+        end = next(i for i, r in enumerate(rows) if r[0] == module)
+        start = end
+        while start > 0 and rows[start - 1][1] > rows[end][1]:
+            start -= 1  # Output is post-order: the target's imports come just before it
+        totals.append(rows[end][3] / 1000)
+        samples.append(rows[start:end + 1])
+
+    median_run = samples[totals.index(statistics.median_low(totals))]
+    loaded = {name for name, _, _, _ in median_run}
+    slowest = sorted((r for r in median_run if r[0] != module), key=lambda r: r[2], reverse=True)[:top]
+    return {
+        'module': module,
+        'median_ms': statistics.median(totals),
+        'min_ms': min(totals),
+        'max_ms': max(totals),
+        'modules_loaded': len(loaded),
+        'eager_heavy': sorted(m for m in loaded if m in LAZY_MODULES),
+        'slowest_self_ms': [(name, self_us / 1000) for name, _, self_us, _ in slowest],
+    }
+
+
+def print_report(result, budget_ms):
+    status = "✅" if result['median_ms'] <= budget_ms and not result['eager_heavy'] else "❌"
+    print(f"\n{status} {result['module']}: {result['median_ms']:.1f} ms median "
+          f"(min {result['min_ms']:.1f}, max {result['max_ms']:.1f}, budget {budget_ms} ms) "
+          f"| {result['modules_loaded']} modules")
+    if result['eager_heavy']:
+        print(f"   ⚠️  Imported at startup: {', '.join(result['eager_heavy'])}")
+    for name, ms in result['slowest_self_ms']:
+        print(f"   {ms:8.2f} ms  {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import time of the CLI entry points")
+    parser.add_argument("--module", action="append", help="module to measure (repeatable; default: all entry points)")
+    parser.add_argument("--budget-ms", type=float, help="override the per-module budget")
+    parser.add_argument("--runs", type=int, default=5, help="measured runs per module")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    modules = args.module or list(TARGETS)
+    results, failed = [], False
+    for module in modules:
+        budget = args.budget_ms or TARGETS.get(module, 250)
+        try:
+            result = measure(module, args.runs, args.top)
+        except RuntimeError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        result['budget_ms'] = budget
+        failed |= result['median_ms'] > budget or bool(result['eager_heavy'])
+        results.append(result)
+        if not args.json:
+            print_report(result, budget)
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
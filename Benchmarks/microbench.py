@@ -0,0 +1,256 @@
+"""Microbenchmarks for the Service and DAO hot paths.
+
+Every case runs against the in-memory Supabase backend and the offline quote
+provider, loaded with the synthetic dataset at several sizes, so results are
+reproducible and need no network. Each case reports its median and minimum
+time plus the DAO round trips and provider calls per operation.
+
+Results are compared with ``Benchmarks/baselines.json``. A case fails when
+its median is slower than the baseline by more than ``--threshold``, or when
+it makes more DAO/provider calls than before. Call counts are deterministic,
+so they catch complexity changes (an extra query per row, say) on any machine.
+Timings depend on the machine, so record your own with ``--save-baseline``.
+
+    python -m Benchmarks.microbench
+    python -m Benchmarks.microbench --size small --case portfolio_summary --repeat 20
+    python -m Benchmarks.microbench --db-latency 0.002 --quote-latency 0.05
+    python -m Benchmarks.microbench --save-baseline
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import gc
+import json
+import statistics
+import time
+from collections import Counter
+
+from config import set_supabase_client
+from Service.quote_provider import set_quote_provider
+from Service.quote_cache import quote_cache
+from Service.shared_store import shared_store
+from Service.portfolio_service import PortfolioService
+from Service.screener import ScreenerService
+from Service.backtest import SmaCrossover, run_backtest
+from Testing.fake_supabase import FakeSupabase
+from Testing.offline_quotes import OfflineQuoteProvider
+from Testing.data_generator import fundamentals_rows, history_frame, load_dataset
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Dataset scale per size (1 = 100 users / 100k transactions)
+SIZES = {"small": 0.01, "medium": 0.1, "large": 1.0}
+SCREEN_UNIVERSE = 10_000  # Symbols in the fundamentals table, at every size
+BACKTEST_SYMBOLS, BACKTEST_DAYS = 300, 10 * 252  # Price history replayed by the backtest case, at every size
+
+
+class BenchContext:
+    """Loaded backend plus the busiest user, their largest portfolio and most traded stock"""
+
+    def __init__(self, size, db_latency=0.0, quote_latency=0.0, seed=42):
+        self.size = size
+        self.backend = FakeSupabase()
+        self.provider = OfflineQuoteProvider(latency=quote_latency)
+        stats = load_dataset(self.backend, SIZES[size], seed)
+        self.backend.latency = db_latency  # Latency applies to measured calls only, not the load
+
+        self.user_id = stats["busiest_users"][0]
+        portfolio_ids = [p["portfolio_id"] for p in
+                         self.backend.table("portfolios").select("portfolio_id").eq("user_id", self.user_id).execute().data]
+        trades = self.backend.table("transactions").select("portfolio_id,stock_id").in_("portfolio_id", portfolio_ids).execute().data
+        per_portfolio = Counter(t["portfolio_id"] for t in trades)
+        self.portfolio_id = per_portfolio.most_common(1)[0][0]
+        self.stock_id = Counter(t["stock_id"] for t in trades if t["portfolio_id"] == self.portfolio_id).most_common(1)[0][0]
+        self.transaction_count = per_portfolio[self.portfolio_id]
+        self.backend.table("fundamentals").insert(fundamentals_rows(SCREEN_UNIVERSE, seed)).execute()
+        self.history = history_frame(BACKTEST_SYMBOLS, BACKTEST_DAYS, seed)
+
+    def __enter__(self):
+        set_supabase_client(self.backend)
+        set_quote_provider(self.provider)
+        return self
+
+    def __exit__(self, *exc):
+        set_supabase_client(None)
+        set_quote_provider(None)
+
+
+def _stale_prices(ctx):
+    """Expire cached quotes and zero stored prices so every refresh fetches and writes each symbol"""
+    quote_cache.invalidate()
+    shared_store.invalidate_class("metadata")
+    for row in ctx.backend.tables["stocks"].candidates([("eq", "portfolio_id", ctx.portfolio_id)]):
+        row["price"] = 0
+
+
+_loop = None
+
+
+def _run(coro):
+    """Run an async case on one event loop kept for the whole benchmark run"""
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+def _autocomplete(service, ctx):
+    """Symbol search as typed, one query per keystroke, ending in a misspelling only the trigram index finds"""
+    for query in ("m", "mi", "mic", "micr", "micro", "mircosoft"):
+        service.stock_service.search_symbols(query)
+
+
+def _screen(service, ctx):
+    """A typical screen over SCREEN_UNIVERSE symbols (the shared frame is built during warmup)"""
+    ScreenerService(service.stock_service).screen("sector ~ tech and price < 50 and market_cap > 10B")
+
+
+def _backtest(service, ctx):
+    """A 50/200-day moving-average crossover over BACKTEST_DAYS x BACKTEST_SYMBOLS, rebalanced monthly with costs"""
+    run_backtest(ctx.history, SmaCrossover(50, 200), rebalance="monthly", cost_bps=10)
+
+
+# name -> (callable(service, ctx), per-iteration reset or None)
+CASES = {
+    "portfolio_performance": (lambda s, c: s.transaction_service.get_portfolio_performance(c.portfolio_id), None),
+    "transaction_analytics": (lambda s, c: s.transaction_service.get_transaction_analytics(c.portfolio_id), None),
+    "stock_performance": (lambda s, c: s.transaction_service.get_stock_performance(c.stock_id), None),
+    "portfolio_summary": (lambda s, c: s.get_portfolio_summary(c.user_id), None),
+    "portfolio_analytics": (lambda s, c: s.get_portfolio_analytics(c.portfolio_id), None),
+    "portfolio_summary_async": (lambda s, c: _run(s.get_portfolio_summary_async(c.user_id)), None),
+    "portfolio_analytics_async": (lambda s, c: _run(s.get_portfolio_analytics_async(c.portfolio_id)), None),
+    "refresh_stock_prices": (lambda s, c: s.stock_service.refresh_stock_prices(c.portfolio_id), _stale_prices),
+    "get_stocks": (lambda s, c: s.stock_service.get_stocks(c.portfolio_id), None),
+    "symbol_search": (_autocomplete, None),
+    "screen": (_screen, None),
+    "backtest": (_backtest, None),
+}
+
+
+def run_case(name, ctx, repeat=15, warmup=3):
+    """Time one case; returns median/min milliseconds and calls per operation"""
+    fn, reset = CASES[name]
+    service = PortfolioService()
+    for _ in range(warmup):
+        if reset:
+            reset(ctx)
+        fn(service, ctx)
+
+    ctx.backend.reset_counts()
+    ctx.provider.reset_counts()
+    samples = []
+    gc.collect()
+    gc.disable()  # Like timeit: keep collections of the loaded dataset out of the samples
+    try:
+        for _ in range(repeat):
+            if reset:
+                reset(ctx)
+            started = time.perf_counter()
+            fn(service, ctx)
+            samples.append(time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return {
+        "median_ms": statistics.median(samples) * 1000,
+        "min_ms": min(samples) * 1000,
+        "dao_calls": sum(ctx.backend.calls.values()) / repeat,
+        "provider_calls": sum(ctx.provider.calls.values()) / repeat,
+    }
+
+
+def compare(results, baselines, threshold):
+    """Regressions as (key, message) against stored baselines"""
+    regressions = []
+    for key, result in results.items():
+        base = baselines.get(key)
+        if not base:
+            continue
+        if result["median_ms"] > base["median_ms"] * (1 + threshold):
+            regressions.append((key, f"median {result['median_ms']:.2f} ms vs baseline {base['median_ms']:.2f} ms "
+                                     f"(+{(result['median_ms'] / base['median_ms'] - 1) * 100:.0f}%)"))
+        for calls in ("dao_calls", "provider_calls"):
+            if result[calls] > base[calls]:
+                regressions.append((key, f"{calls.replace('_', ' ')} {result[calls]:g} vs baseline {base[calls]:g}"))
+    return regressions
+
+
+def load_baselines(path, settings):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("settings") != settings:
+        print(f"⚠️  Baselines were recorded with {data.get('settings')}; comparing call counts only", file=sys.stderr)
+        return {key: dict(value, median_ms=float("inf")) for key, value in data.get("results", {}).items()}
+    return data.get("results", {})
+
+
+def print_report(results, baselines, contexts):
+    print(f"\n⏱️  MICROBENCHMARKS")
+    print("=" * 96)
+    print(f"{'Case':<24} {'Size':<7} {'Trades':>7} {'Median ms':>10} {'Min ms':>9} {'DAO/op':>7} "
+          f"{'Quotes/op':>10} {'vs base':>9}")
+    print("─" * 96)
+    for key, result in results.items():
+        name, size = key.split("[")[0], key.split("[")[1].rstrip("]")
+        base = baselines.get(key)
+        delta = (f"{(result['median_ms'] / base['median_ms'] - 1) * 100:+.0f}%"
+                 if base and base["median_ms"] not in (0, float("inf")) else "—")
+        print(f"{name:<24} {size:<7} {contexts[size].transaction_count:>7,} {result['median_ms']:>10.2f} "
+              f"{result['min_ms']:>9.2f} {result['dao_calls']:>7g} {result['provider_calls']:>10g} {delta:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service and DAO microbenchmarks")
+    parser.add_argument("--size", action="append", choices=list(SIZES), help="dataset sizes (default: all)")
+    parser.add_argument("--case", action="append", choices=list(CASES), help="cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=15, help="timed runs per case")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds added per DAO round trip")
+    parser.add_argument("--quote-latency", type=float, default=0.0, help="seconds added per provider call")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--baselines", default=BASELINES, help="baseline file to compare with / save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    settings = {"db_latency": args.db_latency, "quote_latency": args.quote_latency}
+    sizes = args.size or list(SIZES)
+    cases = args.case or list(CASES)
+    results, contexts = {}, {}
+    for size in sizes:
+        with BenchContext(size, args.db_latency, args.quote_latency) as ctx:
+            contexts[size] = ctx
+            for name in cases:
+                results[f"{name}[{size}]"] = run_case(name, ctx, args.repeat)
+
+    baselines = load_baselines(args.baselines, settings)
+    if args.save_baseline:
+        stored = {}
+        if os.path.exists(args.baselines):
+            with open(args.baselines) as f:
+                stored = json.load(f)
+        merged = stored.get("results", {}) if stored.get("settings") == settings else {}
+        merged.update(results)
+        with open(args.baselines, "w") as f:
+            json.dump({"settings": settings, "results": dict(sorted(merged.items()))}, f, indent=2)
+            f.write("\n")
+
+    regressions = [] if args.save_baseline else compare(results, baselines, args.threshold)
+    if args.json:
+        print(json.dumps({"results": results, "regressions": [dict(case=k, reason=r) for k, r in regressions]}, indent=2))
+    else:
+        print_report(results, baselines, contexts)
+        if args.save_baseline:
+            print(f"\n💾 Saved {len(results)} baselines to {args.baselines}")
+        for key, reason in regressions:
+            print(f"❌ {key}: {reason}")
+        if not regressions and not args.save_baseline:
+            print(f"\n✅ No regressions (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+"""Non-interactive Smart Stock Tracker commands for scripts and cron jobs.
+
+    python -m Client.batch_cli refresh --user me@example.com
+    python -m Client.batch_cli summary --user me@example.com --json
+    python -m Client.batch_cli trade import trades.ofx --user me@example.com --portfolio Growth
+    python -m Client.batch_cli export lots --user me@example.com --output lots.parquet
+    python -m Client.batch_cli quotes AAPL MSFT NVDA --json
+    python -m Client.batch_cli watch AAPL MSFT --interval 10
+    python -m Client.batch_cli --profile --profiler cprofile summary --user me@example.com
+    python -m Client.batch_cli --metrics-port 9108 watch
+    python -m Client.batch_cli --metrics-port 9108 scheduler
+    python -m Client.batch_cli fundamentals --every 3600
+    python -m Client.batch_cli screen "sector ~ tech and price < 50 and market_cap > 10B" --limit 20
+    python -m Client.batch_cli history --years 10
+    python -m Client.batch_cli backtest --user me@example.com --portfolio Growth --rebalance quarterly
+    python -m Client.batch_cli backtest --user me@example.com --portfolio Growth --strategy sma --sweep fast=20,50 --sweep slow=100,200
+
+Results go to stdout (JSON with --json, tab-separated otherwise); progress
+and errors go to stderr. Exit status is 0 on success and 1 on failure.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import csv
+import json
+import signal
+import threading
+from contextlib import nullcontext
+
+from Service.user_service import UserService
+from Service.portfolio_service import PortfolioService
+from Service.import_service import TradeImporter, iter_trades
+from Service.export_service import ExportService, REPORT_FIELDS, EXPORT_FORMATS
+from Service.scheduler import PriceScheduler
+from Service.screener import ScreenerService
+from Service.price_history import PriceHistoryService
+from Service import tracing
+from Service import metrics
+from Client.market_watch import WatchTable
+from config import (WATCHLIST, METRICS_PORT, METRICS_ADDR, SCHEDULER_INTERVAL, SCHEDULER_BATCH_SIZE,
+                    FUNDAMENTALS_MAX_AGE, HISTORY_YEARS)
+
+
+class BatchCLI:
+    def __init__(self):
+        self.user_service = UserService()
+        self.portfolio_service = PortfolioService()
+        self.stock_service = self.portfolio_service.stock_service
+        self.transaction_service = self.portfolio_service.transaction_service
+
+    # Helpers
+    def find_user(self, user):
+        """Resolve --user given as an email address or a user ID"""
+        user_dao = self.user_service.user_dao
+        found = user_dao.get_user_by_email(user) if "@" in user else user_dao.get_user_by_id(user)
+        if not found:
+            raise ValueError(f"User not found: {user}")
+        return found
+
+    def find_portfolio(self, user_id, name):
+        for portfolio in self.portfolio_service.get_user_portfolios(user_id):
+            if portfolio.portfolio_name == name or portfolio.portfolio_id == name:
+                return portfolio
+        raise ValueError(f"Portfolio not found: {name}")
+
+    def emit(self, data, as_json, fields=None):
+        """Write a list of rows (or one dict) as JSON or tab-separated text"""
+        if as_json:
+            json.dump(data, sys.stdout, indent=2, default=str)
+            sys.stdout.write("\n")
+            return
+        rows = data if isinstance(data, list) else [data]
+        fields = fields or (list(rows[0].keys()) if rows else [])
+        writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([row.get(f, "") for f in fields])
+
+    def progress(self, event):
+        status = f"${event['price']:,.2f}" if event['error'] is None else f"error: {event['error']}"
+        if event['stale']:
+            status += " (last known, provider unavailable)"
+        print(f"[{event['done']}/{event['total']}] {event['symbol']} {status}", file=sys.stderr)
+
+    # Commands
+    def refresh(self, args):
+        user = self.find_user(args.user)
+        result = self.portfolio_service.refresh_user_prices(
+            user.user_id, None if args.quiet else self.progress
+        )
+        self.emit(result, args.json)
+
+    def summary(self, args):
+        user = self.find_user(args.user)
+        summaries = self.portfolio_service.get_portfolio_summary(user.user_id)
+        self.emit(summaries, args.json, fields=[
+            'portfolio_id', 'portfolio_name', 'current_value', 'total_gain_loss',
+            'gain_loss_percentage', 'stock_count'
+        ])
+
+    def trade_import(self, args):
+        user = self.find_user(args.user)
+        portfolio = self.find_portfolio(user.user_id, args.portfolio)
+        importer = TradeImporter(portfolio.portfolio_id, batch_size=args.batch_size, strict=args.strict)
+        
+        def show_progress(stats):
+            print(f"{stats['rows_read']:,} rows read | {stats['inserted']:,} inserted | "
+                  f"{stats['rows_per_sec']:,.0f} rows/sec", file=sys.stderr)
+        
+        result = importer.run(iter_trades(args.file, args.format), None if args.quiet else show_progress)
+        if args.json:
+            self.emit(result, True)
+        else:
+            self.emit({k: v for k, v in result.items() if k != 'errors'}, False)
+            for error in result['errors']:
+                print(f"line {error['line'] or error['ref']}: {error['error']}", file=sys.stderr)
+
+    def export(self, args):
+        user = self.find_user(args.user)
+        file_format = args.format or (os.path.splitext(args.output)[1].lstrip('.').lower() if args.output else 'csv')
+        if file_format != 'csv' and not args.output:
+            raise ValueError(f"--output is required for {file_format} exports")
+        out = args.output or sys.stdout.buffer
+        rows = ExportService(self.portfolio_service).export(args.report, user.user_id, file_format, out)
+        if args.output:
+            print(f"✅ Exported {rows:,} {args.report} rows to {args.output}", file=sys.stderr)
+
+    def quotes(self, args):
+        failed = []
+        def collect_errors(event):
+            if event['error']:
+                failed.append(event['symbol'])
+                print(f"{event['symbol']}: {event['error']}", file=sys.stderr)
+        prices = self.stock_service.fetch_live_prices(args.symbols, collect_errors)
+        rows = [{'symbol': symbol, 'price': price} for symbol, price in sorted(prices.items())]
+        self.emit(rows, args.json, fields=['symbol', 'price'])
+        if failed:
+            raise ValueError(f"Could not fetch {len(failed)} of {len(set(args.symbols))} symbols")
+
+    def watch(self, args):
+        if args.interval <= 0:
+            raise ValueError("Interval must be positive")
+        WatchTable(self.stock_service, args.symbols or WATCHLIST, args.interval).run(args.iterations)
+
+    def scheduler(self, args):
+        scheduler = PriceScheduler(self.stock_service, interval=args.interval, batch_size=args.batch_size,
+                                   jitter=args.jitter, always_open=args.ignore_market_hours)
+        signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+
+        def log(event):
+            if event['status'] == 'refreshed':
+                detail = (f"{event['fetched']}/{event['symbols']} fetched, {event['failed']} failed, "
+                          f"{event['written']} written ({event['rows_updated']} rows)")
+            else:
+                detail = event.get('error', '')
+            print(f"[{event['status']}] {detail} | next in {event['delay']:.0f}s", file=sys.stderr)
+
+        print(f"🕒 Price scheduler {scheduler.holder} started", file=sys.stderr)
+        try:
+            scheduler.run(args.iterations, None if args.quiet else log)
+        except KeyboardInterrupt:
+            pass
+        print("🕒 Price scheduler stopped", file=sys.stderr)
+
+
+    def fundamentals(self, args):
+        screener = ScreenerService(self.stock_service)
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+        def show_progress(event):
+            if event['error']:
+                print(f"{event['symbol']}: {event['error']}", file=sys.stderr)
+            elif event['done'] % 100 == 0 or event['done'] == event['total']:
+                print(f"[{event['done']}/{event['total']}] fundamentals fetched", file=sys.stderr)
+
+        try:
+            while not stop.is_set():
+                stats = screener.refresh_fundamentals(args.symbols, args.max_age, None if args.quiet else show_progress)
+                self.emit(stats, args.json)
+                if not args.every or stop.wait(args.every):
+                    break
+        except KeyboardInterrupt:
+            pass
+
+    def screen(self, args):
+        rows, total = ScreenerService(self.stock_service).screen(
+            " ".join(args.expression), args.sort, not args.ascending, args.limit)
+        records = rows.astype(object).where(rows.notna(), None).to_dict("records")
+        self.emit(records, args.json, fields=[c for c in rows.columns if c != 'updated_at'])
+        print(f"{len(rows):,} of {total:,} matching symbols", file=sys.stderr)
+
+    def history(self, args):
+        def show_progress(event):
+            status = f"error: {event['error']}" if event['error'] else f"+{event['days']} days"
+            print(f"[{event['done']}/{event['total']}] {event['symbol']} {status}", file=sys.stderr)
+
+        stats = PriceHistoryService(self.stock_service).refresh(args.symbols, args.years,
+                                                                 None if args.quiet else show_progress)
+        self.emit(stats, args.json)
+
+    def backtest(self, args):
+        from Service.backtest import BacktestService  # Imported here: numpy loads only for backtests
+        user = self.find_user(args.user)
+        portfolio = self.find_portfolio(user.user_id, args.portfolio)
+        service = BacktestService(self.stock_service)
+        params = {'fast': args.fast, 'slow': args.slow} if args.strategy == "sma" else {}
+        if args.sweep:
+            grid = {**{name: [value] for name, value in params.items()}, **parse_grid(args.sweep)}
+            rows = service.sweep_portfolio(portfolio.portfolio_id, args.strategy, grid, args.years, args.cost_bps,
+                                           args.fee, args.workers)
+            self.emit(rows, args.json, fields=list(dict.fromkeys(key for row in rows for key in row)))
+            return
+
+        result = service.backtest_portfolio(portfolio.portfolio_id, args.strategy, args.rebalance, args.years,
+                                            args.cost_bps, args.fee, **params)
+        if result['missing']:
+            print(f"⚠️ No stored history for {', '.join(result['missing'])}; left out", file=sys.stderr)
+        rows = [{'run': args.strategy, **result['strategy'].stats}]
+        if args.strategy != "hold":
+            rows.append({'run': 'buy and hold', **result['buy_and_hold'].stats})
+        self.emit(rows, args.json)
+        if args.equity:
+            curves = result['strategy'].equity.to_frame(args.strategy).join(
+                result['buy_and_hold'].equity.rename("buy and hold"))
+            curves.to_csv(args.equity, index_label="date", date_format="%Y-%m-%d", float_format="%.2f")
+            print(f"Equity curves written to {args.equity}", file=sys.stderr)
+
+
+def parse_grid(specs):
+    """["fast=20,50", "rebalance=monthly,quarterly"] -> {'fast': [20, 50], 'rebalance': ['monthly', 'quarterly']}"""
+    def parse_value(text):
+        for kind in (int, float):
+            try:
+                return kind(text)
+            except ValueError:
+                pass
+        return text
+
+    grid = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        if not sep or not values.strip():
+            raise ValueError(f"Cannot read --sweep {spec}: write name=value1,value2")
+        grid[name.strip().replace("-", "_")] = [parse_value(v.strip()) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="batch_cli", description="Smart Stock Tracker batch commands")
+    parser.add_argument("--profile", action="store_true", help="print a span trace of the command to stderr")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"],
+                        help="also profile the command (implies --profile)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="serve Prometheus metrics on this port while the command runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh = commands.add_parser("refresh", help="refresh prices across all of a user's portfolios")
+    refresh.add_argument("--user", required=True, help="email address or user ID")
+    refresh.add_argument("--quiet", action="store_true", help="no per-symbol progress on stderr")
+    refresh.add_argument("--json", action="store_true")
+    refresh.set_defaults(handler="refresh")
+
+    summary = commands.add_parser("summary", help="portfolio values and gain/loss")
+    summary.add_argument("--user", required=True, help="email address or user ID")
+    summary.add_argument("--json", action="store_true")
+    summary.set_defaults(handler="summary")
+
+    trade = commands.add_parser("trade", help="trade operations")
+    trade_commands = trade.add_subparsers(dest="trade_command", required=True)
+    trade_import = trade_commands.add_parser("import", help="stream broker trade history (CSV or OFX) into a portfolio")
+    trade_import.add_argument("file", help="broker CSV export or OFX/QFX statement")
+    trade_import.add_argument("--user", required=True, help="email address or user ID")
+    trade_import.add_argument("--portfolio", required=True, help="portfolio name or ID")
+    trade_import.add_argument("--format", choices=["csv", "ofx"], help="file format (default: from extension)")
+    trade_import.add_argument("--batch-size", type=int, default=500, help="rows per insert request")
+    trade_import.add_argument("--strict", action="store_true", help="stop at the first invalid row")
+    trade_import.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    trade_import.add_argument("--json", action="store_true")
+    trade_import.set_defaults(handler="trade_import")
+
+    export = commands.add_parser("export", help="stream a report to CSV, Parquet or Excel")
+    export.add_argument("report", nargs="?", default="holdings", choices=list(REPORT_FIELDS))
+    export.add_argument("--user", required=True, help="email address or user ID")
+    export.add_argument("--format", choices=EXPORT_FORMATS, help="output format (default: from --output extension, else csv)")
+    export.add_argument("--output", help="file to write (default: stdout, CSV only)")
+    export.set_defaults(handler="export")
+
+    quotes = commands.add_parser("quotes", help="fetch live prices concurrently")
+    quotes.add_argument("symbols", nargs="+", metavar="SYM")
+    quotes.add_argument("--json", action="store_true")
+    quotes.set_defaults(handler="quotes")
+
+    watch = commands.add_parser("watch", help="live watchlist redrawn in place until Ctrl+C")
+    watch.add_argument("symbols", nargs="*", metavar="SYM", help="symbols to watch (default: WATCHLIST)")
+    watch.add_argument("--interval", type=int, default=5, help="seconds between refreshes")
+    watch.add_argument("--iterations", type=int, help="stop after this many refreshes")
+    watch.set_defaults(handler="watch")
+
+    scheduler = commands.add_parser("scheduler", help="keep every held symbol's price fresh in the background")
+    scheduler.add_argument("--interval", type=float, default=SCHEDULER_INTERVAL,
+                           help="seconds between refreshes while markets are open")
+    scheduler.add_argument("--batch-size", type=int, default=SCHEDULER_BATCH_SIZE, help="symbols per fetch batch")
+    scheduler.add_argument("--jitter", type=float, default=0.1, help="random spread of each sleep (0.1 = ±10%%)")
+    scheduler.add_argument("--ignore-market-hours", action="store_true", help="refresh even while markets are closed")
+    scheduler.add_argument("--iterations", type=int, help="stop after this many wake-ups")
+    scheduler.add_argument("--quiet", action="store_true", help="no per-cycle log on stderr")
+    scheduler.set_defaults(handler="scheduler")
+
+    fundamentals = commands.add_parser("fundamentals", help="refresh the screener's cached fundamentals in bulk")
+    fundamentals.add_argument("symbols", nargs="*", metavar="SYM",
+                              help="symbols to refresh (default: every listed and held symbol)")
+    fundamentals.add_argument("--max-age", type=float, default=FUNDAMENTALS_MAX_AGE,
+                              help="seconds before a symbol's fundamentals are fetched again")
+    fundamentals.add_argument("--every", type=float, help="keep running, refreshing every this many seconds")
+    fundamentals.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    fundamentals.add_argument("--json", action="store_true")
+    fundamentals.set_defaults(handler="fundamentals")
+
+    screen = commands.add_parser("screen", help="filter the cached fundamentals, e.g. \"sector ~ tech and price < 50\"")
+    screen.add_argument("expression", nargs="+", help="conditions joined by 'and': price < 50, market_cap > 10B, sector ~ tech, "
+                        "industry = \"Oil & Gas E&P\" (quote values containing 'and' or |)")
+    screen.add_argument("--sort", default="market_cap", help="column to sort by (default: market_cap)")
+    screen.add_argument("--ascending", action="store_true", help="smallest first")
+    screen.add_argument("--limit", type=int, default=100, help="rows to print (0 = all)")
+    screen.add_argument("--json", action="store_true")
+    screen.set_defaults(handler="screen")
+
+    history = commands.add_parser("history", help="store daily closes for backtests, fetching only missing days")
+    history.add_argument("symbols", nargs="*", metavar="SYM", help="symbols to update (default: every held symbol)")
+    history.add_argument("--years", type=float, default=HISTORY_YEARS, help="history fetched for a new symbol")
+    history.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    history.add_argument("--json", action="store_true")
+    history.set_defaults(handler="history")
+
+    backtest = commands.add_parser("backtest", help="replay a portfolio's current weights over the stored history")
+    backtest.add_argument("--user", required=True, help="email address or user ID")
+    backtest.add_argument("--portfolio", required=True, help="portfolio name or ID")
+    backtest.add_argument("--strategy", choices=["rebalance", "hold", "sma"], default="rebalance",
+                          help="rebalance to today's weights, buy and hold them, or hold each symbol only "
+                               "while its fast moving average is above the slow one")
+    backtest.add_argument("--rebalance", choices=["daily", "weekly", "monthly", "quarterly", "yearly"],
+                          default="monthly")
+    backtest.add_argument("--years", type=float, default=5)
+    backtest.add_argument("--cost-bps", type=float, default=10, help="trading cost in basis points of traded value")
+    backtest.add_argument("--fee", type=float, default=0.0, help="fixed fee per trade")
+    backtest.add_argument("--fast", type=int, default=50, help="sma: fast moving average days")
+    backtest.add_argument("--slow", type=int, default=200, help="sma: slow moving average days")
+    backtest.add_argument("--sweep", action="append", metavar="NAME=V1,V2",
+                          help="run every combination instead (fast, slow, rebalance, cost_bps, fee); repeatable")
+    backtest.add_argument("--workers", type=int, help="sweep processes (default: one per CPU)")
+    backtest.add_argument("--equity", metavar="CSV", help="also write both daily equity curves to this file")
+    backtest.add_argument("--json", action="store_true")
+    backtest.set_defaults(handler="backtest")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    run_trace = run_profile = None
+    try:
+        if args.metrics_port:
+            metrics.start_http_server(args.metrics_port, METRICS_ADDR)
+        with (tracing.trace(args.command) if args.profile or args.profiler else nullcontext()) as run_trace, \
+                tracing.profile(args.profiler) as run_profile:
+            getattr(BatchCLI(), args.handler)(args)
+    except (ValueError, OSError, KeyError, RuntimeError) as e:  # RuntimeError: Supabase not configured
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if run_trace:
+            print(run_trace.format(), file=sys.stderr)
+        if run_profile and run_profile.text:
+            print(run_profile.text, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
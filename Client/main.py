@@ -1,20 +1,41 @@
 import sys
 import os
+import argparse
+import importlib.util
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from Service.user_service import UserService
 from Service.portfolio_service import PortfolioService
 from Client.transaction_cli import TransactionCLI
-from Client.stock_cli import StockCLI
+from Client.stock_cli import StockCLI, pick_symbol
 from Client.portfolio_cli import PortfolioCLI
 from Service.stock_service import StockService
+from Client.market_watch import WatchTable
+from config import WATCHLIST
+from Service import tracing
+from DAO.money import format_cents, format_money, to_cents
+from contextlib import contextmanager
 
 
 class MainCLI:
-    def __init__(self):
+    def __init__(self, profile=False, profiler=None):
         self.user_service = UserService()
         self.portfolio_service = PortfolioService()
         self.current_user = None
+        self.profile = profile or profiler is not None
+        self.profiler = profiler
+
+    @contextmanager
+    def profiled(self, name):
+        """Trace (and optionally profile) one menu action when started with --profile"""
+        if not self.profile:
+            yield
+            return
+        with tracing.trace(name) as run_trace, tracing.profile(self.profiler) as run_profile:
+            yield
+        print("\n" + run_trace.format())
+        if run_profile.text:
+            print(run_profile.text)
 
     def menu(self):
         while True:
@@ -55,7 +76,7 @@ class MainCLI:
         user = self.user_service.user_dao.get_user_by_email(email)
         if user:
             self.current_user = user
-            print(f"✅ Logged in successfully as {user['name']}!")
+            print(f"✅ Logged in successfully as {user.name}!")
             self.dashboard()
         else:
             print("❌ User not found! Please check your email or register first.")
@@ -68,7 +89,7 @@ class MainCLI:
                 break
             
             print("\n" + "="*60)
-            print(f"🎯 INVESTMENT DASHBOARD - Welcome, {self.current_user['name']}!")
+            print(f"🎯 INVESTMENT DASHBOARD - Welcome, {self.current_user.name}!")
             print("="*60)
             print("1. Portfolio Management")
             print("2. Quick Portfolio Overview")
@@ -81,7 +102,8 @@ class MainCLI:
             if choice == "1":
                 PortfolioCLI(self.current_user).menu()
             elif choice == "2":
-                self.quick_portfolio_overview()
+                with self.profiled("Quick Portfolio Overview"):
+                    self.quick_portfolio_overview()
             elif choice == "3":
                 self.market_watch()
             elif choice == "4":
@@ -90,7 +112,7 @@ class MainCLI:
                 if not self.current_user:
                     break
             elif choice == "5":
-                print(f"👋 Goodbye, {self.current_user['name']}! Logging out...")
+                print(f"👋 Goodbye, {self.current_user.name}! Logging out...")
                 self.current_user = None
                 break
             else:
@@ -102,14 +124,14 @@ class MainCLI:
         print("="*50)
         
         try:
-            portfolio_summaries = self.portfolio_service.get_portfolio_summary(self.current_user["user_id"])
+            portfolio_summaries = self.portfolio_service.get_portfolio_summary(self.current_user.user_id)
             
             if not portfolio_summaries:
                 print("No portfolios found. Create your first portfolio to get started!")
                 return
             
-            total_net_worth = 0
-            total_gain_loss = 0
+            net_worth_cents = 0
+            gain_loss_cents = 0
             portfolio_count = len(portfolio_summaries)
             stock_count = 0
             
@@ -118,14 +140,14 @@ class MainCLI:
             
             for summary in portfolio_summaries:
                 if 'error' not in summary:
-                    total_net_worth += summary['current_value']
-                    total_gain_loss += summary['total_gain_loss']
+                    net_worth_cents += to_cents(summary['current_value'])
+                    gain_loss_cents += to_cents(summary['total_gain_loss'])
                     stock_count += summary['stock_count']
                     
                     gain_loss_icon = "🟢" if summary['total_gain_loss'] >= 0 else "🔴"
                     print(f"📁 {summary['portfolio_name']}")
-                    print(f"   💰 Value: ${summary['current_value']:,.2f}")
-                    print(f"   📈 P&L: {gain_loss_icon} ${summary['total_gain_loss']:,.2f} ({summary['gain_loss_percentage']:+.2f}%)")
+                    print(f"   💰 Value: {format_money(summary['current_value'])}")
+                    print(f"   📈 P&L: {gain_loss_icon} {format_money(summary['total_gain_loss'])} ({summary['gain_loss_percentage']:+.2f}%)")
                     print(f"   📊 Stocks: {summary['stock_count']}")
                     print()
                 else:
@@ -134,9 +156,9 @@ class MainCLI:
             
             # Overall summary
             print("─" * 60)
-            overall_icon = "🟢" if total_gain_loss >= 0 else "🔴"
-            print(f"💰 TOTAL NET WORTH: ${total_net_worth:,.2f}")
-            print(f"📈 TOTAL GAIN/LOSS: {overall_icon} ${total_gain_loss:,.2f}")
+            overall_icon = "🟢" if gain_loss_cents >= 0 else "🔴"
+            print(f"💰 TOTAL NET WORTH: {format_cents(net_worth_cents)}")
+            print(f"📈 TOTAL GAIN/LOSS: {overall_icon} {format_cents(gain_loss_cents)}")
             print(f"📊 PORTFOLIOS: {portfolio_count} | STOCKS: {stock_count}")
             
             # Quick actions
@@ -159,22 +181,23 @@ class MainCLI:
         print(f"\n🔄 REFRESHING ALL PORTFOLIO PRICES")
         print("="*40)
         
-        portfolios = self.portfolio_service.get_user_portfolios(self.current_user["user_id"])
+        portfolios = self.portfolio_service.get_user_portfolios(self.current_user.user_id)
         if not portfolios:
             print("No portfolios found.")
             return
         
-        total_updated = 0
-        for portfolio in portfolios:
-            try:
-                result = self.portfolio_service.refresh_portfolio_prices(portfolio['portfolio_id'])
-                updated = result['stocks_updated']
-                total_updated += updated
-                print(f"✅ {portfolio['portfolio_name']}: Updated {updated} stocks")
-            except Exception as e:
-                print(f"❌ {portfolio['portfolio_name']}: Error - {e}")
+        def show_progress(event):
+            if event['error']:
+                print(f"[{event['done']}/{event['total']}] ❌ {event['symbol']}: {event['error']}")
+            else:
+                print(f"[{event['done']}/{event['total']}] ✅ {event['symbol']}: ${event['price']:,.2f}")
         
-        print(f"\n🎉 Successfully updated {total_updated} stock prices across {len(portfolios)} portfolios!")
+        try:
+            result = self.portfolio_service.refresh_user_prices(self.current_user.user_id, show_progress)
+            print(f"\n🎉 Successfully updated {result['stocks_updated']} stock prices "
+                  f"({result['symbol_count']} symbols) across {result['portfolio_count']} portfolios!")
+        except Exception as e:
+            print(f"❌ Error refreshing prices: {e}")
         
         # Show updated overview
         input("\nPress Enter to view updated portfolio values...")
@@ -188,14 +211,18 @@ class MainCLI:
         while True:
             print("\n1. Search Stock Information")
             print("2. View Market Trends (Top Stocks)")
-            print("3. Back to Dashboard")
+            print("3. Live Watch Mode")
+            print("4. Back to Dashboard")
             
             choice = input("\nEnter choice: ")
             if choice == "1":
                 self.search_stock_info()
             elif choice == "2":
-                self.show_market_trends()
+                with self.profiled("Market Trends"):
+                    self.show_market_trends()
             elif choice == "3":
+                self.live_watch()
+            elif choice == "4":
                 break
             else:
                 print("❌ Invalid choice!")
@@ -203,14 +230,14 @@ class MainCLI:
     def search_stock_info(self):
         """Search for stock information"""
         print(f"\n🔍 SEARCH STOCK INFORMATION")
-        symbol = input("Enter stock symbol (e.g., AAPL, TSLA, GOOGL): ").strip().upper()
+        stock_service = StockService()
+        symbol = pick_symbol(stock_service, input("Enter stock symbol or company name (e.g., AAPL, Tesla): "))
         
         if not symbol:
             return
         
         try:
-            # Use StockService to get information
-            stock_service = StockService()
+            # Live data only for the symbol picked from the local listings
             stock_info = stock_service.search_stock_info(symbol)
             
             print(f"\n📊 STOCK INFORMATION: {symbol}")
@@ -245,14 +272,14 @@ class MainCLI:
 
     def add_stock_to_portfolio(self, symbol, current_price):
         """Quick add stock to portfolio"""
-        portfolios = self.portfolio_service.get_user_portfolios(self.current_user["user_id"])
+        portfolios = self.portfolio_service.get_user_portfolios(self.current_user.user_id)
         if not portfolios:
             print("❌ No portfolios found. Please create a portfolio first.")
             return
         
         print(f"\n📁 Available Portfolios:")
         for i, portfolio in enumerate(portfolios, 1):
-            print(f"{i}. {portfolio['portfolio_name']}")
+            print(f"{i}. {portfolio.portfolio_name}")
         
         try:
             choice = int(input(f"\nSelect portfolio (1-{len(portfolios)}): ")) - 1
@@ -261,10 +288,10 @@ class MainCLI:
                 quantity = int(input(f"Enter quantity of {symbol} to add: "))
                 
                 stock_service = StockService()
-                stock_service.add_stock(selected_portfolio['portfolio_id'], symbol, quantity, current_price)
+                stock_service.add_stock(selected_portfolio.portfolio_id, symbol, quantity, current_price)
                 
                 total_cost = current_price * quantity
-                print(f"✅ Successfully added {quantity} shares of {symbol} to {selected_portfolio['portfolio_name']}!")
+                print(f"✅ Successfully added {quantity} shares of {symbol} to {selected_portfolio.portfolio_name}!")
                 print(f"💰 Total Cost: ${total_cost:,.2f}")
             else:
                 print("❌ Invalid selection!")
@@ -276,44 +303,49 @@ class MainCLI:
         print(f"\n📈 MARKET TRENDS - POPULAR STOCKS")
         print("="*50)
         
-        popular_stocks = [
-            "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", 
-            "META", "NVDA", "NFLX", "AMD", "INTC"
-        ]
-        
         stock_service = StockService()
         
         print(f"\n🔍 Fetching latest prices...")
+        rows = stock_service.get_market_snapshot(WATCHLIST)
+        
         print(f"{'Symbol':<8} {'Company':<20} {'Price':<12} {'Change':<15}")
         print("─" * 55)
         
-        for symbol in popular_stocks:
-            try:
-                stock_info = stock_service.search_stock_info(symbol)
-                change = stock_info['current_price'] - stock_info['previous_close']
-                change_percent = (change / stock_info['previous_close']) * 100
-                change_icon = "🟢" if change >= 0 else "🔴"
-                change_str = f"{change_icon} ${change:+.2f} ({change_percent:+.1f}%)"
-                
-                # Truncate company name
-                company_name = stock_info['company_name'][:18] + "..." if len(stock_info['company_name']) > 18 else stock_info['company_name']
-                
-                print(f"{symbol:<8} {company_name:<20} ${stock_info['current_price']:<11.2f} {change_str:<15}")
-                
-            except Exception as e:
-                print(f"{symbol:<8} {'Error fetching data':<20} {'N/A':<12} {'N/A':<15}")
+        for row in rows:
+            if row['current_price'] is None:
+                print(f"{row['symbol']:<8} {'Error fetching data':<20} {'N/A':<12} {'N/A':<15}")
+                continue
+            change_icon = "🟢" if row['change'] >= 0 else "🔴"
+            change_str = f"{change_icon} ${row['change']:+.2f} ({row['change_percent']:+.1f}%)"
+            
+            # Truncate company name
+            company_name = row['company_name'][:18] + "..." if len(row['company_name']) > 18 else row['company_name']
+            
+            print(f"{row['symbol']:<8} {company_name:<20} ${row['current_price']:<11.2f} {change_str:<15}")
         
         print(f"\n💡 Tip: Use 'Search Stock Information' for detailed analysis")
 
+    def live_watch(self):
+        """Keep the watchlist on screen, refreshing prices in place"""
+        try:
+            interval = int(input("Refresh interval in seconds (default 5): ") or 5)
+        except ValueError:
+            print("❌ Invalid interval!")
+            return
+        if interval <= 0:
+            print("❌ Interval must be positive!")
+            return
+        WatchTable(StockService(), WATCHLIST, interval).run()
+
     def account_settings(self):
         """User account settings"""
         print(f"\n⚙️  ACCOUNT SETTINGS")
         print("="*40)
         
         while True:
-            print(f"\n👤 User: {self.current_user['name']}")
-            print(f"📧 Email: {self.current_user['email']}")
-            print(f"🆔 User ID: {self.current_user['user_id']}")
+            print(f"\n👤 User: {self.current_user.name}")
+            print(f"📧 Email: {self.current_user.email}")
+            print(f"🆔 User ID: {self.current_user.user_id}")
             
             print(f"\n1. Update Profile")
             print("2. Delete Account")
@@ -333,25 +365,25 @@ class MainCLI:
     def update_profile(self):
         """Update user profile"""
         print(f"\n✏️  UPDATE PROFILE")
-        new_name = input(f"Enter new name (current: {self.current_user['name']}): ").strip()
-        new_email = input(f"Enter new email (current: {self.current_user['email']}): ").strip()
+        new_name = input(f"Enter new name (current: {self.current_user.name}): ").strip()
+        new_email = input(f"Enter new email (current: {self.current_user.email}): ").strip()
         
         if not new_name and not new_email:
             print("ℹ️ No changes made.")
             return
         
         if not new_name:
-            new_name = self.current_user['name']
+            new_name = self.current_user.name
         if not new_email:
-            new_email = self.current_user['email']
+            new_email = self.current_user.email
         
         confirm = input(f"\nUpdate profile to:\nName: {new_name}\nEmail: {new_email}\nConfirm? (y/n): ")
         if confirm.lower() == 'y':
             try:
-                self.user_service.update_profile(self.current_user["user_id"], new_name, new_email)
+                self.user_service.update_profile(self.current_user.user_id, new_name, new_email)
                 # Update current user data
-                self.current_user['name'] = new_name
-                self.current_user['email'] = new_email
+                self.current_user.name = new_name
+                self.current_user.email = new_email
                 print("✅ Profile updated successfully!")
             except ValueError as e:
                 print(f"❌ Error: {e}")
@@ -370,7 +402,7 @@ class MainCLI:
         confirm2 = input(f"FINAL WARNING: This will erase ALL your data permanently! (type 'CONFIRM' to proceed): ")
         if confirm2 == "CONFIRM":
             try:
-                self.user_service.delete_account(self.current_user["user_id"])
+                self.user_service.delete_account(self.current_user.user_id)
                 print("✅ Account deleted successfully!")
                 self.current_user = None
                 return True  # Indicate that account was deleted
@@ -382,12 +414,17 @@ class MainCLI:
 
 
 if __name__ == "__main__":
-    # Check for required dependencies
-    try:
-        import yfinance
+    # Check for required dependencies without importing them (they load on first use)
+    parser = argparse.ArgumentParser(description="Smart Stock Tracker")
+    parser.add_argument("--profile", action="store_true", help="print a span trace after overview and market actions")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], help="also profile those actions")
+    args = parser.parse_args()
+    if args.profiler and args.profiler not in tracing.available_profilers():
+        parser.error(f"{args.profiler} is not installed: pip install {args.profiler}")
+    if all(importlib.util.find_spec(name) for name in ("yfinance", "supabase")):
         print("🚀 Starting Smart Stock Tracker...")
-        MainCLI().menu()
-    except ImportError:
+        MainCLI(args.profile, args.profiler).menu()
+    else:
         print("❌ Missing required dependencies!")
         print("💡 Please install required packages: pip install yfinance pandas")
         print("💡 Or run: pip install -r requirements.txt")
\ No newline at end of file
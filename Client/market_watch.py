@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from datetime import datetime
+
+GREEN = "\x1b[32m"
+RED = "\x1b[31m"
+RESET = "\x1b[0m"
+
+# (header, width) of each column; cells are padded to width so they can be
+# overwritten in place without redrawing the row
+COLUMNS = [("Symbol", 8), ("Company", 22), ("Price", 12), ("Change", 12), ("Change %", 10)]
+HEADER_LINES = 4  # title, blank, column headers, rule
+
+
+class WatchTable:
+    """Terminal watchlist redrawn in place; only cells whose text changed are rewritten"""
+
+    def __init__(self, stock_service, symbols, interval=5, out=None):
+        self.stock_service = stock_service
+        self.symbols = [s.upper() for s in symbols]
+        self.interval = interval
+        self.out = out or sys.stdout
+        self.cells = None
+        if os.name == "nt":
+            os.system("")  # Enable ANSI escape handling on Windows terminals
+
+    def format_row(self, row):
+        """Cell texts and colour for one snapshot row"""
+        if row['current_price'] is None:
+            return [row['symbol'], "Error fetching data", "N/A", "N/A", "N/A"], None
+        company = row['company_name']
+        company = company[:19] + "..." if len(company) > 22 else company
+        color = GREEN if row['change'] >= 0 else RED
+        return [
+            row['symbol'],
+            company,
+            f"${row['current_price']:,.2f}",
+            f"{row['change']:+,.2f}",
+            f"{row['change_percent']:+.2f}%",
+        ], color
+
+    def _write_cell(self, line, column, text, color):
+        offset = sum(width + 1 for _, width in COLUMNS[:column])
+        width = COLUMNS[column][1]
+        cell = text[:width].ljust(width)
+        if color and column >= 3:
+            cell = f"{color}{cell}{RESET}"
+        self.out.write(f"\x1b[{line};{offset + 1}H{cell}")
+
+    def draw(self, rows):
+        """Draw the whole table once"""
+        self.out.write("\x1b[2J\x1b[H")
+        self.out.write("📈 MARKET WATCH (Ctrl+C to stop)\n\n")
+        self.out.write(" ".join(header.ljust(width) for header, width in COLUMNS) + "\n")
+        self.out.write("─" * sum(width + 1 for _, width in COLUMNS) + "\n")
+        self.cells = []
+        for i, row in enumerate(rows):
+            texts, color = self.format_row(row)
+            for column, text in enumerate(texts):
+                self._write_cell(HEADER_LINES + i + 1, column, text, color)
+            self.cells.append(texts)
+
+    def update(self, rows):
+        """Rewrite only the cells whose text changed; returns how many changed"""
+        changed = 0
+        for i, row in enumerate(rows):
+            texts, color = self.format_row(row)
+            for column, text in enumerate(texts):
+                if self.cells[i][column] != text:
+                    self._write_cell(HEADER_LINES + i + 1, column, text, color)
+                    changed += 1
+            self.cells[i] = texts
+        return changed
+
+    def status(self, message):
+        line = HEADER_LINES + len(self.symbols) + 2
+        self.out.write(f"\x1b[{line};1H\x1b[2K{message}")
+
+    def run(self, iterations=None):
+        """Refresh every interval seconds until Ctrl+C (or for iterations ticks)"""
+        tick = 0
+        try:
+            while iterations is None or tick < iterations:
+                refetched = len(self.stock_service.quote_cache.stale_symbols(self.symbols))
+                rows = self.stock_service.get_market_snapshot(self.symbols)
+                if self.cells is None:
+                    self.draw(rows)
+                    changed = len(rows) * len(COLUMNS)
+                else:
+                    changed = self.update(rows)
+                self.status(f"🕒 {datetime.now().strftime('%H:%M:%S')} | "
+                            f"{refetched} quotes refetched | {changed} cells changed | every {self.interval}s")
+                self.out.flush()
+                tick += 1
+                if iterations is None or tick < iterations:
+                    time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.out.write(f"\x1b[{HEADER_LINES + len(self.symbols) + 3};1H\n")
+            self.out.flush()
@@ -3,6 +3,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from Service.portfolio_service import PortfolioService
+from DAO.money import format_cents, format_money, to_cents
 from Client.stock_cli import StockCLI
 from Client.transaction_cli import TransactionCLI
 
@@ -46,28 +47,28 @@ class PortfolioCLI:
         print("\n--- Create New Portfolio ---")
         name = input("Enter portfolio name: ")
         try:
-            self.service.create_portfolio(self.user['user_id'], name)
+            self.service.create_portfolio(self.user.user_id, name)
             print("✅ Portfolio created successfully!")
         except ValueError as e:
             print("❌ Error:", e)
 
     def view_portfolios(self):
         print("\n--- Your Portfolios ---")
-        portfolio_summaries = self.service.get_portfolio_summary(self.user['user_id'])
+        portfolio_summaries = self.service.get_portfolio_summary(self.user.user_id)
         
         if portfolio_summaries:
-            total_net_worth = 0
-            total_gain_loss = 0
+            net_worth_cents = 0
+            gain_loss_cents = 0
             
             for summary in portfolio_summaries:
                 if 'error' not in summary:
-                    total_net_worth += summary['current_value']
-                    total_gain_loss += summary['total_gain_loss']
+                    net_worth_cents += to_cents(summary['current_value'])
+                    gain_loss_cents += to_cents(summary['total_gain_loss'])
                     
                     gain_loss_color = "🟢" if summary['total_gain_loss'] >= 0 else "🔴"
                     print(f"\n📁 {summary['portfolio_name']} (ID: {summary['portfolio_id']})")
-                    print(f"   💰 Current Value: ${summary['current_value']:,.2f}")
-                    print(f"   📈 Gain/Loss: {gain_loss_color} ${summary['total_gain_loss']:,.2f} ({summary['gain_loss_percentage']:+.2f}%)")
+                    print(f"   💰 Current Value: {format_money(summary['current_value'])}")
+                    print(f"   📈 Gain/Loss: {gain_loss_color} {format_money(summary['total_gain_loss'])} ({summary['gain_loss_percentage']:+.2f}%)")
                     print(f"   📊 Stocks: {summary['stock_count']}")
                 else:
                     print(f"\n📁 {summary['portfolio_name']} (ID: {summary['portfolio_id']})")
@@ -75,9 +76,9 @@ class PortfolioCLI:
             
             # Display totals
             print("\n" + "─" * 40)
-            total_color = "🟢" if total_gain_loss >= 0 else "🔴"
-            print(f"💰 TOTAL NET WORTH: ${total_net_worth:,.2f}")
-            print(f"📈 TOTAL GAIN/LOSS: {total_color} ${total_gain_loss:,.2f}")
+            total_color = "🟢" if gain_loss_cents >= 0 else "🔴"
+            print(f"💰 TOTAL NET WORTH: {format_cents(net_worth_cents)}")
+            print(f"📈 TOTAL GAIN/LOSS: {total_color} {format_cents(gain_loss_cents)}")
             
             # Option to manage specific portfolio
             self.manage_specific_portfolio()
@@ -86,7 +87,7 @@ class PortfolioCLI:
 
     def portfolio_analytics(self):
         print("\n--- Portfolio Analytics ---")
-        portfolios = self.service.get_user_portfolios(self.user['user_id'])
+        portfolios = self.service.get_user_portfolios(self.user.user_id)
         
         if not portfolios:
             print("No portfolios found.")
@@ -94,7 +95,7 @@ class PortfolioCLI:
         
         # List portfolios
         for p in portfolios:
-            print(f"ID: {p['portfolio_id']} | Name: {p['portfolio_name']}")
+            print(f"ID: {p.portfolio_id} | Name: {p.portfolio_name}")
         
         pid = input("\nEnter portfolio ID for detailed analytics (or press Enter to go back): ")
         if pid:
@@ -111,7 +112,7 @@ class PortfolioCLI:
         stocks = analytics['stocks']
         
         print(f"\n" + "="*60)
-        print(f"📊 DETAILED ANALYTICS: {portfolio['portfolio_name']}")
+        print(f"📊 DETAILED ANALYTICS: {portfolio.portfolio_name}")
         print("="*60)
         
         # Performance metrics
@@ -129,31 +130,31 @@ class PortfolioCLI:
         print(f"\n📈 STOCK HOLDINGS ({len(stocks)} stocks):")
         if stocks:
             for stock in stocks:
-                value = stock['price'] * stock['quantity']
-                print(f"   {stock['symbol']}: {stock['quantity']} shares @ ${stock['price']:.2f} = ${value:,.2f}")
+                value = stock.total_value
+                print(f"   {stock.symbol}: {stock.quantity} shares @ ${stock.price:.2f} = ${value:,.2f}")
             
             # Top performers
             if analytics['top_stock']:
                 top = analytics['top_stock']
-                top_value = top['price'] * top['quantity']
-                print(f"\n⭐ TOP HOLDING: {top['symbol']} (${top_value:,.2f})")
+                top_value = top.total_value
+                print(f"\n⭐ TOP HOLDING: {top.symbol} (${top_value:,.2f})")
             
             if analytics['highest_quantity_stock']:
                 high_qty = analytics['highest_quantity_stock']
-                print(f"📦 LARGEST POSITION: {high_qty['symbol']} ({high_qty['quantity']} shares)")
+                print(f"📦 LARGEST POSITION: {high_qty.symbol} ({high_qty.quantity} shares)")
         else:
             print("   No stocks in this portfolio.")
 
     def refresh_portfolio_prices(self):
         print("\n--- Refresh Portfolio Prices ---")
-        portfolios = self.service.get_user_portfolios(self.user['user_id'])
+        portfolios = self.service.get_user_portfolios(self.user.user_id)
         
         if not portfolios:
             print("No portfolios found.")
             return
         
         for p in portfolios:
-            print(f"ID: {p['portfolio_id']} | Name: {p['portfolio_name']}")
+            print(f"ID: {p.portfolio_id} | Name: {p.portfolio_name}")
         
         pid = input("\nEnter portfolio ID to refresh prices (or press Enter to go back): ")
         if pid:
@@ -165,14 +166,14 @@ class PortfolioCLI:
 
     def update_portfolio(self):
         print("\n--- Update Portfolio ---")
-        portfolios = self.service.get_user_portfolios(self.user['user_id'])
+        portfolios = self.service.get_user_portfolios(self.user.user_id)
         
         if not portfolios:
             print("No portfolios found.")
             return
         
         for p in portfolios:
-            print(f"ID: {p['portfolio_id']} | Name: {p['portfolio_name']}")
+            print(f"ID: {p.portfolio_id} | Name: {p.portfolio_name}")
         
         pid = input("\nEnter portfolio ID to update: ")
         new_name = input("Enter new portfolio name: ")
@@ -185,14 +186,14 @@ class PortfolioCLI:
 
     def delete_portfolio(self):
         print("\n--- Delete Portfolio ---")
-        portfolios = self.service.get_user_portfolios(self.user['user_id'])
+        portfolios = self.service.get_user_portfolios(self.user.user_id)
         
         if not portfolios:
             print("No portfolios found.")
             return
         
         for p in portfolios:
-            print(f"ID: {p['portfolio_id']} | Name: {p['portfolio_name']}")
+            print(f"ID: {p.portfolio_id} | Name: {p.portfolio_name}")
         
         pid = input("\nEnter portfolio ID to delete: ")
         confirm = input("❓ Are you sure? This will delete ALL stocks and transactions in this portfolio! (y/n): ")
@@ -221,7 +222,7 @@ class PortfolioCLI:
         """Menu for managing a specific portfolio's stocks and transactions"""
         while True:
             print(f"\n" + "="*50)
-            print(f"🎯 MANAGING PORTFOLIO: {portfolio['portfolio_name']}")
+            print(f"🎯 MANAGING PORTFOLIO: {portfolio.portfolio_name}")
             print("="*50)
             print("1. Manage Stocks")
             print("2. Manage Transactions")
@@ -235,10 +236,10 @@ class PortfolioCLI:
             elif choice == "2":
                 TransactionCLI(portfolio).menu()
             elif choice == "3":
-                analytics = self.service.get_portfolio_analytics(portfolio['portfolio_id'])
+                analytics = self.service.get_portfolio_analytics(portfolio.portfolio_id)
                 self.display_detailed_analytics(analytics)
             elif choice == "4":
-                result = self.service.refresh_portfolio_prices(portfolio['portfolio_id'])
+                result = self.service.refresh_portfolio_prices(portfolio.portfolio_id)
                 print(f"✅ Updated {result['stocks_updated']} stock prices")
             elif choice == "5":
                 break
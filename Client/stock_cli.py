@@ -3,6 +3,31 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from Service.stock_service import StockService
+from DAO.money import format_cents
+
+def pick_symbol(service, query):
+    """Resolve a ticker or company name through the local listings; None if nothing was chosen"""
+    query = query.strip()
+    if not query:
+        return None
+    matches = service.search_symbols(query)
+    if not matches:
+        return query.upper()  # Not listed locally; try it as a ticker
+    if matches[0]['symbol'] == query.upper():
+        return matches[0]['symbol']
+    
+    print(f"\n🔎 Matches for '{query}':")
+    for i, match in enumerate(matches, 1):
+        print(f"{i:>3}. {match['symbol']:<9} {match['name'][:38]:<38} {match['exchange']:<7} {match['sector']}")
+    while True:
+        choice = input(f"Pick 1-{len(matches)} (Enter for 1, 0 to cancel): ").strip()
+        if not choice:
+            return matches[0]['symbol']
+        if choice == "0":
+            return None
+        if choice.isdigit() and 1 <= int(choice) <= len(matches):
+            return matches[int(choice) - 1]['symbol']
+        print("❌ Invalid choice!")
 
 class StockCLI:
     def __init__(self, portfolio):
@@ -12,7 +37,7 @@ class StockCLI:
     def menu(self):
         while True:
             print(f"\n" + "="*60)
-            print(f"📈 STOCK MANAGEMENT - {self.portfolio['portfolio_name']}")
+            print(f"📈 STOCK MANAGEMENT - {self.portfolio.portfolio_name}")
             print("="*60)
             print("1. Add Stock (with Live Price)")
             print("2. Add Stock (Manual Price)")
@@ -48,7 +73,9 @@ class StockCLI:
 
     def add_stock_with_live_price(self):
         print(f"\n--- Add Stock with Live Price ---")
-        symbol = input("Enter stock symbol (e.g., AAPL, TSLA, GOOGL): ").strip().upper()
+        symbol = pick_symbol(self.service, input("Enter stock symbol or company name (e.g., AAPL, Tesla): "))
+        if not symbol:
+            return
         quantity = self.get_positive_integer("Enter quantity: ")
         
         try:
@@ -63,7 +90,7 @@ class StockCLI:
             
             confirm = input(f"\nAdd {quantity} shares of {symbol} at ${stock_info['current_price']:.2f}? (y/n): ")
             if confirm.lower() == 'y':
-                self.service.add_stock_with_live_price(self.portfolio["portfolio_id"], symbol, quantity)
+                self.service.add_stock_with_live_price(self.portfolio.portfolio_id, symbol, quantity)
                 total_cost = stock_info['current_price'] * quantity
                 print(f"✅ Successfully added {quantity} shares of {symbol} at ${stock_info['current_price']:.2f}")
                 print(f"💰 Total Cost: ${total_cost:,.2f}")
@@ -80,7 +107,7 @@ class StockCLI:
             total_cost = price * quantity
             confirm = input(f"\nAdd {quantity} shares of {symbol} at ${price:.2f}? Total: ${total_cost:,.2f} (y/n): ")
             if confirm.lower() == 'y':
-                self.service.add_stock(self.portfolio["portfolio_id"], symbol, price, quantity)
+                self.service.add_stock(self.portfolio.portfolio_id, symbol, price, quantity)
                 print(f"✅ Stock added successfully!")
                 print(f"📦 {quantity} shares of {symbol} at ${price:.2f} = ${total_cost:,.2f}")
         except ValueError as e:
@@ -88,7 +115,9 @@ class StockCLI:
 
     def search_stock_info(self):
         print(f"\n--- Search Stock Information ---")
-        symbol = input("Enter stock symbol to search: ").strip().upper()
+        symbol = pick_symbol(self.service, input("Enter stock symbol or company name to search: "))
+        if not symbol:
+            return
         
         try:
             stock_info = self.service.search_stock_info(symbol)
@@ -114,24 +143,24 @@ class StockCLI:
             print(f"❌ Error: {e}")
 
     def view_stocks(self):
-        print(f"\n--- Stocks in {self.portfolio['portfolio_name']} ---")
-        stocks = self.service.get_stocks(self.portfolio["portfolio_id"])
+        print(f"\n--- Stocks in {self.portfolio.portfolio_name} ---")
+        stocks = self.service.get_stocks(self.portfolio.portfolio_id)
         
         if stocks:
-            total_portfolio_value = 0
+            total_cents = 0
             print(f"\n{'Symbol':<8} {'Quantity':<10} {'Price':<12} {'Total Value':<15}")
             print("─" * 50)
             
             for stock in stocks:
-                total_value = stock['price'] * stock['quantity']
-                total_portfolio_value += total_value
-                print(f"{stock['symbol']:<8} {stock['quantity']:<10} ${stock['price']:<11.2f} ${total_value:<14,.2f}")
+                total_value = stock.total_value
+                total_cents += stock.total_cents
+                print(f"{stock.symbol:<8} {stock.quantity:<10} ${stock.price:<11.2f} ${total_value:<14,.2f}")
             
             print("─" * 50)
-            print(f"💰 TOTAL PORTFOLIO VALUE: ${total_portfolio_value:,.2f}")
+            print(f"💰 TOTAL PORTFOLIO VALUE: {format_cents(total_cents)}")
             
             # Show stock count and last updated
-            print(f"📊 Stocks: {len(stocks)} | Last Updated: {stocks[0].get('created_at', 'N/A')}")
+            print(f"📊 Stocks: {len(stocks)} | Last Updated: {stocks[0].created_at or 'N/A'}")
         else:
             print("No stocks found in this portfolio.")
 
@@ -151,7 +180,7 @@ class StockCLI:
                 return
                 
             stock = stock_data[0]
-            print(f"\nCurrent: {stock['symbol']} - Qty: {stock['quantity']} - Price: ${stock['price']:.2f}")
+            print(f"\nCurrent: {stock.symbol} - Qty: {stock.quantity} - Price: ${stock.price:.2f}")
             
             # Get updates
             price_input = input("Enter new price (or press Enter to keep current): ").strip()
@@ -186,9 +215,9 @@ class StockCLI:
                 return
                 
             stock = stock_data[0]
-            total_value = stock['price'] * stock['quantity']
+            total_value = stock.total_value
             
-            confirm = input(f"❓ Delete {stock['quantity']} shares of {stock['symbol']} (worth ${total_value:,.2f})? (y/n): ")
+            confirm = input(f"❓ Delete {stock.quantity} shares of {stock.symbol} (worth ${total_value:,.2f})? (y/n): ")
             if confirm.lower() == 'y':
                 self.service.delete_stock(sid)
                 print("✅ Stock deleted successfully!")
@@ -198,7 +227,7 @@ class StockCLI:
 
     def refresh_all_prices(self):
         print(f"\n--- Refresh All Stock Prices ---")
-        stocks = self.service.get_stocks(self.portfolio["portfolio_id"])
+        stocks = self.service.get_stocks(self.portfolio.portfolio_id)
         
         if not stocks:
             print("No stocks to refresh.")
@@ -207,7 +236,7 @@ class StockCLI:
         print(f"🔄 Refreshing prices for {len(stocks)} stocks...")
         
         try:
-            updated_count = self.service.refresh_stock_prices(self.portfolio["portfolio_id"])
+            updated_count = self.service.refresh_stock_prices(self.portfolio.portfolio_id)
             print(f"✅ Successfully updated {updated_count} stock prices")
             
             # Show updated portfolio
@@ -229,7 +258,7 @@ class StockCLI:
             stock_data = self.service.stock_dao.get_stock_by_id(sid)
             if stock_data:
                 stock = stock_data[0]
-                print(f"✅ {stock['symbol']} price updated to ${new_price:.2f}")
+                print(f"✅ {stock.symbol} price updated to ${new_price:.2f}")
                 
         except ValueError as e:
             print(f"❌ Error: {e}")
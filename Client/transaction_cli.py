@@ -4,6 +4,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from Service.transaction_service import TransactionService
 from Service.stock_service import StockService
+from DAO.money import format_cents
 from datetime import datetime
 
 class TransactionCLI:
@@ -15,7 +16,7 @@ class TransactionCLI:
     def menu(self):
         while True:
             print(f"\n" + "="*60)
-            print(f"💰 TRANSACTION MANAGEMENT - {self.portfolio['portfolio_name']}")
+            print(f"💰 TRANSACTION MANAGEMENT - {self.portfolio.portfolio_name}")
             print("="*60)
             print("1. Buy Stock")
             print("2. Sell Stock")
@@ -58,20 +59,20 @@ class TransactionCLI:
             return
             
         stock = stock_data[0]
-        current_price = stock['price']
+        current_price = stock.price
         
-        print(f"\n💡 Buying {stock['symbol']} - Current Price: ${current_price:.2f}")
+        print(f"\n💡 Buying {stock.symbol} - Current Price: ${current_price:.2f}")
         
         quantity = self.get_positive_integer("Enter quantity to buy: ")
         price = self.get_positive_float(f"Enter price per stock (Current: ${current_price:.2f}): $")
         
         total_cost = quantity * price
-        confirm = input(f"\nConfirm buy {quantity} shares of {stock['symbol']} at ${price:.2f}? Total: ${total_cost:,.2f} (y/n): ")
+        confirm = input(f"\nConfirm buy {quantity} shares of {stock.symbol} at ${price:.2f}? Total: ${total_cost:,.2f} (y/n): ")
         
         if confirm.lower() == 'y':
             try:
-                self.trans_service.buy_stock(self.portfolio['portfolio_id'], stock_id, quantity, price)
-                print(f"✅ Successfully purchased {quantity} shares of {stock['symbol']}!")
+                self.trans_service.buy_stock(self.portfolio.portfolio_id, stock_id, quantity, price)
+                print(f"✅ Successfully purchased {quantity} shares of {stock.symbol}!")
                 print(f"💰 Total Cost: ${total_cost:,.2f}")
             except ValueError as e:
                 print(f"❌ Error: {e}")
@@ -91,10 +92,10 @@ class TransactionCLI:
             return
             
         stock = stock_data[0]
-        current_price = stock['price']
-        available_quantity = stock['quantity']
+        current_price = stock.price
+        available_quantity = stock.quantity
         
-        print(f"\n💡 Selling {stock['symbol']} - Available: {available_quantity} shares - Current Price: ${current_price:.2f}")
+        print(f"\n💡 Selling {stock.symbol} - Available: {available_quantity} shares - Current Price: ${current_price:.2f}")
         
         quantity = self.get_positive_integer("Enter quantity to sell: ")
         if quantity > available_quantity:
@@ -104,12 +105,12 @@ class TransactionCLI:
         price = self.get_positive_float(f"Enter price per stock (Current: ${current_price:.2f}): $")
         
         total_proceeds = quantity * price
-        confirm = input(f"\nConfirm sell {quantity} shares of {stock['symbol']} at ${price:.2f}? Total: ${total_proceeds:,.2f} (y/n): ")
+        confirm = input(f"\nConfirm sell {quantity} shares of {stock.symbol} at ${price:.2f}? Total: ${total_proceeds:,.2f} (y/n): ")
         
         if confirm.lower() == 'y':
             try:
-                self.trans_service.sell_stock(self.portfolio['portfolio_id'], stock_id, quantity, price)
-                print(f"✅ Successfully sold {quantity} shares of {stock['symbol']}!")
+                self.trans_service.sell_stock(self.portfolio.portfolio_id, stock_id, quantity, price)
+                print(f"✅ Successfully sold {quantity} shares of {stock.symbol}!")
                 print(f"💰 Total Proceeds: ${total_proceeds:,.2f}")
                 
                 # Show remaining quantity
@@ -121,8 +122,8 @@ class TransactionCLI:
                 print(f"❌ Error: {e}")
 
     def view_transactions(self):
-        print(f"\n--- All Transactions for {self.portfolio['portfolio_name']} ---")
-        transactions = self.trans_service.get_portfolio_transactions(self.portfolio['portfolio_id'])
+        print(f"\n--- All Transactions for {self.portfolio.portfolio_name} ---")
+        transactions = self.trans_service.get_portfolio_transactions(self.portfolio.portfolio_id)
         
         if transactions:
             total_buys = 0
@@ -133,19 +134,16 @@ class TransactionCLI:
             
             for t in transactions:
                 # Get stock symbol
-                stock_data = self.stock_service.stock_dao.get_stock_by_id(t['stock_id'])
-                symbol = stock_data[0]['symbol'] if stock_data else f"ID:{t['stock_id']}"
+                stock_data = self.stock_service.stock_dao.get_stock_by_id(t.stock_id)
+                symbol = stock_data[0].symbol if stock_data else f"ID:{t.stock_id}"
                 
                 # Format date
-                trans_date = t.get('date', '')
-                if trans_date:
-                    if isinstance(trans_date, str) and 'T' in trans_date:
-                        trans_date = trans_date.split('T')[0]
+                trans_date = t.date.strftime('%Y-%m-%d') if t.date else ''
                 
-                quantity = t['quantity']
-                price = t['price']
+                quantity = t.quantity
+                price = t.price
                 total = quantity * price
-                trans_type = t['type']
+                trans_type = t.type
                 
                 # Color code buys/sells
                 type_icon = "🟢 BUY" if trans_type == 'Buy' else "🔴 SELL"
@@ -168,9 +166,9 @@ class TransactionCLI:
     def portfolio_performance(self):
         print(f"\n--- Portfolio Performance Analytics ---")
         try:
-            performance = self.trans_service.get_portfolio_performance(self.portfolio['portfolio_id'])
+            performance = self.trans_service.get_portfolio_performance(self.portfolio.portfolio_id)
             
-            print(f"\n📊 PERFORMANCE SUMMARY: {self.portfolio['portfolio_name']}")
+            print(f"\n📊 PERFORMANCE SUMMARY: {self.portfolio.portfolio_name}")
             print("="*50)
             
             # Basic metrics
@@ -199,13 +197,13 @@ class TransactionCLI:
     def transaction_analytics(self):
         print(f"\n--- Transaction Analytics & Trends ---")
         try:
-            analytics = self.trans_service.get_transaction_analytics(self.portfolio['portfolio_id'])
+            analytics = self.trans_service.get_transaction_analytics(self.portfolio.portfolio_id)
             
             if 'error' in analytics:
                 print(f"❌ {analytics['error']}")
                 return
             
-            print(f"\n📈 TRANSACTION ANALYTICS: {self.portfolio['portfolio_name']}")
+            print(f"\n📈 TRANSACTION ANALYTICS: {self.portfolio.portfolio_name}")
             print("="*50)
             
             # Monthly breakdown
@@ -287,7 +285,7 @@ class TransactionCLI:
                 print(f"❌ Error analyzing stock performance: {e}")
         else:
             # All stocks analysis
-            stocks = self.stock_service.get_stocks(self.portfolio['portfolio_id'])
+            stocks = self.stock_service.get_stocks(self.portfolio.portfolio_id)
             if not stocks:
                 print("No stocks found in portfolio.")
                 return
@@ -300,13 +298,13 @@ class TransactionCLI:
             total_unrealized = 0
             for stock in stocks:
                 try:
-                    performance = self.trans_service.get_stock_performance(stock['stock_id'])
+                    performance = self.trans_service.get_stock_performance(stock.stock_id)
                     if 'error' not in performance:
                         unrealized = performance['unrealized_gain_loss']
                         total_unrealized += unrealized
                         unrealized_icon = "🟢" if unrealized >= 0 else "🔴"
                         
-                        print(f"{stock['symbol']:<8} {performance['current_shares']:<8} ${stock['price']:<11.2f} ${performance['average_buy_price']:<11.2f} ${performance['current_value']:<11.2f} {unrealized_icon} ${unrealized:<10.2f}")
+                        print(f"{stock.symbol:<8} {performance['current_shares']:<8} ${stock.price:<11.2f} ${performance['average_buy_price']:<11.2f} ${performance['current_value']:<11.2f} {unrealized_icon} ${unrealized:<10.2f}")
                 except:
                     continue
             
@@ -316,20 +314,20 @@ class TransactionCLI:
 
     def show_stocks_with_prices(self):
         """Enhanced helper to display current stocks with live prices"""
-        stocks = self.stock_service.get_stocks(self.portfolio['portfolio_id'])
+        stocks = self.stock_service.get_stocks(self.portfolio.portfolio_id)
         if stocks:
-            total_value = 0
+            total_cents = 0
             print(f"\n📦 CURRENT STOCKS IN PORTFOLIO:")
             print(f"{'ID':<10} {'Symbol':<8} {'Quantity':<10} {'Price':<12} {'Total Value':<15}")
             print("─" * 65)
             
             for stock in stocks:
-                stock_value = stock['price'] * stock['quantity']
-                total_value += stock_value
-                print(f"{stock['stock_id']:<10} {stock['symbol']:<8} {stock['quantity']:<10} ${stock['price']:<11.2f} ${stock_value:<14,.2f}")
+                stock_value = stock.total_value
+                total_cents += stock.total_cents
+                print(f"{stock.stock_id:<10} {stock.symbol:<8} {stock.quantity:<10} ${stock.price:<11.2f} ${stock_value:<14,.2f}")
             
             print("─" * 65)
-            print(f"💰 TOTAL PORTFOLIO VALUE: ${total_value:,.2f}")
+            print(f"💰 TOTAL PORTFOLIO VALUE: {format_cents(total_cents)}")
         else:
             print("No stocks in portfolio yet.")
 
@@ -45,7 +45,7 @@ class UserCLI:
         user = self.user_service.user_dao.get_user_by_email(email)
         if user:
             self.current_user = user
-            print("Logged in successfully as", user["name"])
+            print("Logged in successfully as", user.name)
             PortfolioCLI(user).menu()
         else:
             print("User not found!")
@@ -57,7 +57,7 @@ class UserCLI:
         name = input("Enter new name: ")
         email = input("Enter new email: ")
         try:
-            updated_user = self.user_service.update_profile(self.current_user["user_id"], name, email)
+            updated_user = self.user_service.update_profile(self.current_user.user_id, name, email)
             print("Profile updated:", updated_user)
         except ValueError as e:
             print("Error:", e)
@@ -68,7 +68,7 @@ class UserCLI:
             return
         confirm = input("Are you sure? (y/n): ")
         if confirm.lower() == "y":
-            self.user_service.delete_account(self.current_user["user_id"])
+            self.user_service.delete_account(self.current_user.user_id)
             print("Account deleted successfully!")
             self.current_user = None
 
@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import get_supabase
+from Service.tracing import instrument
+
+
+@instrument("dao")
+class FundamentalsDAO:
+    """Company fundamentals per symbol in the fundamentals table, written and read in bulk"""
+    @property
+    def sb(self):
+        """Supabase client, connected on first query rather than at construction"""
+        return get_supabase()
+    def upsert_many(self, rows):
+        """Insert or replace many symbols' rows in one request; returns the count written"""
+        if not rows:
+            return 0
+        resp = self.sb.table("fundamentals").upsert(rows, on_conflict="symbol").execute()
+        return len(resp.data)
+    def get_page(self, offset=0, limit=1000, columns="*"):
+        """One page of rows ordered by symbol; returns (rows, total_count)"""
+        resp = (self.sb.table("fundamentals").select(columns, count="exact").order("symbol")
+                .range(offset, offset + limit - 1).execute())
+        return resp.data, resp.count
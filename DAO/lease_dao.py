@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+
+from config import get_supabase
+from Service.tracing import instrument
+
+
+def _iso(moment):
+    return moment.astimezone(timezone.utc).isoformat()
+
+
+@instrument("dao")
+class LeaseDAO:
+    """Named leases in the scheduler_leases table; each call is one conditional write, so two holders never overlap"""
+    @property
+    def sb(self):
+        """Supabase client, connected on first query rather than at construction"""
+        return get_supabase()
+    def acquire(self, name, holder, ttl):
+        """Take or renew the lease for ttl seconds; returns True if holder now owns it"""
+        now = datetime.now(timezone.utc)
+        values = {"holder": holder, "expires_at": _iso(now + timedelta(seconds=ttl))}
+        # Renew our own lease, else take over one that expired, else create it
+        resp = self.sb.table("scheduler_leases").update(values).eq("name", name).eq("holder", holder).execute()
+        if resp.data:
+            return True
+        resp = self.sb.table("scheduler_leases").update(values).eq("name", name).lt("expires_at", _iso(now)).execute()
+        if resp.data:
+            return True
+        resp = self.sb.table("scheduler_leases").upsert(
+            dict(values, name=name), on_conflict="name", ignore_duplicates=True).execute()
+        return bool(resp.data)
+    def release(self, name, holder):
+        self.sb.table("scheduler_leases").delete().eq("name", name).eq("holder", holder).execute()
+    def get_lease(self, name):
+        resp = self.sb.table("scheduler_leases").select("*").eq("name", name).execute()
+        return resp.data[0] if resp.data else None
@@ -0,0 +1,248 @@
+"""Typed rows returned by the DAOs.
+
+Services read attributes instead of looking up string keys: prices are
+floats, quantities numbers, timestamps UTC datetimes and transaction values
+exact cents (see DAO/money.py). Each model declares ``__slots__``, so a row
+carries no per-instance ``__dict__``. Columns left out of a narrowed
+``select`` come back as None.
+
+Holdings and transactions are read by the thousand per request, so their
+``from_rows`` takes each row's columns in one ``itemgetter`` call and fills
+the slots of bare instances (no ``__init__`` call per row). Their timestamps
+stay the stored ISO text until first read.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from typing import Optional
+
+from DAO.money import CENTS, line_cents, to_amount, to_cents
+
+
+def parse_timestamp(value):
+    """UTC-aware datetime from a Supabase timestamp or date string; None and '' give None.
+
+    Values without an offset are UTC, as timestamptz stores them.
+    """
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def parse_number(value):
+    """int or float from a JSON number or numeric string; None stays None"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return float(value) if any(c in value for c in ".eE") else int(value)
+
+
+def parse_price(value):
+    return None if value is None else float(value)
+
+
+class Model:
+    """Shared helpers; subclasses list their columns in __slots__ (or _fields when a slot is private)"""
+    __slots__ = ()
+
+    @classmethod
+    def from_rows(cls, rows):
+        return [cls.from_row(row) for row in rows]
+
+    def to_dict(self):
+        """Columns as a plain dict (for DataFrames, JSON and insert payloads)"""
+        return {name: getattr(self, name) for name in getattr(self, "_fields", self.__slots__)}
+
+
+@dataclass
+class User(Model):
+    __slots__ = ("user_id", "name", "email", "created_at")
+    user_id: str
+    name: str
+    email: str
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row.get("user_id"), row.get("name"), row.get("email"), parse_timestamp(row.get("created_at")))
+
+
+@dataclass
+class Portfolio(Model):
+    __slots__ = ("portfolio_id", "user_id", "portfolio_name", "created_at")
+    portfolio_id: str
+    user_id: str
+    portfolio_name: str
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row.get("portfolio_id"), row.get("user_id"), row.get("portfolio_name"),
+                   parse_timestamp(row.get("created_at")))
+
+
+_new = object.__new__
+
+
+class Columns:
+    """Fixed columns of a row fetched in one C call; columns absent from a narrowed select are None"""
+
+    def __init__(self, *names):
+        self.get = itemgetter(*names)
+        self.blank = dict.fromkeys(names)
+
+    def fill(self, row):
+        return self.get({**self.blank, **row})
+
+
+def lazy_timestamp(text, parsed):
+    """Attribute parsing the ISO text in slot text on first read, kept in slot parsed"""
+    def get(self):
+        try:
+            return getattr(self, parsed)
+        except AttributeError:
+            value = parse_timestamp(getattr(self, text))
+            setattr(self, parsed, value)
+            return value
+    return property(get)
+
+
+class BulkModel(Model):
+    """Model built by the thousand: equality and repr over _fields, no dataclass __init__"""
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        return cls.from_rows((row,))[0]
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.to_dict().items())})"
+
+
+class Holding(BulkModel):
+    """One position: a row of the stocks table"""
+    __slots__ = ("stock_id", "portfolio_id", "symbol", "price", "quantity", "created_text", "_created_at")
+    _fields = ("stock_id", "portfolio_id", "symbol", "price", "quantity", "created_at")
+    _columns = Columns("stock_id", "portfolio_id", "symbol", "price", "quantity", "created_at")
+
+    created_at = lazy_timestamp("created_text", "_created_at")
+
+    @classmethod
+    def from_rows(cls, rows):
+        columns = cls._columns
+        get = columns.get
+        holdings = []
+        append = holdings.append
+        for row in rows:
+            holding = _new(cls)
+            try:
+                values = get(row)
+            except KeyError:
+                values = columns.fill(row)
+            holding.stock_id, holding.portfolio_id, holding.symbol, price, quantity, holding.created_text = values
+            holding.price = price if price.__class__ is float else parse_price(price)
+            holding.quantity = quantity if quantity.__class__ is int else parse_number(quantity)
+            append(holding)
+        return holdings
+
+    # Prices move with quotes (sync_prices, live ticks), so cents are derived on access
+    @property
+    def price_cents(self):
+        return to_cents(self.price)
+
+    @property
+    def total_cents(self):
+        return line_cents(self.quantity, to_cents(self.price))
+
+    @property
+    def total_value(self):
+        return to_amount(self.total_cents)
+
+
+class Transaction(BulkModel):
+    """One ledger row; value_cents is fixed when the row is read"""
+    __slots__ = ("trans_id", "portfolio_id", "stock_id", "type", "quantity", "price", "date_text", "_date",
+                 "import_hash", "value_cents")
+    _fields = ("trans_id", "portfolio_id", "stock_id", "type", "quantity", "price", "date", "import_hash",
+               "value_cents")
+    _columns = Columns("trans_id", "portfolio_id", "stock_id", "type", "quantity", "price", "date")
+
+    # date_text is the stored ISO 8601 text, which sorts chronologically without parsing
+    date = lazy_timestamp("date_text", "_date")
+
+    @classmethod
+    def from_rows(cls, rows):
+        columns = cls._columns
+        get = columns.get
+        transactions = []
+        append = transactions.append
+        for row in rows:
+            trans = _new(cls)
+            try:
+                values = get(row)
+            except KeyError:
+                values = columns.fill(row)
+            trans.trans_id, trans.portfolio_id, trans.stock_id, trans.type, quantity, price, trans.date_text = values
+            trans.import_hash = row.get("import_hash")  # Only set on imported rows
+            if quantity.__class__ is int and price.__class__ is float:
+                # The JSON case, inlined from line_cents(quantity, to_cents(price))
+                trans.value_cents = quantity * round(price * CENTS)
+            else:
+                quantity = parse_number(quantity)
+                trans.value_cents = line_cents(quantity, to_cents(price))
+                price = parse_price(price)
+            trans.quantity = quantity
+            trans.price = price
+            append(trans)
+        return transactions
+
+    @property
+    def value(self):
+        return to_amount(self.value_cents)
+
+
+@dataclass
+class TradeTotals(Model):
+    """Buy and sell totals over some transactions, summed straight from their rows.
+
+    Performance figures need only these sums, and building a Transaction per
+    row would cost more than the whole pass.
+    """
+    __slots__ = ("count", "bought", "sold", "buy_cents", "sell_cents", "recent")
+    count: int
+    bought: float  # Shares
+    sold: float
+    buy_cents: int
+    sell_cents: int
+    recent: int  # Transactions dated at or after since
+
+    @classmethod
+    def sum_rows(cls, rows, since=None):
+        bought = sold = buy_cents = sell_cents = recent = 0
+        for row in rows:
+            quantity, price = row["quantity"], row["price"]
+            if quantity.__class__ is int and price.__class__ is float:
+                cents = quantity * round(price * CENTS)
+            else:
+                quantity = parse_number(quantity)
+                cents = line_cents(quantity, to_cents(price))
+            if row["type"] == "Buy":
+                bought += quantity
+                buy_cents += cents
+            else:  # Sell
+                sold += quantity
+                sell_cents += cents
+        if since is not None:
+            # Stored ISO text compares chronologically, so only dates within a day of since are parsed
+            floor = (since - timedelta(days=1)).date().isoformat()
+            for row in rows:
+                text = row["date"]
+                if text and text >= floor and parse_timestamp(text) >= since:
+                    recent += 1
+        return cls(len(rows), bought, sold, buy_cents, sell_cents, recent)
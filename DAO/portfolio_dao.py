@@ -2,23 +2,64 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import get_supabase
+from config import get_async_supabase, get_supabase
+from DAO.models import Portfolio
+from Service.tracing import instrument
 
+@instrument("dao")
 class PortfolioDAO:
-    def __init__(self):
-        self.sb = get_supabase()
+    @property
+    def sb(self):
+        """Supabase client, connected on first query rather than at construction"""
+        return get_supabase()
     def create_portfolio(self,user_id,portfolio_name):
         resp = self.sb.table("portfolios").insert({"user_id" : user_id , "portfolio_name" : portfolio_name}).execute()
-        return resp
+        return Portfolio.from_rows(resp.data)
     def get_portfolio_by_user(self,user_id):
         resp = self.sb.table("portfolios").select("*").eq("user_id", user_id).execute()
-        return resp.data
+        return Portfolio.from_rows(resp.data)
+    def get_portfolios_page(self, user_id, offset=0, limit=100):
+        """Get one page of a user's portfolios by name; returns (rows, total_count)"""
+        resp = (self.sb.table("portfolios").select("*", count="exact").eq("user_id", user_id)
+                .order("portfolio_name").range(offset, offset + limit - 1).execute())
+        return Portfolio.from_rows(resp.data), resp.count
+    def get_portfolios_by_ids(self, portfolio_ids):
+        """Get several portfolios in a single query"""
+        if not portfolio_ids:
+            return []
+        resp = self.sb.table("portfolios").select("*").in_("portfolio_id", list(portfolio_ids)).execute()
+        return Portfolio.from_rows(resp.data)
     def get_portfolio_by_id(self,portfolio_id):
         resp = self.sb.table("portfolios").select("*").eq("portfolio_id", portfolio_id).execute()
-        return resp.data[0] if resp.data else None
+        return Portfolio.from_row(resp.data[0]) if resp.data else None
     def update_portfolio(self,portfolio_id,portfolio_name):
         resp = self.sb.table("portfolios").update({"portfolio_name" : portfolio_name}).eq("portfolio_id", portfolio_id).execute()
-        return resp.data
+        return Portfolio.from_rows(resp.data)
     def delete_portfolio(self,portfolio_id):
         resp = self.sb.table("portfolios").delete().eq("portfolio_id", portfolio_id).execute()
-        return resp
\ No newline at end of file
+        return Portfolio.from_rows(resp.data)
+
+
+@instrument("dao")
+class AsyncPortfolioDAO:
+    """Read queries of PortfolioDAO on the async client, for event loops"""
+    async def get_portfolio_by_user(self, user_id):
+        sb = await get_async_supabase()
+        resp = await sb.table("portfolios").select("*").eq("user_id", user_id).execute()
+        return Portfolio.from_rows(resp.data)
+    async def get_portfolios_page(self, user_id, offset=0, limit=100):
+        """Get one page of a user's portfolios by name; returns (rows, total_count)"""
+        sb = await get_async_supabase()
+        resp = await (sb.table("portfolios").select("*", count="exact").eq("user_id", user_id)
+                      .order("portfolio_name").range(offset, offset + limit - 1).execute())
+        return Portfolio.from_rows(resp.data), resp.count
+    async def get_portfolios_by_ids(self, portfolio_ids):
+        if not portfolio_ids:
+            return []
+        sb = await get_async_supabase()
+        resp = await sb.table("portfolios").select("*").in_("portfolio_id", list(portfolio_ids)).execute()
+        return Portfolio.from_rows(resp.data)
+    async def get_portfolio_by_id(self, portfolio_id):
+        sb = await get_async_supabase()
+        resp = await sb.table("portfolios").select("*").eq("portfolio_id", portfolio_id).execute()
+        return Portfolio.from_row(resp.data[0]) if resp.data else None
@@ -2,20 +2,46 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import get_supabase
+from config import get_async_supabase, get_supabase
+from DAO.models import Holding
+from Service.tracing import instrument
 
+@instrument("dao")
 class StockDAO:
-    def __init__(self):
-        self.sb = get_supabase()
+    @property
+    def sb(self):
+        """Supabase client, connected on first query rather than at construction"""
+        return get_supabase()
     def add_stock(self,portfolio_id,symbol,price,quantity):
         resp = self.sb.table("stocks").insert({"portfolio_id" : portfolio_id , "symbol" : symbol , "price" : price , "quantity" : quantity}).execute()
-        return resp.data
+        return Holding.from_rows(resp.data)
+    def add_stocks(self, rows):
+        """Insert many stock rows in one request"""
+        if not rows:
+            return []
+        resp = self.sb.table("stocks").insert(rows).execute()
+        return Holding.from_rows(resp.data)
     def get_stock_by_portfolio(self,portfolio_id):
         resp = self.sb.table("stocks").select("*").eq("portfolio_id",portfolio_id).execute()
-        return resp.data
+        return Holding.from_rows(resp.data)
+    def get_stocks_by_portfolios(self, portfolio_ids):
+        """Get all stocks across several portfolios in a single query"""
+        if not portfolio_ids:
+            return []
+        resp = self.sb.table("stocks").select("*").in_("portfolio_id", list(portfolio_ids)).execute()
+        return Holding.from_rows(resp.data)
+    def get_stocks_page(self, portfolio_ids, offset=0, limit=500, order_by="stock_id", descending=False, symbol_filter=None, columns="*"):
+        """Get one page of stocks across portfolios; returns (rows, total_count)"""
+        if not portfolio_ids:
+            return [], 0
+        query = self.sb.table("stocks").select(columns, count="exact").in_("portfolio_id", list(portfolio_ids))
+        if symbol_filter:
+            query = query.ilike("symbol", f"%{symbol_filter}%")
+        resp = query.order(order_by, desc=descending).range(offset, offset + limit - 1).execute()
+        return Holding.from_rows(resp.data), resp.count
     def get_stock_by_id(self,stock_id):
         resp = self.sb.table("stocks").select("*").eq("stock_id",stock_id).execute()
-        return resp.data
+        return Holding.from_rows(resp.data)
     def update_stock(self, stock_id, price = None, quantity = None):
         data = {}
         if price is not None:
@@ -23,7 +49,52 @@ class StockDAO:
         if quantity is not None:
             data["quantity"] = quantity
         resp = self.sb.table("stocks").update(data).eq("stock_id", stock_id).execute()
-        return resp.data
+        return Holding.from_rows(resp.data)
+    def update_price_for_stocks(self, stock_ids, price):
+        """Set the same price on many stock rows in one request"""
+        if not stock_ids:
+            return []
+        resp = self.sb.table("stocks").update({"price": price}).in_("stock_id", list(stock_ids)).execute()
+        return Holding.from_rows(resp.data)
+    def update_price_for_symbol(self, symbol, price):
+        """Set price on every user's rows of symbol whose price differs, in one request; returns the count"""
+        resp = (self.sb.table("stocks").update({"price": price}).eq("symbol", symbol).neq("price", price)
+                .execute())
+        return len(resp.data)
+    def get_symbols_page(self, offset=0, limit=1000):
+        """One page of the symbol column across all portfolios; returns (symbols, total_count)"""
+        resp = (self.sb.table("stocks").select("symbol", count="exact").order("stock_id")
+                .range(offset, offset + limit - 1).execute())
+        return [row["symbol"] for row in resp.data], resp.count
     def delete_stock(self, stock_id):
         resp = self.sb.table("stocks").delete().eq("stock_id", stock_id).execute()
-        return resp.data
\ No newline at end of file
+        return Holding.from_rows(resp.data)
+
+
+@instrument("dao")
+class AsyncStockDAO:
+    """Read queries of StockDAO on the async client, for event loops"""
+    async def get_stock_by_portfolio(self, portfolio_id):
+        sb = await get_async_supabase()
+        resp = await sb.table("stocks").select("*").eq("portfolio_id", portfolio_id).execute()
+        return Holding.from_rows(resp.data)
+    async def get_stocks_by_portfolios(self, portfolio_ids):
+        if not portfolio_ids:
+            return []
+        sb = await get_async_supabase()
+        resp = await sb.table("stocks").select("*").in_("portfolio_id", list(portfolio_ids)).execute()
+        return Holding.from_rows(resp.data)
+    async def get_stocks_page(self, portfolio_ids, offset=0, limit=500, order_by="stock_id", descending=False, symbol_filter=None, columns="*"):
+        """Get one page of stocks across portfolios; returns (rows, total_count)"""
+        if not portfolio_ids:
+            return [], 0
+        sb = await get_async_supabase()
+        query = sb.table("stocks").select(columns, count="exact").in_("portfolio_id", list(portfolio_ids))
+        if symbol_filter:
+            query = query.ilike("symbol", f"%{symbol_filter}%")
+        resp = await query.order(order_by, desc=descending).range(offset, offset + limit - 1).execute()
+        return Holding.from_rows(resp.data), resp.count
+    async def get_stock_by_id(self, stock_id):
+        sb = await get_async_supabase()
+        resp = await sb.table("stocks").select("*").eq("stock_id", stock_id).execute()
+        return Holding.from_rows(resp.data)
@@ -2,13 +2,20 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import get_supabase
+from config import get_async_supabase, get_supabase
+from DAO.models import TradeTotals, Transaction
+from Service.tracing import instrument
 
+@instrument("dao")
 class TransactionDAO:
     def __init__(self):
-        self.sb = get_supabase()
         self.table = "transactions"
 
+    @property
+    def sb(self):
+        """Supabase client, connected on first query rather than at construction"""
+        return get_supabase()
+
     def add_transaction(self, portfolio_id, stock_id, trans_type, quantity, price):
         """
         Add a transaction (Buy/Sell) for a stock.
@@ -28,24 +35,104 @@ class TransactionDAO:
             "quantity": quantity,
             "price": price
         }).execute()
-        return resp.data
+        return Transaction.from_rows(resp.data)
+
+    def add_transactions_idempotent(self, rows):
+        """
+        Insert rows carrying an import_hash, skipping hashes already stored.
+        Returns only the rows that were actually inserted.
+        """
+        if not rows:
+            return []
+        resp = self.sb.table(self.table).upsert(rows, on_conflict="import_hash", ignore_duplicates=True).execute()
+        return Transaction.from_rows(resp.data)
+
+    def get_existing_import_hashes(self, hashes):
+        """Subset of hashes already recorded by earlier imports"""
+        if not hashes:
+            return set()
+        resp = self.sb.table(self.table).select("import_hash").in_("import_hash", list(hashes)).execute()
+        return {row["import_hash"] for row in resp.data}
 
     def get_transactions_by_portfolio(self, portfolio_id):
         """Get all transactions for a portfolio"""
         resp = self.sb.table(self.table).select("*").eq("portfolio_id", portfolio_id).execute()
-        return resp.data
+        return Transaction.from_rows(resp.data)
+
+    def get_totals_by_portfolio(self, portfolio_id, since=None):
+        """Buy and sell totals of a portfolio's transactions; recent counts those dated at or after since"""
+        resp = self.sb.table(self.table).select("*").eq("portfolio_id", portfolio_id).execute()
+        return TradeTotals.sum_rows(resp.data, since)
+
+    def get_transactions_page(self, portfolio_ids, offset=0, limit=1000, order=(("date", False), ("trans_id", False)), columns="*"):
+        """Get one page of transactions across portfolios; returns (rows, total_count)"""
+        if not portfolio_ids:
+            return [], 0
+        query = self.sb.table(self.table).select(columns, count="exact").in_("portfolio_id", list(portfolio_ids))
+        for column, descending in order:
+            query = query.order(column, desc=descending)
+        resp = query.range(offset, offset + limit - 1).execute()
+        return Transaction.from_rows(resp.data), resp.count
 
     def get_transactions_by_stock(self, stock_id):
         """Get all transactions for a specific stock"""
         resp = self.sb.table(self.table).select("*").eq("stock_id", stock_id).execute()
-        return resp.data
+        return Transaction.from_rows(resp.data)
+
+    def get_totals_by_stock(self, stock_id):
+        """Buy and sell totals of a stock's transactions"""
+        resp = self.sb.table(self.table).select("*").eq("stock_id", stock_id).execute()
+        return TradeTotals.sum_rows(resp.data)
 
     def get_transaction_by_id(self, trans_id):
         """Get a single transaction by ID"""
         resp = self.sb.table(self.table).select("*").eq("trans_id", trans_id).execute()
-        return resp.data[0] if resp.data else None
+        return Transaction.from_row(resp.data[0]) if resp.data else None
 
     def delete_transaction(self, trans_id):
         """Delete a transaction (optional, if needed)"""
         resp = self.sb.table(self.table).delete().eq("trans_id", trans_id).execute()
-        return resp.data
+        return Transaction.from_rows(resp.data)
+
+
+@instrument("dao")
+class AsyncTransactionDAO:
+    """Read queries of TransactionDAO on the async client, for event loops"""
+    def __init__(self):
+        self.table = "transactions"
+
+    async def get_transactions_by_portfolio(self, portfolio_id):
+        sb = await get_async_supabase()
+        resp = await sb.table(self.table).select("*").eq("portfolio_id", portfolio_id).execute()
+        return Transaction.from_rows(resp.data)
+
+    async def get_totals_by_portfolio(self, portfolio_id, since=None):
+        sb = await get_async_supabase()
+        resp = await sb.table(self.table).select("*").eq("portfolio_id", portfolio_id).execute()
+        return TradeTotals.sum_rows(resp.data, since)
+
+    async def get_transactions_page(self, portfolio_ids, offset=0, limit=1000, order=(("date", False), ("trans_id", False)), columns="*"):
+        """Get one page of transactions across portfolios; returns (rows, total_count)"""
+        if not portfolio_ids:
+            return [], 0
+        sb = await get_async_supabase()
+        query = sb.table(self.table).select(columns, count="exact").in_("portfolio_id", list(portfolio_ids))
+        for column, descending in order:
+            query = query.order(column, desc=descending)
+        resp = await query.range(offset, offset + limit - 1).execute()
+        return Transaction.from_rows(resp.data), resp.count
+
+    async def get_transactions_by_stock(self, stock_id):
+        sb = await get_async_supabase()
+        resp = await sb.table(self.table).select("*").eq("stock_id", stock_id).execute()
+        return Transaction.from_rows(resp.data)
+
+    async def get_totals_by_stock(self, stock_id):
+        sb = await get_async_supabase()
+        resp = await sb.table(self.table).select("*").eq("stock_id", stock_id).execute()
+        return TradeTotals.sum_rows(resp.data)
+
+    async def get_transaction_by_id(self, trans_id):
+        sb = await get_async_supabase()
+        resp = await sb.table(self.table).select("*").eq("trans_id", trans_id).execute()
+        return Transaction.from_row(resp.data[0]) if resp.data else None
@@ -2,31 +2,48 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import get_supabase
+from config import get_async_supabase, get_supabase
+from DAO.models import User
+from Service.tracing import instrument
 
+@instrument("dao")
 class UserDAO:
-    def __init__(self):
-        self.sb = get_supabase()
+    @property
+    def sb(self):
+        """Supabase client, connected on first query rather than at construction"""
+        return get_supabase()
     def create_user(self, name : str, email : str):
         """ Add new user to database """
         if self.get_user_by_email(email):
             raise ValueError("User already exists")
         resp = self.sb.table("users").insert({"name": name, "email": email}).execute()
-        return resp
+        return User.from_rows(resp.data)
     def get_user_by_id(self,user_id):
         resp = self.sb.table("users").select("*").eq("user_id", user_id).execute()
-        return resp.data[0] if resp.data else None
+        return User.from_row(resp.data[0]) if resp.data else None
     def get_user_by_email(self,email):
         resp = self.sb.table("users").select("*").eq("email", email).execute()
-        return resp.data[0] if resp.data else None
+        return User.from_row(resp.data[0]) if resp.data else None
     def update_user(self,user_id,name,email):
         """Update user details"""
         resp = self.sb.table("users").update({"name" : name , "email" : email}).eq("user_id", user_id).execute()
-        return resp.data
+        return User.from_rows(resp.data)
     def delete_user(self,user_id):
         """Delete user only if it exists"""
         if not self.get_user_by_id(user_id):
             raise ValueError("User not found")
         resp = self.sb.table("users").delete().eq("user_id", user_id).execute()
-        return resp
-    
\ No newline at end of file
+        return User.from_rows(resp.data)
+
+
+@instrument("dao")
+class AsyncUserDAO:
+    """Read queries of UserDAO on the async client, for event loops"""
+    async def get_user_by_id(self, user_id):
+        sb = await get_async_supabase()
+        resp = await sb.table("users").select("*").eq("user_id", user_id).execute()
+        return User.from_row(resp.data[0]) if resp.data else None
+    async def get_user_by_email(self, email):
+        sb = await get_async_supabase()
+        resp = await sb.table("users").select("*").eq("email", email).execute()
+        return User.from_row(resp.data[0]) if resp.data else None
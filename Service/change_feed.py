@@ -0,0 +1,176 @@
+"""Cache invalidation from the Supabase realtime change feed.
+
+While the feed is connected, every insert, update and delete on
+``portfolios``, ``stocks`` and ``transactions`` drops exactly the cached
+data it affects, whichever session, CLI or scheduler made the write:
+
+- the portfolio's performance snapshot, ("performance", portfolio_id)
+- its owner's dashboard summary and holdings frame, ("summary" / "holdings", user_id)
+- cached API responses whose URL names the portfolio, its owner or the stock
+
+Cached reads can then live for ``LIVE_CACHE_TTL`` seconds (``cache_ttl``)
+instead of a few seconds. Against Supabase the feed listens on a daemon
+thread with the realtime client. In-memory backends that offer
+``subscribe`` (Testing/fake_supabase.py) deliver their writes directly. If
+the connection drops, every feed-managed cache is flushed, because the
+changes missed while disconnected cannot be replayed.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import threading
+
+from config import LIVE_CACHE_TTL, SUPABASE_KEY, SUPABASE_URL, get_supabase
+from DAO.portfolio_dao import PortfolioDAO
+from Service.shared_store import shared_store
+from Service.tracing import instrument
+from Service.metrics import CHANGE_EVENTS
+
+FEED_TABLES = ("portfolios", "stocks", "transactions")
+CACHE_CLASSES = ("performance", "summary", "holdings", "api")  # Key classes the feed keeps correct
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 60
+
+
+def _url_tokens(url):
+    """Path segments and query values of a cached API URL ("/v1/portfolios/7?limit=5" -> v1, portfolios, 7, limit, 5)"""
+    return set(re.split(r"[/?&=,]", url))
+
+
+@instrument("cache")
+class ChangeFeed:
+    """Maps row changes to the shared store keys they make stale"""
+
+    def __init__(self, store=shared_store, portfolio_dao=None):
+        self.store = store
+        self.portfolio_dao = portfolio_dao or PortfolioDAO()
+        self.connected = threading.Event()
+        self._owners = {}  # portfolio_id -> user_id; a portfolio never changes owner
+        self._stop = threading.Event()
+        self._unsubscribe = None
+
+    def owner_of(self, portfolio_id):
+        owner = self._owners.get(portfolio_id)
+        if owner is None:
+            portfolio = self.portfolio_dao.get_portfolio_by_id(portfolio_id)
+            if portfolio is not None:
+                owner = self._owners[portfolio_id] = portfolio.user_id
+        return owner
+
+    def flush(self):
+        """Drop everything the feed manages (after missed changes)"""
+        for key_class in CACHE_CLASSES:
+            self.store.invalidate_class(key_class)
+
+    def apply(self, table, change_type, record=None, old_record=None):
+        """Invalidate the cache keys affected by one row change"""
+        CHANGE_EVENTS.labels(table, change_type).inc()
+        row = record or old_record or {}
+        portfolio_id = row.get("portfolio_id")
+        if portfolio_id is None:
+            # Deletes carry only the primary key unless the table has REPLICA IDENTITY FULL
+            self.flush()
+            return
+        if table == "portfolios" and row.get("user_id"):
+            self._owners[portfolio_id] = row["user_id"]
+        user_id = self.owner_of(portfolio_id)
+
+        self.store.invalidate(("performance", portfolio_id))
+        if user_id is None:
+            self.store.invalidate_class("summary")
+            self.store.invalidate_class("holdings")
+        else:
+            self.store.invalidate(("summary", user_id))
+            self.store.invalidate(("holdings", user_id))
+        ids = {str(value) for value in (portfolio_id, user_id, row.get("stock_id")) if value}
+        self.store.invalidate_matching("api", lambda key: not ids.isdisjoint(_url_tokens(key[1])))
+
+    def _on_payload(self, payload):
+        # realtime delivers {"data": {"table", "type", "record", "old_record", ...}, "ids": [...]}
+        data = payload.get("data", payload)
+        self.apply(data.get("table"), data.get("type") or data.get("eventType"),
+                   data.get("record") or data.get("new"), data.get("old_record") or data.get("old"))
+
+    def start(self):
+        client = get_supabase()
+        subscribe = getattr(client, "subscribe", None)
+        if subscribe is not None:
+            self._unsubscribe = subscribe(self.apply)
+            self.connected.set()
+            return
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in environment (.env)")
+        threading.Thread(target=self._listen_forever, name="change-feed", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self.connected.clear()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _listen_forever(self):
+        import asyncio  # Imported here: the feed's loop lives on its own thread
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                asyncio.run(self._listen())
+                delay = RECONNECT_DELAY
+            except Exception as e:
+                print(f"⚠️ Change feed disconnected: {e}", file=sys.stderr)
+            self.connected.clear()
+            self.flush()
+            self._stop.wait(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _listen(self):
+        from realtime import AsyncRealtimeClient  # Imported here: only processes running the feed need it
+        client = AsyncRealtimeClient(f"{SUPABASE_URL}/realtime/v1", SUPABASE_KEY)
+        await client.connect()
+        try:
+            channel = client.channel("cache-invalidation")
+            for table in FEED_TABLES:
+                channel.on_postgres_changes("*", schema="public", table=table, callback=self._on_payload)
+            await channel.subscribe()
+            self.flush()  # Anything cached before the subscription may have missed changes
+            self.connected.set()
+            await client.listen()
+        finally:
+            await client.close()
+
+
+# One feed per process, started by start_change_feed()
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def start_change_feed():
+    """Start invalidating caches from the change feed (idempotent); returns the feed"""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            feed = ChangeFeed()
+            feed.start()
+            _feed = feed
+    return _feed
+
+
+def stop_change_feed():
+    global _feed
+    with _feed_lock:
+        if _feed is not None:
+            _feed.stop()
+            _feed = None
+
+
+def live():
+    """True while the feed is connected, so cached reads stay correct"""
+    feed = _feed
+    return feed is not None and feed.connected.is_set()
+
+
+def cache_ttl(ttl):
+    """ttl, or LIVE_CACHE_TTL while the change feed keeps caches correct"""
+    return LIVE_CACHE_TTL if live() else ttl
@@ -0,0 +1,248 @@
+"""Streaming report export to CSV, Parquet and Excel.
+
+Reports are generators of row pages pulled from the DAOs with range
+queries; writers consume those pages one at a time, so exporting a
+million-row ledger never holds more than a page (or one Parquet row group)
+in memory. Parquet needs ``pyarrow`` and Excel needs ``openpyxl``.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import io
+from collections import deque
+
+from DAO.money import line_cents, to_amount, to_cents
+from Service.portfolio_service import PortfolioService
+from Service.tracing import instrument
+
+# Column order and type of every report ("str" or "num")
+REPORT_FIELDS = {
+    'holdings': [
+        ('portfolio_name', 'str'), ('symbol', 'str'), ('quantity', 'num'),
+        ('price', 'num'), ('total_value', 'num'),
+    ],
+    'transactions': [
+        ('date', 'str'), ('portfolio_name', 'str'), ('symbol', 'str'), ('type', 'str'),
+        ('quantity', 'num'), ('price', 'num'), ('value', 'num'), ('trans_id', 'str'),
+    ],
+    'performance': [
+        ('portfolio_name', 'str'), ('total_invested', 'num'), ('current_value', 'num'),
+        ('total_sold', 'num'), ('net_value', 'num'), ('total_gain_loss', 'num'),
+        ('gain_loss_percentage', 'num'), ('transaction_count', 'num'),
+    ],
+    'lots': [
+        ('portfolio_name', 'str'), ('symbol', 'str'), ('status', 'str'), ('open_date', 'str'),
+        ('close_date', 'str'), ('quantity', 'num'), ('cost_price', 'num'), ('exit_price', 'num'),
+        ('cost_basis', 'num'), ('value', 'num'), ('gain_loss', 'num'), ('gain_loss_percent', 'num'),
+    ],
+}
+EXPORT_FORMATS = ('csv', 'parquet', 'xlsx')
+EXCEL_MAX_ROWS = 1_048_575  # Data rows per sheet after the header
+
+
+def _iso(timestamp):
+    return timestamp.isoformat() if timestamp else None
+
+
+@instrument("service")
+class ExportService:
+    def __init__(self, portfolio_service=None, page_size=1000):
+        self.portfolio_service = portfolio_service or PortfolioService()
+        self.stock_service = self.portfolio_service.stock_service
+        self.transaction_service = self.portfolio_service.transaction_service
+        self.page_size = page_size
+
+    # Report generators: each yields lists of row dicts
+    def _portfolio_names(self, user_id):
+        return {p.portfolio_id: p.portfolio_name
+                for p in self.portfolio_service.get_user_portfolios(user_id)}
+
+    def _stock_index(self, portfolio_ids):
+        """stock_id -> (symbol, current price) for every position of the user"""
+        index = {}
+        for page in self.stock_service.iter_stock_pages(portfolio_ids, self.page_size, columns="stock_id,symbol,price"):
+            for stock in page:
+                index[stock.stock_id] = (stock.symbol, stock.price)
+        return index
+
+    def holdings_pages(self, user_id):
+        names = self._portfolio_names(user_id)
+        for page in self.stock_service.iter_stock_pages(list(names), self.page_size):
+            yield [{
+                'portfolio_name': names[stock.portfolio_id],
+                'symbol': stock.symbol,
+                'quantity': stock.quantity,
+                'price': stock.price,
+                'total_value': stock.total_value,
+            } for stock in page]
+
+    def transactions_pages(self, user_id):
+        names = self._portfolio_names(user_id)
+        stocks = self._stock_index(list(names))
+        for page in self.transaction_service.iter_transaction_pages(list(names), self.page_size):
+            yield [{
+                'date': _iso(trans.date),
+                'portfolio_name': names[trans.portfolio_id],
+                'symbol': stocks.get(trans.stock_id, (f"Stock_{trans.stock_id}",))[0],
+                'type': trans.type,
+                'quantity': trans.quantity,
+                'price': trans.price,
+                'value': trans.value,
+                'trans_id': trans.trans_id,
+            } for trans in page]
+
+    def performance_pages(self, user_id):
+        rows = []
+        for portfolio_id, name in self._portfolio_names(user_id).items():
+            perf = self.transaction_service.get_portfolio_performance(portfolio_id)
+            rows.append({'portfolio_name': name, **perf})
+        yield rows
+
+    def lots_pages(self, user_id):
+        """FIFO lot-level P&L: closed lots at their sale price, open lots at the current price.
+
+        Transactions stream ordered by stock then date, so only the open lots
+        of the stock being processed are held in memory.
+        """
+        names = self._portfolio_names(user_id)
+        stocks = self._stock_index(list(names))
+        order = (("stock_id", False), ("date", False), ("trans_id", False))
+
+        def lot_row(trans, status, quantity, cost_price, exit_price, open_date, close_date):
+            symbol = stocks.get(trans.stock_id, (f"Stock_{trans.stock_id}",))[0]
+            cost_cents = line_cents(quantity, to_cents(cost_price))
+            value_cents = line_cents(quantity, to_cents(exit_price))
+            gain_loss_cents = value_cents - cost_cents
+            return {
+                'portfolio_name': names[trans.portfolio_id], 'symbol': symbol, 'status': status,
+                'open_date': open_date, 'close_date': close_date, 'quantity': quantity,
+                'cost_price': cost_price, 'exit_price': exit_price, 'cost_basis': to_amount(cost_cents),
+                'value': to_amount(value_cents), 'gain_loss': to_amount(gain_loss_cents),
+                'gain_loss_percent': (gain_loss_cents / cost_cents * 100) if cost_cents else 0,
+            }
+
+        def open_rows(lots):
+            rows = []
+            for trans, quantity in lots:
+                current = stocks.get(trans.stock_id, (None, trans.price))[1]
+                rows.append(lot_row(trans, 'open', quantity, trans.price, current, _iso(trans.date), None))
+            return rows
+
+        current_stock, lots = None, deque()
+        for page in self.transaction_service.iter_transaction_pages(list(names), self.page_size, order=order):
+            out = []
+            for trans in page:
+                if trans.stock_id != current_stock:
+                    out.extend(open_rows(lots))
+                    current_stock, lots = trans.stock_id, deque()
+                if trans.type == 'Buy':
+                    lots.append((trans, trans.quantity))
+                    continue
+                remaining = trans.quantity
+                while remaining > 0 and lots:
+                    buy, available = lots[0]
+                    matched = min(available, remaining)
+                    out.append(lot_row(buy, 'closed', matched, buy.price, trans.price,
+                                       _iso(buy.date), _iso(trans.date)))
+                    remaining -= matched
+                    if matched == available:
+                        lots.popleft()
+                    else:
+                        lots[0] = (buy, available - matched)
+            if out:
+                yield out
+        tail = open_rows(lots)
+        if tail:
+            yield tail
+
+    def report_pages(self, report, user_id):
+        if report not in REPORT_FIELDS:
+            raise ValueError(f"Unknown report '{report}'. Choose from: {', '.join(REPORT_FIELDS)}")
+        return getattr(self, f"{report}_pages")(user_id)
+
+    # Writers
+    def export(self, report, user_id, file_format, out, row_group_size=100_000):
+        """Stream report for user_id into out (path or binary file object); returns rows written"""
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format '{file_format}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+        fields = REPORT_FIELDS[report]
+        pages = self.report_pages(report, user_id)
+        writer = getattr(self, f"_write_{file_format}")
+        return writer(pages, fields, out, row_group_size)
+
+    def export_bytes(self, report, user_id, file_format):
+        """Export into memory (for download buttons); returns bytes"""
+        buffer = io.BytesIO()
+        self.export(report, user_id, file_format, buffer)
+        return buffer.getvalue()
+
+    def _write_csv(self, pages, fields, out, row_group_size):
+        names = [name for name, _ in fields]
+        binary = open(out, "wb") if isinstance(out, str) else out
+        text = io.TextIOWrapper(binary, encoding="utf-8", newline="", write_through=True)
+        count = 0
+        try:
+            writer = csv.DictWriter(text, fieldnames=names, extrasaction="ignore")
+            writer.writeheader()
+            for page in pages:
+                writer.writerows(page)
+                count += len(page)
+        finally:
+            text.detach()  # Leave the caller's file object open
+            if isinstance(out, str):
+                binary.close()
+        return count
+
+    def _write_parquet(self, pages, fields, out, row_group_size):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export needs pyarrow: pip install pyarrow")
+
+        schema = pa.schema([(name, pa.float64() if kind == 'num' else pa.string()) for name, kind in fields])
+        names = [name for name, _ in fields]
+        count, buffered = 0, []
+
+        def flush(writer):
+            columns = {name: [row.get(name) for row in buffered] for name in names}
+            for name, kind in fields:
+                if kind == 'str':
+                    columns[name] = [None if v is None else str(v) for v in columns[name]]
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            buffered.clear()
+
+        with pq.ParquetWriter(out, schema) as writer:
+            for page in pages:
+                buffered.extend(page)
+                count += len(page)
+                if len(buffered) >= row_group_size:
+                    flush(writer)
+            if buffered or count == 0:
+                flush(writer)
+        return count
+
+    def _write_xlsx(self, pages, fields, out, row_group_size):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ValueError("Excel export needs openpyxl: pip install openpyxl")
+
+        names = [name for name, _ in fields]
+        workbook = Workbook(write_only=True)  # Rows are flushed as they are appended
+        sheet, sheet_rows, count = None, EXCEL_MAX_ROWS, 0
+        for page in pages:
+            for row in page:
+                if sheet_rows >= EXCEL_MAX_ROWS:
+                    sheet = workbook.create_sheet(f"Report {len(workbook.worksheets) + 1}")
+                    sheet.append(names)
+                    sheet_rows = 0
+                sheet.append([row.get(name) for name in names])
+                sheet_rows += 1
+                count += 1
+        if sheet is None:
+            workbook.create_sheet("Report 1").append(names)
+        workbook.save(out)
+        return count
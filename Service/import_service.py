@@ -0,0 +1,344 @@
+"""Streaming import of brokerage trade history (CSV and OFX).
+
+Trades flow through a generator pipeline -- parse -> validate -> order ->
+chunk -> write -- so memory stays constant no matter how long the history
+is. Sells are checked against holdings in trade order, so newest-first
+exports (common among brokers) are buffered and replayed oldest first. Each
+trade is hashed into ``transactions.import_hash`` and chunks are written with
+ON CONFLICT DO NOTHING, so re-running an import never duplicates rows.
+
+Requires a unique ``import_hash`` column on the transactions table:
+
+    alter table transactions add column import_hash text unique;
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import hashlib
+import re
+import time
+from datetime import datetime
+from itertools import islice
+
+from DAO.stock_dao import StockDAO
+from DAO.transaction_dao import TransactionDAO
+from Service.tracing import instrument
+
+# Broker export headers mapped onto our field names
+CSV_ALIASES = {
+    'symbol': ('symbol', 'ticker', 'security', 'instrument'),
+    'type': ('type', 'action', 'side', 'transaction type', 'buy/sell'),
+    'quantity': ('quantity', 'qty', 'shares', 'units'),
+    'price': ('price', 'unit price', 'price per share', 'trade price'),
+    'date': ('date', 'trade date', 'executed', 'activity date', 'settlement date'),
+}
+BUY_WORDS = {'buy', 'bought', 'b', 'purchase', 'buy to open'}
+SELL_WORDS = {'sell', 'sold', 's', 'sale', 'sell to close'}
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%dT%H:%M:%S', '%Y%m%d', '%Y%m%d%H%M%S')
+
+OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+class TradeImportError(ValueError):
+    """A trade row that failed validation"""
+
+
+def _number(value):
+    number = float(str(value).replace(',', '').replace('$', '').strip())
+    return int(number) if number.is_integer() else number
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    if not value:
+        return None
+    value = value.split('[')[0].split('.')[0]  # OFX: 20240102120000.000[-5:EST]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).isoformat()
+        except ValueError:
+            continue
+    raise TradeImportError(f"Unrecognised date: {value}")
+
+
+def iter_csv_trades(path):
+    """Yield raw trade dicts from a broker CSV export, one row at a time"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        headers = {h.strip().lower(): h for h in (reader.fieldnames or [])}
+        columns = {}
+        for field, aliases in CSV_ALIASES.items():
+            columns[field] = next((headers[a] for a in aliases if a in headers), None)
+        missing = [f for f in ('symbol', 'type', 'quantity', 'price') if columns[f] is None]
+        if missing:
+            raise TradeImportError(f"CSV is missing columns: {', '.join(missing)}")
+
+        for line, row in enumerate(reader, start=2):
+            yield {
+                'line': line,
+                'symbol': row[columns['symbol']],
+                'type': row[columns['type']],
+                'quantity': row[columns['quantity']],
+                'price': row[columns['price']],
+                'date': row[columns['date']] if columns['date'] else None,
+                'ref': None,
+            }
+
+
+def _iter_ofx_tags(path):
+    """Yield (closing, tag, text) tokens from an SGML or XML OFX file"""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            for closing, tag, text in OFX_TAG.findall(line):
+                yield closing == '/', tag, text.strip()
+
+
+def iter_ofx_trades(path):
+    """Yield raw trade dicts from an OFX investment statement.
+
+    The security list (CUSIP -> ticker) usually follows the transactions, so
+    the file is scanned twice: once for that small mapping, then to stream
+    BUYSTOCK/SELLSTOCK records.
+    """
+    tickers, unique_id = {}, None
+    for closing, tag, text in _iter_ofx_tags(path):
+        if tag == 'UNIQUEID' and not closing:
+            unique_id = text
+        elif tag == 'TICKER' and not closing and unique_id:
+            tickers[unique_id] = text
+
+    trade = None
+    for closing, tag, text in _iter_ofx_tags(path):
+        if tag in ('BUYSTOCK', 'SELLSTOCK'):
+            if not closing:
+                trade = {'line': None, 'type': 'Buy' if tag == 'BUYSTOCK' else 'Sell',
+                         'symbol': None, 'quantity': None, 'price': None, 'date': None, 'ref': None}
+            elif trade is not None:
+                yield trade
+                trade = None
+        elif trade is not None and not closing:
+            if tag == 'FITID':
+                trade['ref'] = text
+            elif tag == 'DTTRADE':
+                trade['date'] = text
+            elif tag == 'UNIQUEID':
+                trade['symbol'] = tickers.get(text, text)
+            elif tag == 'UNITS':
+                trade['quantity'] = text.lstrip('-')  # Sells carry negative units
+            elif tag == 'UNITPRICE':
+                trade['price'] = text
+
+
+def iter_trades(path, file_format=None):
+    """Pick the parser from file_format or the file extension"""
+    file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+    if file_format in ('ofx', 'qfx'):
+        return iter_ofx_trades(path)
+    if file_format in ('csv', 'txt'):
+        return iter_csv_trades(path)
+    raise TradeImportError(f"Unsupported trade file format: {file_format}")
+
+
+def normalize_trade(raw):
+    """Validate a raw row into symbol/type/quantity/price/date; raises TradeImportError"""
+    symbol = (raw.get('symbol') or '').strip().upper()
+    if not symbol:
+        raise TradeImportError("Missing symbol")
+
+    action = (raw.get('type') or '').strip().lower()
+    if action in BUY_WORDS:
+        trans_type = 'Buy'
+    elif action in SELL_WORDS:
+        trans_type = 'Sell'
+    else:
+        raise TradeImportError(f"{symbol}: unknown transaction type '{raw.get('type')}'")
+
+    try:
+        quantity = abs(_number(raw['quantity']))
+        price = _number(raw['price'])
+    except (TypeError, ValueError):
+        raise TradeImportError(f"{symbol}: quantity and price must be numbers")
+    if quantity <= 0 or price <= 0:
+        raise TradeImportError(f"{symbol}: quantity and price must be positive")
+
+    return {'symbol': symbol, 'type': trans_type, 'quantity': quantity, 'price': price,
+            'date': _parse_date(raw.get('date')), 'ref': raw.get('ref'), 'line': raw.get('line')}
+
+
+def oldest_first(trades):
+    """Yield trades in trade order, reversing a newest-first export.
+
+    The direction comes from the first two distinct dates. Oldest-first
+    streams pass through with only the first day buffered. Newest-first ones
+    are read whole and reversed, so their intraday order flips too.
+    """
+    trades = iter(trades)
+    head, first, descending = [], None, False
+    for trade in trades:
+        head.append(trade)
+        if trade['date'] and trade['date'] != first:
+            if first is not None:
+                descending = trade['date'] < first
+                break
+            first = trade['date']
+    if descending:
+        head.extend(trades)
+        head.reverse()
+        yield from head
+        return
+    yield from head
+    yield from trades
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size items without materialising the iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@instrument("service")
+class TradeImporter:
+    """Import a trade stream into one portfolio in idempotent batches"""
+
+    def __init__(self, portfolio_id, batch_size=500, strict=False):
+        if batch_size <= 0:
+            raise ValueError("Batch size must be positive")
+        self.portfolio_id = portfolio_id
+        self.batch_size = batch_size
+        self.strict = strict
+        self.stock_dao = StockDAO()
+        self.trans_dao = TransactionDAO()
+        self.stocks = None
+        self.occurrences = {}
+
+    def row_hash(self, trade):
+        """Stable identity for a trade; identical fills are told apart by occurrence.
+        
+        Occurrence counters live for the whole run, so identical fills get
+        distinct hashes even when the export does not group them by date.
+        """
+        if trade['ref']:
+            key = f"{self.portfolio_id}|ref|{trade['ref']}"
+        else:
+            key = "|".join(str(trade[f]) for f in ('symbol', 'type', 'quantity', 'price', 'date'))
+            key = f"{self.portfolio_id}|{key}"
+            self.occurrences[key] = self.occurrences.get(key, 0) + 1
+            key = f"{key}|{self.occurrences[key]}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def validated(self, raw_trades, errors):
+        """Normalise rows, recording (or raising on) invalid ones"""
+        for raw in raw_trades:
+            try:
+                yield normalize_trade(raw)
+            except TradeImportError as e:
+                if self.strict:
+                    raise
+                errors.append({'line': raw.get('line'), 'ref': raw.get('ref'), 'error': str(e)})
+
+    def held(self, symbol):
+        """Quantity of symbol in the portfolio (0 when it has no stocks row yet)"""
+        if self.stocks is None:
+            self.stocks = {s.symbol.upper(): s for s in self.stock_dao.get_stock_by_portfolio(self.portfolio_id)}
+        stock = self.stocks.get(symbol)
+        return stock.quantity if stock else 0
+
+    def resolve_stocks(self, trades):
+        """Make sure every symbol in trades has a stocks row; creates missing ones in bulk"""
+        new = {}
+        for trade in trades:
+            if trade['symbol'] not in self.stocks:
+                new[trade['symbol']] = trade['price']
+        created = self.stock_dao.add_stocks([
+            {"portfolio_id": self.portfolio_id, "symbol": symbol, "price": price, "quantity": 0}
+            for symbol, price in new.items()
+        ])
+        for stock in created:
+            self.stocks[stock.symbol.upper()] = stock
+        return len(created)
+
+    def write_chunk(self, trades, errors):
+        """Insert the trades of one chunk that were not imported before.
+        
+        Returns (inserted, stocks_created, duplicates).
+        """
+        for trade in trades:
+            trade['import_hash'] = self.row_hash(trade)
+        seen = self.trans_dao.get_existing_import_hashes([t['import_hash'] for t in trades])
+        fresh = [t for t in trades if t['import_hash'] not in seen]
+        if not fresh:
+            return 0, 0, len(trades)
+
+        accepted, changes, pending = [], {}, {}
+        for trade in fresh:
+            held = self.held(trade['symbol']) + pending.get(trade['symbol'], 0)
+            change = trade['quantity'] if trade['type'] == 'Buy' else -trade['quantity']
+            if held + change < 0:
+                message = f"Cannot sell {trade['quantity']} shares of {trade['symbol']}, only {held} available"
+                if self.strict:
+                    raise TradeImportError(message)
+                errors.append({'line': trade['line'], 'ref': trade['ref'], 'error': message})
+                continue
+            pending[trade['symbol']] = pending.get(trade['symbol'], 0) + change
+            changes[trade['import_hash']] = (trade['symbol'], change)
+            accepted.append(trade)
+
+        # Stocks rows only for symbols with an accepted trade, so rejected sells leave no empty holding
+        created = self.resolve_stocks(accepted)
+        rows = []
+        for trade in accepted:
+            stock = self.stocks[trade['symbol']]
+            row = {"portfolio_id": self.portfolio_id, "stock_id": stock.stock_id, "type": trade['type'],
+                   "quantity": trade['quantity'], "price": trade['price'], "import_hash": trade['import_hash']}
+            if trade['date']:
+                row["date"] = trade['date']
+            rows.append(row)
+
+        inserted = self.trans_dao.add_transactions_idempotent(rows)
+
+        # Only rows this run actually inserted move the holdings
+        applied = {}
+        for trans in inserted:
+            symbol, change = changes[trans.import_hash]
+            applied[symbol] = applied.get(symbol, 0) + change
+        for symbol, change in applied.items():
+            stock = self.stocks[symbol]
+            stock.quantity += change
+            self.stock_dao.update_stock(stock.stock_id, quantity=stock.quantity)
+
+        duplicates = (len(trades) - len(fresh)) + (len(rows) - len(inserted))
+        return len(inserted), created, duplicates
+
+    def run(self, raw_trades, on_progress=None):
+        """Stream raw_trades into the portfolio, oldest trade first; returns import statistics"""
+        started = time.perf_counter()
+        errors = []
+        stats = {'rows_read': 0, 'inserted': 0, 'duplicates': 0, 'stocks_created': 0}
+
+        def counted(rows):
+            for row in rows:
+                stats['rows_read'] += 1
+                yield row
+
+        for chunk in chunked(oldest_first(self.validated(counted(raw_trades), errors)), self.batch_size):
+            inserted, created, duplicates = self.write_chunk(chunk, errors)
+            stats['inserted'] += inserted
+            stats['stocks_created'] += created
+            stats['duplicates'] += duplicates
+            elapsed = time.perf_counter() - started
+            stats['rows_per_sec'] = stats['rows_read'] / elapsed if elapsed else 0.0
+            if on_progress:
+                on_progress(dict(stats))
+
+        elapsed = time.perf_counter() - started
+        stats['rejected'] = len(errors)
+        stats['seconds'] = elapsed
+        stats['rows_per_sec'] = stats['rows_read'] / elapsed if elapsed else 0.0
+        stats['errors'] = errors[:100]  # First problems only; rejected has the total
+        return stats
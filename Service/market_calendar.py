@@ -0,0 +1,244 @@
+"""Trading sessions, holidays and early closes of the major exchanges.
+
+A price cannot move while its exchange is closed, so a quote fetched
+outside a session stays valid until the next open (``settled_until``). The
+quote cache, ``refresh_stock_prices`` and the price scheduler use this to
+skip the network on nights, weekends and holidays.
+
+Holidays are computed from each exchange's rules (fixed dates, nth
+weekdays, Easter, weekend substitution), so no yearly tables need
+updating; one-off closures such as state funerals are not covered. Symbols
+map to exchanges by their Yahoo suffix (``VOD.L`` is London, plain ``AAPL``
+is US). Symbols without a calendar (crypto, currencies, futures, exchanges
+not listed here) get None and fall back to the cache TTL.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+MON, TUE, WED, THU, FRI, SAT, SUN = range(7)
+
+
+def easter(year):
+    """Western Easter Sunday (anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year, month, weekday, n):
+    """n-th weekday of a month (n=-1 for the last)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def nearest_weekday(day):
+    """US observance: Saturday holidays move to Friday, Sunday ones to Monday"""
+    return day - timedelta(days=1) if day.weekday() == SAT else (
+        day + timedelta(days=1) if day.weekday() == SUN else day)
+
+
+def next_monday_if_weekend(day):
+    return day + timedelta(days=(7 - day.weekday()) % 7) if day.weekday() >= SAT else day
+
+
+def christmas_and_boxing(year):
+    """Christmas and Boxing Day with Commonwealth substitute days when they fall on a weekend"""
+    christmas, boxing = date(year, 12, 25), date(year, 12, 26)
+    if christmas.weekday() == SAT:
+        return [date(year, 12, 27), date(year, 12, 28)]
+    if christmas.weekday() == SUN:
+        return [date(year, 12, 27), boxing]
+    if boxing.weekday() == SAT:
+        return [christmas, date(year, 12, 28)]
+    return [christmas, boxing]
+
+
+# Holiday rules per calendar: year -> list of dates the exchange is closed
+def us_holidays(year):
+    days = [
+        nth_weekday(year, 1, MON, 3), nth_weekday(year, 2, MON, 3), easter(year) - timedelta(days=2),
+        nth_weekday(year, 5, MON, -1), nearest_weekday(date(year, 7, 4)), nth_weekday(year, 9, MON, 1),
+        nth_weekday(year, 11, THU, 4), nearest_weekday(date(year, 12, 25)),
+    ]
+    if date(year, 1, 1).weekday() != SAT:  # NYSE stays open on a Friday Dec 31
+        days.append(nearest_weekday(date(year, 1, 1)))
+    if year >= 2022:
+        days.append(nearest_weekday(date(year, 6, 19)))
+    return days
+
+
+def uk_holidays(year):
+    good_friday = easter(year) - timedelta(days=2)
+    return [next_monday_if_weekend(date(year, 1, 1)), good_friday, good_friday + timedelta(days=3),
+            nth_weekday(year, 5, MON, 1), nth_weekday(year, 5, MON, -1), nth_weekday(year, 8, MON, -1),
+            *christmas_and_boxing(year)]
+
+
+def canada_holidays(year):
+    good_friday = easter(year) - timedelta(days=2)
+    victoria = date(year, 5, 24) - timedelta(days=date(year, 5, 24).weekday())  # Monday on or before May 24
+    return [next_monday_if_weekend(date(year, 1, 1)), nth_weekday(year, 2, MON, 3), good_friday, victoria,
+            next_monday_if_weekend(date(year, 7, 1)), nth_weekday(year, 8, MON, 1), nth_weekday(year, 9, MON, 1),
+            nth_weekday(year, 10, MON, 2), *christmas_and_boxing(year)]
+
+
+def xetra_holidays(year):
+    good_friday = easter(year) - timedelta(days=2)
+    return [date(year, 1, 1), good_friday, good_friday + timedelta(days=3), date(year, 5, 1),
+            date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31)]
+
+
+def euronext_holidays(year):
+    good_friday = easter(year) - timedelta(days=2)
+    return [date(year, 1, 1), good_friday, good_friday + timedelta(days=3), date(year, 5, 1),
+            date(year, 12, 25), date(year, 12, 26)]
+
+
+def australia_holidays(year):
+    good_friday = easter(year) - timedelta(days=2)
+    return [next_monday_if_weekend(date(year, 1, 1)), next_monday_if_weekend(date(year, 1, 26)), good_friday,
+            good_friday + timedelta(days=3), date(year, 4, 25), nth_weekday(year, 6, MON, 2),
+            *christmas_and_boxing(year)]
+
+
+# Early closes: year -> {date: local close time}, applied only on days that are not holidays
+def us_early_closes(year):
+    thanksgiving = nth_weekday(year, 11, THU, 4)
+    return {date(year, 7, 3): time(13), thanksgiving + timedelta(days=1): time(13), date(year, 12, 24): time(13)}
+
+
+def year_end_closes(close):
+    return lambda year: {date(year, 12, 24): close, date(year, 12, 31): close}
+
+
+class Exchange:
+    """One exchange's regular session in its local time zone"""
+
+    def __init__(self, code, name, tz, open_time, close_time, holidays, early_closes=None):
+        self.code = code
+        self.name = name
+        self.tz = ZoneInfo(tz)
+        self.open_time = open_time
+        self.close_time = close_time
+        self._holiday_rule = holidays
+        self._early_close_rule = early_closes
+
+    def __repr__(self):
+        return f"Exchange({self.code})"
+
+    @lru_cache(maxsize=None)
+    def holidays(self, year):
+        return frozenset(day for day in self._holiday_rule(year) if day.weekday() < SAT)
+
+    @lru_cache(maxsize=None)
+    def early_closes(self, year):
+        return self._early_close_rule(year) if self._early_close_rule else {}
+
+    def is_trading_day(self, day):
+        return day.weekday() < SAT and day not in self.holidays(day.year)
+
+    def session(self, day):
+        """(open, close) as UTC datetimes for a local date, or None when the exchange is shut all day"""
+        if not self.is_trading_day(day):
+            return None
+        close = self.early_closes(day.year).get(day, self.close_time)
+        return (datetime.combine(day, self.open_time, tzinfo=self.tz).astimezone(timezone.utc),
+                datetime.combine(day, close, tzinfo=self.tz).astimezone(timezone.utc))
+
+    def is_open(self, moment=None):
+        moment = moment or datetime.now(timezone.utc)
+        session = self.session(moment.astimezone(self.tz).date())
+        return session is not None and session[0] <= moment < session[1]
+
+    def next_open(self, moment=None):
+        """UTC datetime of the first session open after moment"""
+        moment = moment or datetime.now(timezone.utc)
+        day = moment.astimezone(self.tz).date()
+        for offset in range(15):  # The longest run of closed days is well under two weeks
+            session = self.session(day + timedelta(days=offset))
+            if session is not None and session[0] > moment:
+                return session[0]
+        raise ValueError(f"No {self.code} session within two weeks of {moment:%Y-%m-%d}")
+
+    def settled_until(self, moment=None):
+        """Next open if the exchange is closed at moment (prices cannot move until then), else None"""
+        moment = moment or datetime.now(timezone.utc)
+        return None if self.is_open(moment) else self.next_open(moment)
+
+
+_us = dict(tz="America/New_York", open_time=time(9, 30), close_time=time(16), holidays=us_holidays,
+           early_closes=us_early_closes)
+_euronext = dict(tz="Europe/Paris", open_time=time(9), close_time=time(17, 30), holidays=euronext_holidays,
+                 early_closes=year_end_closes(time(14, 5)))
+EXCHANGES = {exchange.code: exchange for exchange in [
+    Exchange("XNYS", "New York Stock Exchange", **_us),
+    Exchange("XNAS", "Nasdaq", **_us),
+    Exchange("XLON", "London Stock Exchange", "Europe/London", time(8), time(16, 30), uk_holidays,
+             year_end_closes(time(12, 30))),
+    Exchange("XTSE", "Toronto Stock Exchange", "America/Toronto", time(9, 30), time(16), canada_holidays,
+             lambda year: {date(year, 12, 24): time(13)}),
+    Exchange("XETR", "Xetra", "Europe/Berlin", time(9), time(17, 30), xetra_holidays),
+    Exchange("XPAR", "Euronext Paris", **_euronext),
+    Exchange("XAMS", "Euronext Amsterdam", **_euronext),
+    Exchange("XBRU", "Euronext Brussels", **_euronext),
+    Exchange("XLIS", "Euronext Lisbon", **dict(_euronext, tz="Europe/Lisbon", open_time=time(8),
+                                                close_time=time(16, 30), early_closes=year_end_closes(time(13, 5)))),
+    Exchange("XASX", "Australian Securities Exchange", "Australia/Sydney", time(10), time(16),
+             australia_holidays, year_end_closes(time(14, 10))),
+]}
+
+# Yahoo ticker suffix -> exchange; plain tickers are US listings
+SUFFIXES = {"L": "XLON", "IL": "XLON", "TO": "XTSE", "V": "XTSE", "DE": "XETR", "PA": "XPAR", "AS": "XAMS",
+            "BR": "XBRU", "LS": "XLIS", "AX": "XASX"}
+# Index ticker -> exchange; indices on exchanges not listed here (^N225, ^HSI, ^STOXX50E) have no calendar
+INDICES = {"^GSPC": "XNYS", "^DJI": "XNYS", "^NYA": "XNYS", "^RUT": "XNYS", "^VIX": "XNYS", "^IXIC": "XNAS",
+           "^NDX": "XNAS", "^FTSE": "XLON", "^GSPTSE": "XTSE", "^GDAXI": "XETR", "^FCHI": "XPAR", "^AEX": "XAMS",
+           "^AXJO": "XASX"}
+
+
+@lru_cache(maxsize=4096)
+def exchange_for(symbol):
+    """Exchange trading symbol, or None when it has no calendar here"""
+    symbol = symbol.upper()
+    if symbol.startswith("^"):
+        code = INDICES.get(symbol)
+        return EXCHANGES[code] if code else None
+    if "=" in symbol:
+        return None  # Currencies and futures trade around the clock
+    base, _, suffix = symbol.rpartition(".")
+    if base:
+        code = SUFFIXES.get(suffix)
+        return EXCHANGES[code] if code else None
+    if "-" in symbol and len(symbol.rsplit("-", 1)[1]) >= 3:
+        return None  # Crypto pairs such as BTC-USD (share classes look like BRK-B)
+    return EXCHANGES["XNYS"]
+
+
+def settled_until(symbol, moment=None):
+    """When symbol's price can next move, if its exchange is closed at moment; else None"""
+    exchange = exchange_for(symbol)
+    return exchange.settled_until(moment) if exchange else None
+
+
+def any_open(symbols, moment=None):
+    """True if any symbol can trade at moment (symbols without a calendar always can)"""
+    moment = moment or datetime.now(timezone.utc)
+    exchanges = {exchange_for(s) for s in symbols}
+    return None in exchanges or any(exchange.is_open(moment) for exchange in exchanges)
+
+
+def next_open(symbols, moment=None):
+    """Earliest session open after moment across the symbols' exchanges (None if there are none)"""
+    moment = moment or datetime.now(timezone.utc)
+    opens = [exchange.next_open(moment) for exchange in {exchange_for(s) for s in symbols} if exchange]
+    return min(opens) if opens else None
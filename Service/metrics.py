@@ -0,0 +1,378 @@
+"""Prometheus-style metrics for production monitoring.
+
+A small in-process registry of counters, gauges and histograms rendered in
+the Prometheus text exposition format (0.0.4). An observation is a dict
+lookup, a bisect and a locked add, which costs about a microsecond.
+
+    python -m Client.batch_cli --metrics-port 9108 watch
+    METRICS_PORT=9108 streamlit run web_dashboard.py
+    curl localhost:9108/metrics
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def labels(self, *values, **kwargs):
+        """Child metric for one combination of label values"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {', '.join(self.labelnames)}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self):
+        return [(tuple(str(v) for v in key), child) for key, child in list(self._children.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._samples(), key=lambda sample: sample[0]):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self.lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self._default.set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_child(self, key, child):
+        with child.lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.bounds + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Named metrics plus collectors that compute values at scrape time"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def register_collector(self, collect):
+        """collect() is called before every scrape to refresh computed gauges"""
+        self._collectors.append(collect)
+
+    def render(self):
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Metrics recorded across the app
+DAO_LATENCY = registry.histogram(
+    "tracker_dao_query_seconds", "Supabase query latency", ["table", "operation"])
+DAO_ERRORS = registry.counter(
+    "tracker_dao_errors_total", "Supabase queries that raised", ["table", "operation"])
+PROVIDER_LATENCY = registry.histogram(
+    "tracker_quote_provider_seconds", "Quote provider call latency", ["method"])
+PROVIDER_ERRORS = registry.counter(
+    "tracker_quote_provider_errors_total", "Quote provider calls that failed", ["method"])
+PROVIDER_CIRCUIT = registry.gauge(
+    "tracker_quote_provider_circuit_open", "1 while the quote provider circuit breaker is open")
+PROVIDER_SHORT_CIRCUITS = registry.counter(
+    "tracker_quote_provider_short_circuits_total", "Lookups answered without calling the provider", ["result"])
+PROVIDER_HEDGES = registry.counter(
+    "tracker_quote_provider_hedges_total", "Fallback requests raced against a slow lookup, by winner", ["winner"])
+CACHE_REQUESTS = registry.counter(
+    "tracker_cache_requests_total", "Cache lookups by result", ["cache", "result"])
+CACHE_HIT_RATIO = registry.gauge(
+    "tracker_cache_hit_ratio", "Hits / lookups since start", ["cache"])
+REFRESH_DURATION = registry.histogram(
+    "tracker_refresh_seconds", "Price refresh job duration", ["job"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+SCHEDULER_CYCLES = registry.counter(
+    "tracker_scheduler_cycles_total", "Price scheduler wake-ups by outcome", ["status"])
+CHANGE_EVENTS = registry.counter(
+    "tracker_change_feed_events_total", "Row changes received from the change feed", ["table", "type"])
+PAGE_RENDER = registry.histogram(
+    "tracker_page_render_seconds", "Dashboard page render time", ["page"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0))
+API_LATENCY = registry.histogram(
+    "tracker_api_request_seconds", "REST API request latency", ["route", "status"])
+
+
+def _collect_cache_ratios():
+    lookups = {}
+    for key, child in CACHE_REQUESTS._samples():
+        cache, result = key
+        hits, total = lookups.get(cache, (0.0, 0.0))
+        lookups[cache] = (hits + (child.value if result == "hit" else 0.0), total + child.value)
+    for cache, (hits, total) in lookups.items():
+        CACHE_HIT_RATIO.labels(cache).set(hits / total if total else 0.0)
+
+
+registry.register_collector(_collect_cache_ratios)
+
+
+@contextmanager
+def provider_call(method):
+    """Time one quote provider call and count it as an error if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        PROVIDER_ERRORS.labels(method).inc()
+        raise
+    finally:
+        PROVIDER_LATENCY.labels(method).observe(time.perf_counter() - started)
+
+
+# Supabase client wrapper: every execute() is timed by table and operation
+_OPERATIONS = ("select", "insert", "upsert", "update", "delete")
+_FILTERS = ("eq", "neq", "in_", "ilike", "like", "gt", "gte", "lt", "lte", "order", "range", "limit")
+
+
+class _MeteredQuery:
+    """Wraps one query chain; builder calls update it in place like the SDK's own builders"""
+    __slots__ = ("_query", "_table", "_operation")
+
+    def __init__(self, query, table, operation):
+        self._query = query
+        self._table = table
+        self._operation = operation
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._query = attr(*args, **kwargs)
+            return self
+        return call
+
+    def execute(self):
+        started = time.perf_counter()
+        try:
+            return self._query.execute()
+        except Exception:
+            DAO_ERRORS.labels(self._table, self._operation).inc()
+            raise
+        finally:
+            DAO_LATENCY.labels(self._table, self._operation).observe(time.perf_counter() - started)
+
+
+class _MeteredAsyncQuery(_MeteredQuery):
+    __slots__ = ()
+
+    async def execute(self):
+        started = time.perf_counter()
+        try:
+            return await self._query.execute()
+        except Exception:
+            DAO_ERRORS.labels(self._table, self._operation).inc()
+            raise
+        finally:
+            DAO_LATENCY.labels(self._table, self._operation).observe(time.perf_counter() - started)
+
+
+class MeteredClient:
+    """Supabase client proxy recording query latency; everything else passes through"""
+    query_class = _MeteredQuery
+
+    def __init__(self, client):
+        self.client = client
+
+    def table(self, name):
+        return self.query_class(self.client.table(name), name, "select")
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class MeteredAsyncClient(MeteredClient):
+    """MeteredClient for the async Supabase client, whose execute() is awaited"""
+    query_class = _MeteredAsyncQuery
+
+
+# Builder methods the DAOs use are real methods: __getattr__ costs microseconds per call
+def _builder(name, operation=None):
+    def method(self, *args, **kwargs):
+        self._query = getattr(self._query, name)(*args, **kwargs)
+        if operation:
+            self._operation = operation
+        return self
+    method.__name__ = name
+    return method
+
+
+for _name in _OPERATIONS:
+    setattr(_MeteredQuery, _name, _builder(_name, _name))
+for _name in _FILTERS:
+    setattr(_MeteredQuery, _name, _builder(_name))
+
+
+# HTTP endpoint (http.server is only imported when the endpoint is started)
+def _handler_class():
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood the console
+
+    return MetricsHandler
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port, addr="127.0.0.1"):
+    """Serve /metrics from a daemon thread; later calls return the running server"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            from http.server import ThreadingHTTPServer
+            _server = ThreadingHTTPServer((addr, port), _handler_class())
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return _server
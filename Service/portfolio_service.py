@@ -1,17 +1,21 @@
-from DAO.portfolio_dao import PortfolioDAO
+from DAO.portfolio_dao import AsyncPortfolioDAO, PortfolioDAO
 from DAO.stock_dao import StockDAO
 from Service.stock_service import StockService
 from Service.transaction_service import TransactionService
+from Service.tracing import instrument
+from Service.metrics import REFRESH_DURATION
 
+@instrument("service")
 class PortfolioService:
     def __init__(self):
         self.portfolio_dao = PortfolioDAO()
+        self.async_portfolio_dao = AsyncPortfolioDAO()
         self.stock_service = StockService()
         self.transaction_service = TransactionService()
     
     def create_portfolio(self, user_id, portfolio_name):
         existing = self.portfolio_dao.get_portfolio_by_user(user_id)
-        if any(p["portfolio_name"] == portfolio_name for p in existing):
+        if any(p.portfolio_name == portfolio_name for p in existing):
             raise ValueError("Portfolio already exists")
         return self.portfolio_dao.create_portfolio(user_id, portfolio_name)
     
@@ -38,13 +42,27 @@ class PortfolioService:
         
         # Get current stocks
         stocks = self.stock_service.get_stocks(portfolio_id)
-        
+        return self._analytics(portfolio, performance, stocks)
+    
+    async def get_portfolio_analytics_async(self, portfolio_id):
+        """get_portfolio_analytics with the portfolio, performance and stock queries issued together"""
+        import asyncio  # Imported here: the CLIs never run an event loop
+        portfolio, performance, stocks = await asyncio.gather(
+            self.async_portfolio_dao.get_portfolio_by_id(portfolio_id),
+            self.transaction_service.get_portfolio_performance_async(portfolio_id),
+            self.stock_service.get_stocks_async(portfolio_id)
+        )
+        if not portfolio:
+            raise ValueError("Portfolio not found")
+        return self._analytics(portfolio, performance, stocks)
+    
+    def _analytics(self, portfolio, performance, stocks):
         # Calculate additional metrics
         if stocks:
             # Find top performing stock
-            top_stock = max(stocks, key=lambda s: s['price'] * s['quantity'])
+            top_stock = max(stocks, key=lambda s: s.total_value)
             # Find stock with highest quantity
-            highest_quantity = max(stocks, key=lambda s: s['quantity'])
+            highest_quantity = max(stocks, key=lambda s: s.quantity)
         else:
             top_stock = None
             highest_quantity = None
@@ -66,7 +84,21 @@ class PortfolioService:
         
         updated_count = self.stock_service.refresh_stock_prices(portfolio_id)
         return {
-            'portfolio_name': portfolio['portfolio_name'],
+            'portfolio_name': portfolio.portfolio_name,
+            'stocks_updated': updated_count
+        }
+    
+    def refresh_user_prices(self, user_id, on_progress=None):
+        """Refresh every portfolio of a user, fetching each distinct symbol only once"""
+        with REFRESH_DURATION.labels("user").time():
+            portfolios = self.get_user_portfolios(user_id)
+            stocks = self.stock_service.stock_dao.get_stocks_by_portfolios(
+                [p.portfolio_id for p in portfolios]
+            )
+            updated_count = self.stock_service.refresh_prices_for_stocks(stocks, on_progress)
+        return {
+            'portfolio_count': len(portfolios),
+            'symbol_count': len({s.symbol.upper() for s in stocks}),
             'stocks_updated': updated_count
         }
     
@@ -78,27 +110,43 @@ class PortfolioService:
         for portfolio in portfolios:
             try:
                 # Use transaction service for performance data
-                performance = self.transaction_service.get_portfolio_performance(portfolio['portfolio_id'])
-                stocks = self.stock_service.get_stocks(portfolio['portfolio_id'])
-                
-                portfolio_summaries.append({
-                    'portfolio_id': portfolio['portfolio_id'],
-                    'portfolio_name': portfolio['portfolio_name'],
-                    'current_value': performance['current_value'],
-                    'total_gain_loss': performance['total_gain_loss'],
-                    'gain_loss_percentage': performance['gain_loss_percentage'],
-                    'stock_count': len(stocks)
-                })
+                performance = self.transaction_service.get_portfolio_performance(portfolio.portfolio_id)
+                portfolio_summaries.append(self._summary_row(portfolio, performance))
             except Exception as e:
                 # If analytics fail, provide basic info
-                portfolio_summaries.append({
-                    'portfolio_id': portfolio['portfolio_id'],
-                    'portfolio_name': portfolio['portfolio_name'],
-                    'current_value': 0,
-                    'total_gain_loss': 0,
-                    'gain_loss_percentage': 0,
-                    'stock_count': 0,
-                    'error': str(e)
-                })
+                portfolio_summaries.append(self._error_row(portfolio, e))
         
-        return portfolio_summaries
\ No newline at end of file
+        return portfolio_summaries
+    
+    async def get_portfolio_summary_async(self, user_id):
+        """get_portfolio_summary with every portfolio's queries in flight at once"""
+        import asyncio
+        portfolios = await self.async_portfolio_dao.get_portfolio_by_user(user_id)
+        performances = await asyncio.gather(
+            *(self.transaction_service.get_portfolio_performance_async(p.portfolio_id) for p in portfolios),
+            return_exceptions=True
+        )
+        return [self._error_row(portfolio, performance) if isinstance(performance, Exception)
+                else self._summary_row(portfolio, performance)
+                for portfolio, performance in zip(portfolios, performances)]
+    
+    def _summary_row(self, portfolio, performance):
+        return {
+            'portfolio_id': portfolio.portfolio_id,
+            'portfolio_name': portfolio.portfolio_name,
+            'current_value': performance['current_value'],
+            'total_gain_loss': performance['total_gain_loss'],
+            'gain_loss_percentage': performance['gain_loss_percentage'],
+            'stock_count': performance['stocks_held']  # Same stocks query the performance made
+        }
+    
+    def _error_row(self, portfolio, error):
+        return {
+            'portfolio_id': portfolio.portfolio_id,
+            'portfolio_name': portfolio.portfolio_name,
+            'current_value': 0,
+            'total_gain_loss': 0,
+            'gain_loss_percentage': 0,
+            'stock_count': 0,
+            'error': str(error)
+        }
@@ -0,0 +1,144 @@
+"""Local store of daily closing prices, the data behind backtests.
+
+Each symbol's closes (adjusted for splits and dividends) live in one small
+``date,close`` CSV under ``PRICE_HISTORY_DIR``. ``refresh`` fetches only the
+days after a symbol's last stored close, for many symbols at once:
+
+    python -m Client.batch_cli history --years 10
+
+``prices`` reads the files into one date x symbol frame shared by the
+process, so backtests never touch the network.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from config import HISTORY_YEARS, PRICE_HISTORY_DIR
+from Service.stock_service import MAX_FETCH_WORKERS, StockService
+from Service.shared_store import shared_store
+from Service.quote_provider import get_quote_provider
+from Service.tracing import instrument, propagate
+from Service.metrics import provider_call
+
+FRAME_TTL = 300  # Seconds a loaded frame is reused; refresh() drops it sooner
+# A stored close that moved this much on refetch means a split or dividend re-adjusted the whole series
+ADJUSTMENT_TOLERANCE = 0.001
+
+
+class PriceHistoryStore:
+    """Daily closes per symbol, one CSV file each under directory"""
+
+    def __init__(self, directory=PRICE_HISTORY_DIR):
+        self.directory = directory
+
+    def path(self, symbol):
+        return os.path.join(self.directory, re.sub(r"[^A-Z0-9.^=-]", "_", symbol.upper()) + ".csv")
+
+    def read(self, symbol):
+        """Closes as a float Series indexed by date, empty when nothing is stored"""
+        import pandas as pd  # Imported here: only backtests need pandas
+        try:
+            return pd.read_csv(self.path(symbol), index_col="date", parse_dates=["date"])["close"].astype("float64")
+        except FileNotFoundError:
+            return pd.Series(dtype="float64", index=pd.DatetimeIndex([], name="date"), name="close")
+
+    def write(self, symbol, closes):
+        """Replace symbol's file; written to a temporary file first so readers never see half of it"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", newline="") as f:
+                closes.rename("close").to_csv(f, index_label="date", date_format="%Y-%m-%d", float_format="%.4f")
+            os.replace(tmp, self.path(symbol))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load(self, symbols, start=None, end=None):
+        """date x symbol frame of closes between start and end (inclusive).
+
+        Gaps (another exchange's holidays) carry the last close forward.
+        Symbols with nothing stored are left out.
+        """
+        import pandas as pd  # Imported here: only backtests need pandas
+        series = {symbol: closes for symbol in symbols if len(closes := self.read(symbol))}
+        frame = pd.DataFrame(series, dtype="float64").sort_index().ffill()
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame.index <= pd.Timestamp(end)]
+        return frame
+
+
+@instrument("service")
+class PriceHistoryService:
+    def __init__(self, stock_service=None, store=None):
+        self.stock_service = stock_service or StockService()
+        self.store = store or PriceHistoryStore()
+
+    def prices(self, symbols, start=None, end=None):
+        """Shared date x symbol close frame (see PriceHistoryStore.load)"""
+        symbols = tuple(sorted({s.upper() for s in symbols}))
+        return shared_store.get_or_load(("history", symbols, start, end),
+                                        lambda: self.store.load(symbols, start, end), FRAME_TTL)
+
+    def refresh(self, symbols=None, years=HISTORY_YEARS, on_progress=None, max_workers=MAX_FETCH_WORKERS):
+        """Append the closes missing from each symbol's file; new symbols get the last years of history.
+
+        symbols defaults to every held symbol. on_progress gets {'done',
+        'total', 'symbol', 'days', 'error'} per symbol. Returns counts of
+        symbols, updated, unchanged, failed and days (closes added).
+        """
+        symbols = sorted({s.upper() for s in symbols}) if symbols else self.stock_service.held_symbols()
+        first_day = date.today() - timedelta(days=round(years * 365.25))
+        stats = {'symbols': len(symbols), 'updated': 0, 'unchanged': 0, 'failed': 0, 'days': 0}
+        if not symbols:
+            return stats
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as pool:
+            futures = {pool.submit(propagate(self._update), symbol, first_day): symbol for symbol in symbols}
+            for done, future in enumerate(as_completed(futures), 1):
+                days, error = 0, None
+                try:
+                    days = future.result()
+                    stats['updated' if days else 'unchanged'] += 1
+                    stats['days'] += days
+                except ValueError as e:
+                    error = str(e)
+                    stats['failed'] += 1
+                if on_progress:
+                    on_progress({'done': done, 'total': len(symbols), 'symbol': futures[future], 'days': days,
+                                 'error': error})
+        if stats['updated']:
+            shared_store.invalidate_class("history")
+        return stats
+
+    def _update(self, symbol, first_day):
+        """Fetch and store symbol's new closes; returns how many days were added"""
+        import pandas as pd  # Imported here: only backtests need pandas
+        stored = self.store.read(symbol)
+        # Refetch from the second-to-last close: the last one may have been taken mid-session
+        settled = stored.index[-2] if len(stored) > 1 else None
+        fetched = self._fetch(symbol, settled.date() if settled is not None else first_day)
+        if settled is not None and len(fetched):
+            overlap = fetched.get(settled)
+            if overlap is not None and abs(overlap / stored[settled] - 1) > ADJUSTMENT_TOLERANCE:
+                fetched = self._fetch(symbol, stored.index[0].date())
+                stored = stored.iloc[:0]
+        closes = pd.concat([stored[stored.index < fetched.index[0]], fetched]) if len(fetched) else stored
+        if closes.equals(stored):
+            return 0
+        self.store.write(symbol, closes)
+        return len(closes) - len(stored)
+
+    def _fetch(self, symbol, since):
+        import pandas as pd  # Imported here: only backtests need pandas
+        with provider_call("get_history"):
+            rows = get_quote_provider().get_history(symbol, since)
+        return pd.Series([close for _, close in rows], index=pd.DatetimeIndex([day for day, _ in rows], name="date"),
+                         dtype="float64", name="close")
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import namedtuple
+from Service.shared_store import shared_store, deep_sizeof
+from Service.tracing import instrument
+from Service.metrics import CACHE_REQUESTS
+
+# A cached live price. ``version`` is the cache-wide change counter at the
+# moment this price last *moved*, so readers can ask for "what changed since
+# the version I last saw" without comparing every price themselves.
+# ``settled_until`` (epoch seconds or None) is the next session open when the
+# price was fetched while its exchange was closed: it cannot move before then.
+Quote = namedtuple("Quote", ["symbol", "price", "fetched_at", "version", "settled_until"])
+
+
+@instrument("cache")
+class QuoteCache:
+    """Process-wide cache of live prices shared by every StockService"""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._quotes = {}
+        self._version = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def is_fresh(self, quote, now=None):
+        """Younger than the TTL, or fetched while its market was closed and it has not reopened"""
+        now = time.time() if now is None else now
+        return quote is not None and ((now - quote.fetched_at) < self.ttl or
+                                      (quote.settled_until is not None and now < quote.settled_until))
+
+    def get(self, symbol):
+        """Return the cached quote for symbol if it has not expired"""
+        quote = self._quotes.get(symbol.upper())
+        return quote if self.is_fresh(quote) else None
+
+    def settled(self, symbol):
+        """Return the cached quote for symbol if its market has stayed closed since it was fetched"""
+        quote = self._quotes.get(symbol.upper())
+        if quote is None or quote.settled_until is None or time.time() >= quote.settled_until:
+            return None
+        return quote
+
+    def peek(self, symbol):
+        """Return the last known quote for symbol regardless of age"""
+        return self._quotes.get(symbol.upper())
+
+    def stale_symbols(self, symbols):
+        """Symbols whose cache entry is missing or expired"""
+        now = time.time()
+        stale = [s for s in symbols if not self.is_fresh(self._quotes.get(s.upper()), now)]
+        CACHE_REQUESTS.labels("quote", "hit").inc(len(symbols) - len(stale))
+        CACHE_REQUESTS.labels("quote", "miss").inc(len(stale))
+        return stale
+
+    def put(self, symbol, price, settled_until=None):
+        """Store a freshly fetched price. Returns True if the price moved.
+
+        settled_until is when the symbol's market reopens, if it is closed now.
+        """
+        symbol = symbol.upper()
+        price = float(price)
+        with self._lock:
+            previous = self._quotes.get(symbol)
+            changed = previous is None or previous.price != price
+            if changed:
+                self._version += 1
+                version = self._version
+            else:
+                version = previous.version
+            self._quotes[symbol] = Quote(symbol, price, time.time(), version, settled_until)
+        return changed
+
+    def changed_since(self, version, symbols=None):
+        """Return ({symbol: Quote} moved after version, current version)"""
+        with self._lock:
+            current = self._version
+            if symbols is None:
+                candidates = self._quotes.values()
+            else:
+                candidates = (self._quotes.get(s.upper()) for s in symbols)
+            changed = {q.symbol: q for q in candidates if q is not None and q.version > version}
+        return changed, current
+
+    def memory_usage(self):
+        """(entries, bytes) held by the cache"""
+        quotes = dict(self._quotes)
+        return len(quotes), deep_sizeof(quotes)
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._quotes.clear()
+            else:
+                self._quotes.pop(symbol.upper(), None)
+
+
+# Shared by all services in this process (CLI, dashboard sessions, jobs)
+quote_cache = QuoteCache()
+shared_store.register_source("quote", quote_cache.memory_usage)
@@ -0,0 +1,93 @@
+from Service.resilience import QuoteUnavailable, ResilientQuoteProvider
+from Service.tracing import instrument, propagate
+
+
+@instrument("provider")
+class YahooQuoteProvider:
+    """Market data from Yahoo Finance via yfinance (imported on the first lookup)"""
+
+    market_hours = True  # Prices only move during exchange sessions (see Service/market_calendar.py)
+
+    def get_price(self, symbol):
+        """Fetch live stock price from Yahoo Finance with enhanced error handling"""
+        try:
+            import yfinance as yf
+            stock = yf.Ticker(symbol)
+            info = stock.info
+
+            # Try multiple price fields with fallbacks
+            current_price = (info.get('currentPrice') or
+                             info.get('regularMarketPrice') or
+                             info.get('previousClose') or
+                             info.get('open'))
+
+            if not current_price:
+                return self._history_price(stock, symbol)
+
+            price_float = float(current_price)
+            if price_float <= 0:
+                raise QuoteUnavailable(f"Invalid price for {symbol}")
+
+            return price_float
+
+        except QuoteUnavailable:
+            raise
+        except Exception as e:
+            raise ValueError(f"Could not fetch price for {symbol}: {str(e)}")
+
+    def get_price_hedge(self, symbol):
+        """Last close from history(): the lighter fallback endpoint, raced against get_price when hedging"""
+        try:
+            import yfinance as yf
+            return self._history_price(yf.Ticker(symbol), symbol)
+        except QuoteUnavailable:
+            raise
+        except Exception as e:
+            raise ValueError(f"Could not fetch price history for {symbol}: {str(e)}")
+
+    def _history_price(self, stock, symbol):
+        hist = stock.history(period="1d")
+        price = float(hist['Close'].iloc[-1]) if not hist.empty else 0
+        if price <= 0:
+            raise QuoteUnavailable(f"Invalid price for {symbol}")
+        return price
+
+    def get_info(self, symbol):
+        """Raw company/quote info dict for symbol"""
+        import yfinance as yf
+        return yf.Ticker(symbol).info
+
+    def get_history(self, symbol, start, end=None):
+        """Daily closes [(YYYY-MM-DD, close)] from start up to end (dates), oldest first, adjusted for splits and dividends"""
+        try:
+            import yfinance as yf
+            hist = yf.Ticker(symbol).history(start=start.isoformat(), end=end.isoformat() if end else None,
+                                             auto_adjust=True)
+        except Exception as e:
+            raise ValueError(f"Could not fetch price history for {symbol}: {str(e)}")
+        return [(stamp.date().isoformat(), float(close)) for stamp, close in hist['Close'].dropna().items()]
+
+    async def get_price_async(self, symbol):
+        """get_price for event loops; yfinance blocks, so it runs on the loop's default executor"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, propagate(self.get_price), symbol)
+
+
+def default_provider():
+    """Yahoo behind deadlines and a circuit breaker (see Service/resilience.py)"""
+    return ResilientQuoteProvider(YahooQuoteProvider())
+
+
+# Provider used by every StockService; swapped for offline providers in load tests
+_provider = default_provider()
+
+
+def get_quote_provider():
+    return _provider
+
+
+def set_quote_provider(provider):
+    """Route all quote lookups through provider. Pass None to restore Yahoo."""
+    global _provider
+    _provider = provider if provider is not None else default_provider()
@@ -0,0 +1,215 @@
+"""Deadlines, a circuit breaker and hedged requests around the quote provider.
+
+A slow or rate-limiting Yahoo used to block each lookup until ``.info``
+timed out, and a refresh paid that wait once per symbol. The wrapper here
+bounds every lookup by ``QUOTE_TIMEOUT`` seconds. After a run of failures
+the circuit opens and lookups fail fast for a cooldown that doubles on
+every consecutive trip. While it is open, prices come back as the last
+known value wrapped in StalePrice (a float flagged ``stale``), so screens
+keep their numbers and refresh paths know not to store them. With
+``QUOTE_HEDGE_AFTER`` set, a lookup still running after that many seconds
+is raced against the provider's lighter ``get_price_hedge`` path, and the
+first answer wins.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queue
+import threading
+import time
+
+from config import QUOTE_HEDGE_AFTER, QUOTE_TIMEOUT
+from Service.tracing import instrument, propagate
+from Service.metrics import PROVIDER_CIRCUIT, PROVIDER_HEDGES, PROVIDER_SHORT_CIRCUITS
+
+FAILURE_THRESHOLD = 5  # Consecutive failed lookups that open the circuit
+COOLDOWN = 15  # Seconds the circuit stays open after its first trip
+MAX_COOLDOWN = 300
+
+
+class QuoteUnavailable(ValueError):
+    """The provider answered but has no usable price for the symbol (unknown or delisted)"""
+
+
+class ProviderTimeout(ValueError):
+    """A lookup missed its deadline (the abandoned call finishes on its daemon thread)"""
+
+
+class CircuitOpenError(ValueError):
+    """The circuit is open and there is no last known price to serve"""
+
+
+class StalePrice(float):
+    """Last known price served while the provider is unavailable; as_of is when it was fetched"""
+    __slots__ = ("as_of",)
+    stale = True
+
+    def __new__(cls, price, as_of):
+        value = super().__new__(cls, price)
+        value.as_of = as_of
+        return value
+
+
+def is_stale(price):
+    return isinstance(price, StalePrice)
+
+
+class CircuitBreaker:
+    """Opens after threshold consecutive failures for a cooldown that doubles on every trip.
+
+    Once the cooldown has passed, a single trial call is let through (half
+    open): success closes the circuit, failure opens it again for longer.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN, max_cooldown=MAX_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.trips = 0
+        self.open_until = None  # monotonic time; None while closed
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.open_until is None:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half-open"
+
+    def retry_in(self):
+        """Seconds until the next trial call is allowed (0 when closed)"""
+        return max(self.open_until - time.monotonic(), 0) if self.open_until is not None else 0
+
+    def allow(self):
+        """True if a call may go to the provider now"""
+        with self._lock:
+            if self.open_until is None:
+                return True
+            if time.monotonic() < self.open_until or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.open_until is not None:
+                PROVIDER_CIRCUIT.set(0)
+            self.failures, self.trips, self.open_until, self._probing = 0, 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self.trips += 1
+                self.open_until = time.monotonic() + min(self.cooldown * 2 ** (self.trips - 1), self.max_cooldown)
+                self._probing = False
+                PROVIDER_CIRCUIT.set(1)
+
+
+@instrument("provider")
+class ResilientQuoteProvider:
+    """Wraps a quote provider with per-call deadlines, a circuit breaker, optional hedging and stale fallbacks"""
+
+    def __init__(self, provider, timeout=QUOTE_TIMEOUT, hedge_after=QUOTE_HEDGE_AFTER, breaker=None):
+        self.provider = provider
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.market_hours = getattr(provider, "market_hours", True)
+        self._last = {}  # symbol -> (price, epoch seconds it was fetched)
+
+    def get_price(self, symbol):
+        if not self.breaker.allow():
+            return self._last_known(symbol)
+        hedge = getattr(self.provider, "get_price_hedge", None) if self.hedge_after is not None else None
+        price = self._call(symbol, self.provider.get_price, hedge)
+        self._last[symbol.upper()] = (price, time.time())
+        return price
+
+    def get_info(self, symbol):
+        if not self.breaker.allow():
+            PROVIDER_SHORT_CIRCUITS.labels("error").inc()
+            raise CircuitOpenError(f"Quote provider unavailable, retrying in {self.breaker.retry_in():.0f}s")
+        return self._call(symbol, self.provider.get_info)
+
+    def get_history(self, symbol, start, end=None):
+        if not self.breaker.allow():
+            PROVIDER_SHORT_CIRCUITS.labels("error").inc()
+            raise CircuitOpenError(f"Quote provider unavailable, retrying in {self.breaker.retry_in():.0f}s")
+        return self._call(symbol, lambda s: self.provider.get_history(s, start, end))
+
+    async def get_price_async(self, symbol):
+        """get_price for event loops, on the loop's default executor so deadlines and hedging apply"""
+        import asyncio  # Imported here: the CLIs never run an event loop
+        return await asyncio.get_running_loop().run_in_executor(None, propagate(self.get_price), symbol)
+
+    def _last_known(self, symbol):
+        last = self._last.get(symbol.upper())
+        if last is None:
+            PROVIDER_SHORT_CIRCUITS.labels("error").inc()
+            raise CircuitOpenError(f"Could not fetch price for {symbol}: quote provider unavailable, "
+                                   f"retrying in {self.breaker.retry_in():.0f}s")
+        PROVIDER_SHORT_CIRCUITS.labels("stale").inc()
+        return StalePrice(*last)
+
+    def _call(self, symbol, primary, hedge=None):
+        """primary(symbol) within the deadline, feeding the breaker with the outcome"""
+        try:
+            result = self._race(symbol, primary, hedge)
+        except QuoteUnavailable:
+            self.breaker.record_success()  # The provider answered; it just has no such symbol
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _race(self, symbol, primary, hedge=None):
+        """First successful answer before the deadline.
+
+        Calls run on daemon threads so an abandoned call never blocks exit.
+        hedge starts once hedge_after seconds pass, or straight away if
+        primary fails sooner.
+        """
+        results = queue.SimpleQueue()
+
+        def start(name, fn):
+            def run():
+                try:
+                    results.put((name, True, fn(symbol)))
+                except Exception as e:
+                    results.put((name, False, e))
+            threading.Thread(target=propagate(run), name=f"quote-{name}", daemon=True).start()
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        hedge_at = started + self.hedge_after if hedge else None
+        start("primary", primary)
+        running, hedged, error = 1, False, None
+        while True:
+            now = time.monotonic()
+            if hedge_at is not None and now >= hedge_at:
+                start("hedge", hedge)
+                running, hedged, hedge_at = running + 1, True, None
+            wake = deadline if hedge_at is None else min(deadline, hedge_at)
+            try:
+                name, ok, value = results.get(timeout=max(wake - now, 0))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    raise ProviderTimeout(f"Quote provider gave no answer for {symbol} within {self.timeout:g}s")
+                continue
+            running -= 1
+            if ok:
+                if hedged:
+                    PROVIDER_HEDGES.labels(name).inc()
+                return value
+            if isinstance(value, QuoteUnavailable):
+                raise value  # The fallback cannot know the symbol either
+            error = error or value
+            if hedge_at is not None:
+                hedge_at = now  # Primary failed early: fall back without waiting
+            elif running == 0:
+                raise error
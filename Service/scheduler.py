@@ -0,0 +1,177 @@
+"""Background price refresh for every symbol held by any user.
+
+One scheduler process keeps the stored prices current so page loads and
+summaries read fresh rows instead of refreshing synchronously:
+
+    python -m Client.batch_cli scheduler
+    python -m Client.batch_cli --metrics-port 9108 scheduler --interval 30
+
+Each cycle fetches the distinct symbol set in batches and writes one update
+per symbol whose price moved, covering every portfolio that holds it. Cycles
+run every ``SCHEDULER_INTERVAL`` seconds (with jitter). Symbols whose
+exchange has closed are fetched once more for the closing price and then
+skipped until it reopens (Service/market_calendar.py); when every symbol is
+settled the scheduler sleeps until the first reopen. Failing symbols and
+failing cycles back off exponentially. A lease row in ``scheduler_leases`` lets only one
+instance refresh at a time; the others stand by and take over when the
+lease expires.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import socket
+import threading
+import time
+import uuid
+
+from config import SCHEDULER_BATCH_SIZE, SCHEDULER_INTERVAL
+from DAO.lease_dao import LeaseDAO
+from Service.stock_service import StockService
+from Service.resilience import is_stale
+from Service.tracing import instrument
+from Service.metrics import REFRESH_DURATION, SCHEDULER_CYCLES
+
+LEASE_NAME = "price-refresh"
+IDLE_CHECK = 900  # Longest sleep while closed or backing off, in seconds
+UNIVERSE_TTL = 300  # Seconds between rescans of the held symbols
+SYMBOL_PAGE = 1000
+
+
+def jittered(delay, jitter):
+    """delay spread uniformly by ±jitter (0.1 = ±10%) so instances do not wake in step"""
+    return delay * random.uniform(1 - jitter, 1 + jitter) if jitter else delay
+
+
+@instrument("service")
+class PriceScheduler:
+    """Refreshes the global symbol set on a market-hours cadence while it holds the lease"""
+
+    def __init__(self, stock_service=None, lease_dao=None, interval=SCHEDULER_INTERVAL,
+                 batch_size=SCHEDULER_BATCH_SIZE, jitter=0.1, max_backoff=IDLE_CHECK,
+                 lease_ttl=None, always_open=False):
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be positive")
+        self.stock_service = stock_service or StockService()
+        self.stock_dao = self.stock_service.stock_dao
+        self.quote_cache = self.stock_service.quote_cache
+        self.lease_dao = lease_dao or LeaseDAO()
+        self.interval = interval
+        self.batch_size = batch_size
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.lease_ttl = lease_ttl or max(3 * interval, 60)  # Outlives a cycle, so a live holder keeps it
+        self.always_open = always_open
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.failures = 0  # Consecutive failed cycles
+        self._symbols, self._symbols_at = [], None
+        self._symbol_backoff = {}  # symbol -> (consecutive failures, monotonic time of next attempt)
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Ask run() to return after the current cycle (safe from signal handlers and other threads)"""
+        self._stop.set()
+
+    def symbols(self):
+        """Distinct symbols across every portfolio, rescanned every UNIVERSE_TTL seconds"""
+        now = time.monotonic()
+        if self._symbols_at is None or now - self._symbols_at >= UNIVERSE_TTL:
+            self._symbols, self._symbols_at = self.stock_service.held_symbols(SYMBOL_PAGE), now
+        return self._symbols
+
+    def _unsettled(self, symbols):
+        """Symbols whose price can still move: always all of them when ignoring market hours"""
+        if self.always_open:
+            return symbols
+        return [s for s in symbols if self.quote_cache.settled(s) is None]
+
+    def _due(self, symbols, now):
+        return [s for s in self._unsettled(symbols) if self._symbol_backoff.get(s, (0, 0))[1] <= now]
+
+    def _record(self, symbol, ok, now):
+        if ok:
+            self._symbol_backoff.pop(symbol, None)
+            return
+        failures = self._symbol_backoff.get(symbol, (0, 0))[0] + 1
+        delay = min(self.interval * 2 ** failures, self.max_backoff)
+        self._symbol_backoff[symbol] = (failures, now + jittered(delay, self.jitter))
+
+    def run_once(self):
+        """One refresh cycle over every due symbol; returns counts for the cycle.
+
+        The lease is renewed before each batch, and the cycle stops early if
+        another instance took it over.
+        """
+        with REFRESH_DURATION.labels("scheduler").time():
+            symbols = self.symbols()
+            due = self._due(symbols, time.monotonic())
+            settled = len(symbols) - len(self._unsettled(symbols))
+            stats = {'symbols': len(symbols), 'fetched': 0, 'failed': 0, 'written': 0, 'rows_updated': 0,
+                     'settled': settled, 'backing_off': len(symbols) - settled - len(due), 'lost_lease': False}
+            for start in range(0, len(due), self.batch_size):
+                if not self.lease_dao.acquire(LEASE_NAME, self.holder, self.lease_ttl):
+                    stats['lost_lease'] = True
+                    break
+                batch = due[start:start + self.batch_size]
+                prices = {symbol: price for symbol, price in self.stock_service.fetch_live_prices(batch).items()
+                          if not is_stale(price)}  # Stale prices are last known values, not fresh quotes
+                now = time.monotonic()
+                for symbol in batch:
+                    self._record(symbol, symbol in prices, now)
+                stats['fetched'] += len(prices)
+                stats['failed'] += len(batch) - len(prices)
+                for symbol, price in prices.items():
+                    # Writes only rows whose price differs, so holdings added since the last cycle are caught too
+                    rows = self.stock_dao.update_price_for_symbol(symbol, price)
+                    if rows:
+                        stats['written'] += 1
+                        stats['rows_updated'] += rows
+            return stats
+
+    def next_delay(self):
+        """Seconds to sleep: backoff after failures, the cadence while prices can move, else until a market reopens"""
+        if self.failures:
+            return min(self.interval * 2 ** self.failures, self.max_backoff)
+        if self._unsettled(self._symbols):
+            return self.interval
+        reopens = [quote.settled_until for quote in map(self.quote_cache.settled, self._symbols) if quote]
+        until = min(reopens) - time.time() if reopens else IDLE_CHECK
+        return min(max(until, 0), IDLE_CHECK)
+
+    def run(self, iterations=None, on_cycle=None):
+        """Wake up until stop() (or for iterations wake-ups), refreshing while prices can move.
+
+        on_cycle gets a dict per wake-up: status ('refreshed', 'failed',
+        'standby' or 'closed'), delay before the next one, and the cycle
+        counts or error.
+        """
+        wakeups = 0
+        try:
+            while not self._stop.is_set() and (iterations is None or wakeups < iterations):
+                event = {}
+                try:
+                    if not self._unsettled(self.symbols()):
+                        event['status'] = 'closed'
+                    elif not self.lease_dao.acquire(LEASE_NAME, self.holder, self.lease_ttl):
+                        event['status'] = 'standby'
+                    else:
+                        event.update(self.run_once(), status='refreshed')
+                    self.failures = 0
+                except Exception as e:  # Keep the daemon alive through outages
+                    self.failures += 1
+                    event.update(status='failed', error=str(e))
+                SCHEDULER_CYCLES.labels(event['status']).inc()
+                wakeups += 1
+                event['delay'] = jittered(self.next_delay(), self.jitter)
+                if on_cycle:
+                    on_cycle(event)
+                if iterations is None or wakeups < iterations:
+                    self._stop.wait(event['delay'])
+        finally:
+            try:
+                self.lease_dao.release(LEASE_NAME, self.holder)
+            except Exception:
+                pass  # An unreleased lease simply expires after lease_ttl
@@ -0,0 +1,281 @@
+"""Stock screener over a locally cached fundamentals table.
+
+``refresh_fundamentals`` fetches company info for every listed and held
+symbol in bulk. It works concurrently, skips rows younger than
+``FUNDAMENTALS_MAX_AGE`` and upserts the results into the ``fundamentals``
+table. Run it once, or keep it current in the background:
+
+    python -m Client.batch_cli fundamentals --every 3600
+
+Screens never touch the network. The table is read once per ``FRAME_TTL``
+into a columnar pandas frame shared by the whole process. An expression
+such as
+
+    sector ~ tech and price < 50 and market_cap > 10B
+
+then becomes one numpy boolean mask per condition, so a screen over tens of
+thousands of symbols takes milliseconds.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+import operator
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from config import FUNDAMENTALS_MAX_AGE
+from DAO.fundamentals_dao import FundamentalsDAO
+from DAO.models import parse_timestamp
+from Service.stock_service import MAX_FETCH_WORKERS, StockService
+from Service.shared_store import shared_store
+from Service.quote_provider import get_quote_provider
+from Service import symbol_universe
+from Service.tracing import instrument, propagate
+from Service.metrics import provider_call
+
+FRAME_TTL = 300  # Seconds the shared frame is reused before the table is read again
+PAGE_SIZE = 1000
+UPSERT_BATCH = 200
+
+# Screenable columns: "text" matches case-insensitively, "num" compares numbers
+COLUMNS = {
+    "symbol": "text", "name": "text", "exchange": "text", "sector": "text", "industry": "text",
+    "price": "num", "market_cap": "num", "pe_ratio": "num", "forward_pe": "num", "dividend_yield": "num",
+    "beta": "num", "volume": "num", "high_52w": "num", "low_52w": "num",
+}
+ALIASES = {"ticker": "symbol", "cap": "market_cap", "mcap": "market_cap", "pe": "pe_ratio", "yield": "dividend_yield"}
+# Provider info keys per column; the first one present wins
+INFO_KEYS = {
+    "name": ("longName", "shortName"), "sector": ("sector",), "industry": ("industry",),
+    "price": ("currentPrice", "regularMarketPrice"), "market_cap": ("marketCap",), "pe_ratio": ("trailingPE",),
+    "forward_pe": ("forwardPE",), "dividend_yield": ("dividendYield",), "beta": ("beta",),
+    "volume": ("averageVolume", "volume"), "high_52w": ("fiftyTwoWeekHigh",), "low_52w": ("fiftyTwoWeekLow",),
+}
+NUMBER_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "=": operator.eq,
+              "!=": operator.ne}
+MULTIPLIERS = {"k": 1e3, "m": 1e6, "b": 1e9, "t": 1e12}
+
+_CONDITION = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|=|<|>|~)\s*(.+?)\s*$")
+# The "and" keyword joining conditions, or a quoted value skipped whole so "and" and "|" inside it stay literal
+_AND_OR_QUOTED = re.compile(r"""\s+and\s+|"[^"]*"|'[^']*'""", re.IGNORECASE)
+
+
+def parse_number(text):
+    """50, $2.5B, 10k, 1,200 -> float"""
+    cleaned = text.strip().lower().replace("$", "").replace(",", "").replace("_", "").rstrip("%")
+    multiplier = MULTIPLIERS.get(cleaned[-1:])
+    if multiplier:
+        cleaned = cleaned[:-1]
+    try:
+        return float(cleaned) * (multiplier or 1)
+    except ValueError:
+        raise ValueError(f"'{text.strip()}' is not a number (e.g. 50, 2.5B, $10k)") from None
+
+
+def split_conditions(expression):
+    """Conditions of expression, split on "and" outside quoted values.
+
+    A piece that is not itself a condition belongs to the previous value,
+    so "industry ~ oil and gas" reads as one condition.
+    """
+    bounds = [match.span() for match in _AND_OR_QUOTED.finditer(expression) if match.group()[0] not in "'\""]
+    bounds.append((len(expression), len(expression)))
+    parts, start, joiner = [], 0, ""
+    for end, next_start in bounds:
+        piece = expression[start:end]
+        if parts and not _CONDITION.match(piece):
+            parts[-1] += joiner + piece
+        else:
+            parts.append(piece)
+        joiner, start = expression[end:next_start], next_start
+    return parts
+
+
+def _text_values(raw):
+    """Lowercased alternatives of a text value: quoted values are literal, others split on |"""
+    raw = raw.strip()
+    if len(raw) > 1 and raw[0] in "'\"" and raw[-1] == raw[0]:
+        values = (raw[1:-1],)
+    else:
+        values = raw.split("|")
+    return tuple(v.strip().lower() for v in values if v.strip())
+
+
+def parse_screen(expression):
+    """[(column, op, value)] from conditions joined by "and".
+
+    Numbers compare with < <= > >= = !=. Text columns take = and != for
+    whole values and ~ for substrings, with alternatives separated by |
+    ("sector ~ tech|health"). Quote values containing "and" or |
+    (industry = "Oil & Gas E&P").
+    """
+    conditions = []
+    for part in split_conditions(expression.strip()):
+        if not part:
+            continue
+        match = _CONDITION.match(part)
+        if not match:
+            raise ValueError(f"Cannot read '{part}': write <column> <op> <value>, e.g. price < 50")
+        column, op, raw = match.groups()
+        column = ALIASES.get(column.lower(), column.lower())
+        kind = COLUMNS.get(column)
+        if kind is None:
+            raise ValueError(f"Unknown column '{column}'. Columns: {', '.join(COLUMNS)}")
+        if kind == "num":
+            if op == "~":
+                raise ValueError(f"{column} is a number: compare it with < <= > >= = !=")
+            conditions.append((column, op, parse_number(raw)))
+        else:
+            if op not in ("=", "!=", "~"):
+                raise ValueError(f"{column} is text: match it with =, != or ~")
+            conditions.append((column, op, _text_values(raw)))
+    return conditions
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None  # Yahoo reports some ratios as "Infinity"
+
+
+def fundamentals_row(symbol, info):
+    """fundamentals table row from a provider info dict, falling back to the symbol's listing"""
+    symbol = symbol.upper()
+    listing = symbol_universe.get_universe().get(symbol)
+    row = {"symbol": symbol, "exchange": listing.exchange if listing else info.get("exchange"),
+           "updated_at": datetime.now(timezone.utc).isoformat()}
+    for column, keys in INFO_KEYS.items():
+        value = next((info[key] for key in keys if info.get(key) is not None), None)
+        row[column] = _number(value) if COLUMNS[column] == "num" else value
+    if listing:
+        row["name"] = row["name"] or listing.name
+        row["sector"] = row["sector"] or listing.sector
+    return row
+
+
+class Fundamentals:
+    """Columnar snapshot of the fundamentals table: text columns are categoricals, numbers float64"""
+
+    def __init__(self, rows):
+        import pandas as pd  # Imported here: only screens need pandas
+        frame = pd.DataFrame.from_records(rows, columns=[*COLUMNS, "updated_at"])
+        for column, kind in COLUMNS.items():
+            frame[column] = (frame[column].astype("category") if kind == "text"
+                             else pd.to_numeric(frame[column], errors="coerce").astype("float64"))
+        frame["updated_at"] = pd.to_datetime(frame["updated_at"], utc=True, errors="coerce")
+        self.frame = frame
+        self.updated = frame["updated_at"].max() if len(frame) else None
+        # Lowercased categories per text column, matched once per screen instead of once per row
+        self._lowered = {column: [value.lower() for value in frame[column].cat.categories]
+                         for column, kind in COLUMNS.items() if kind == "text"}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def mask(self, conditions):
+        """Boolean array selecting the rows that meet every condition"""
+        import numpy as np  # Imported here: only screens need numpy
+        mask = np.ones(len(self.frame), dtype=bool)
+        for column, op, value in conditions:
+            series = self.frame[column]
+            if COLUMNS[column] == "num":
+                values = series.to_numpy()
+                hit = NUMBER_OPS[op](values, value)
+                if op == "!=":
+                    hit &= ~np.isnan(values)  # Unknown values match no condition
+            else:
+                if op == "~":
+                    wanted = [i for i, text in enumerate(self._lowered[column]) if any(v in text for v in value)]
+                else:
+                    wanted = [i for i, text in enumerate(self._lowered[column]) if text in value]
+                codes = series.cat.codes.to_numpy()
+                hit = np.isin(codes, wanted)
+                if op == "!=":
+                    hit = ~hit & (codes >= 0)
+            mask &= hit
+        return mask
+
+
+@instrument("service")
+class ScreenerService:
+    def __init__(self, stock_service=None, fundamentals_dao=None):
+        self.stock_service = stock_service or StockService()
+        self.fundamentals_dao = fundamentals_dao or FundamentalsDAO()
+
+    def fundamentals(self):
+        """The shared columnar snapshot, reread from the table every FRAME_TTL seconds"""
+        return shared_store.get_or_load(("screener", "fundamentals"), self._load_fundamentals, FRAME_TTL)
+
+    def _load_fundamentals(self):
+        return Fundamentals(self._read_table())
+
+    def _read_table(self, columns="*"):
+        rows, offset = [], 0
+        while True:
+            page, total = self.fundamentals_dao.get_page(offset, PAGE_SIZE, columns)
+            rows.extend(page)
+            offset += PAGE_SIZE
+            if not page or offset >= (total or 0):
+                return rows
+
+    def screen(self, expression, sort_by="market_cap", descending=True, limit=100):
+        """Rows matching expression, sorted and cut to limit; returns (frame, total_matches)"""
+        conditions = parse_screen(expression)
+        sort_by = ALIASES.get(sort_by, sort_by)
+        if sort_by not in COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'. Columns: {', '.join(COLUMNS)}")
+        data = self.fundamentals()
+        matches = data.frame[data.mask(conditions)]
+        rows = matches.sort_values(sort_by, ascending=not descending, na_position="last", kind="stable")
+        return (rows.head(limit) if limit else rows).reset_index(drop=True), len(matches)
+
+    def universe(self):
+        """Symbols to keep fundamentals for: every listed symbol and every held one"""
+        listed = (listing.symbol for listing in symbol_universe.get_universe().listings)
+        return sorted(set(listed).union(self.stock_service.held_symbols()))
+
+    def refresh_fundamentals(self, symbols=None, max_age=FUNDAMENTALS_MAX_AGE, on_progress=None,
+                             max_workers=MAX_FETCH_WORKERS):
+        """Fetch info for symbols whose row is missing or older than max_age seconds and upsert it in batches.
+
+        symbols defaults to universe(). on_progress gets {'done', 'total',
+        'symbol', 'error'} per fetched symbol. Returns counts of symbols
+        considered, fresh (skipped), fetched, failed and written.
+        """
+        symbols = sorted({s.upper() for s in symbols}) if symbols else self.universe()
+        cutoff = time.time() - max_age
+        updated = {row["symbol"]: parse_timestamp(row["updated_at"]) for row in self._read_table("symbol,updated_at")}
+        due = [s for s in symbols if not updated.get(s) or updated[s].timestamp() < cutoff]
+        stats = {'symbols': len(symbols), 'fresh': len(symbols) - len(due), 'fetched': 0, 'failed': 0, 'written': 0}
+        provider = get_quote_provider()
+
+        def fetch(symbol):
+            with provider_call("get_info"):
+                return fundamentals_row(symbol, provider.get_info(symbol))
+
+        batch = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(due)))) as pool:
+            futures = {pool.submit(propagate(fetch), symbol): symbol for symbol in due}
+            for done, future in enumerate(as_completed(futures), 1):
+                error = None
+                try:
+                    batch.append(future.result())
+                    stats['fetched'] += 1
+                except Exception as e:
+                    error = str(e)
+                    stats['failed'] += 1
+                if len(batch) >= UPSERT_BATCH:
+                    stats['written'] += self.fundamentals_dao.upsert_many(batch)
+                    batch = []
+                if on_progress:
+                    on_progress({'done': done, 'total': len(due), 'symbol': futures[future], 'error': error})
+        stats['written'] += self.fundamentals_dao.upsert_many(batch)
+        if stats['written']:
+            shared_store.invalidate(("screener", "fundamentals"))
+        return stats
@@ -0,0 +1,195 @@
+import sys
+import threading
+import time
+from Service.tracing import instrument
+from Service.metrics import CACHE_REQUESTS
+
+SWEEP_INTERVAL = 60  # Seconds between sweeps of expired entries (run from put)
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate memory footprint of obj including everything it references"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    memory_usage = getattr(obj, "memory_usage", None)
+    if callable(memory_usage) and hasattr(obj, "columns"):
+        return int(memory_usage(deep=True).sum())  # pandas DataFrame
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+@instrument("cache")
+class SharedStore:
+    """Process-wide TTL store shared by every session.
+
+    Keys are tuples whose first element is the key class, e.g.
+    ("metadata", "AAPL") or ("summary", user_id). Loads for the same key are
+    coalesced: concurrent callers wait on a per-key lock and reuse the single
+    upstream result (singleflight). Every invalidation bumps ``generation``;
+    a load that started before one is returned but not stored, so it cannot
+    cache data older than the write that caused the invalidation. Expired
+    entries are swept every ``SWEEP_INTERVAL`` seconds, and ``limit`` caps
+    the keys of classes whose keys come from outside (such as API URLs).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._key_locks = {}
+        self._stats = {}
+        self._sources = {}
+        self._limits = {}  # key class -> max keys
+        self._ordered = {}  # limited key class -> its keys, oldest stored first
+        self._next_sweep = time.time() + SWEEP_INTERVAL
+        self.generation = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _count(self, key, stat):
+        with self._lock:
+            stats = self._stats.setdefault(key[0], {"hits": 0, "misses": 0, "loads": 0, "coalesced": 0})
+            stats[stat] += 1
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.time():
+            return entry
+        return None
+
+    def get(self, key, default=None):
+        entry = self._fresh(key)
+        return entry[0] if entry else default
+
+    def put(self, key, value, ttl, since=None):
+        """Store value for ttl seconds; skipped if anything was invalidated after generation since"""
+        now = time.time()
+        with self._lock:
+            if since is None or since == self.generation:
+                self._entries[key] = (value, now + ttl)
+                order = self._ordered.get(key[0])
+                if order is not None:
+                    order.pop(key, None)
+                    order[key] = None
+                    while len(order) > self._limits[key[0]]:
+                        self._drop(next(iter(order)))
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+    def limit(self, key_class, max_keys):
+        """Keep at most max_keys entries of key_class, evicting the oldest stored first"""
+        with self._lock:
+            self._limits[key_class] = max_keys
+            self._ordered.setdefault(key_class, dict.fromkeys(k for k in self._entries if k[0] == key_class))
+
+    def _drop(self, key):
+        """Remove key's entry (caller holds _lock)"""
+        self._entries.pop(key, None)
+        order = self._ordered.get(key[0])
+        if order is not None:
+            order.pop(key, None)
+
+    def _sweep(self, now):
+        """Drop expired entries and idle key locks (caller holds _lock)"""
+        for key in [k for k, (_, expires) in self._entries.items() if expires <= now]:
+            self._drop(key)
+        # A lock nobody holds is recreated on next use; at worst two loads of one key then overlap once
+        for key in [k for k, lock in self._key_locks.items() if k not in self._entries and not lock.locked()]:
+            del self._key_locks[key]
+        self._next_sweep = now + SWEEP_INTERVAL
+
+    def get_or_load(self, key, loader, ttl):
+        """Return the cached value for key, calling loader at most once per expiry"""
+        entry = self._fresh(key)
+        if entry:
+            self._count(key, "hits")
+            CACHE_REQUESTS.labels(key[0], "hit").inc()
+            return entry[0]
+
+        with self._key_lock(key):
+            # Another session may have loaded it while we waited for the lock
+            entry = self._fresh(key)
+            if entry:
+                self._count(key, "coalesced")
+                CACHE_REQUESTS.labels(key[0], "hit").inc()
+                return entry[0]
+            self._count(key, "misses")
+            CACHE_REQUESTS.labels(key[0], "miss").inc()
+            generation = self.generation
+            value = loader()
+            self._count(key, "loads")
+            self.put(key, value, ttl, since=generation)
+            return value
+
+    def singleflight(self, key, fn, is_done=None):
+        """Run fn once for concurrent callers of key without caching the result.
+
+        Callers that waited on the key lock skip fn when is_done() reports the
+        first caller already produced what they need.
+        """
+        lock = self._key_lock(key)
+        if not lock.acquire(blocking=False):
+            with lock:
+                if is_done is not None and is_done():
+                    self._count(key, "coalesced")
+                    return None
+                self._count(key, "loads")
+                return fn()
+        try:
+            self._count(key, "loads")
+            return fn()
+        finally:
+            lock.release()
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            self._drop(key)
+
+    def invalidate_class(self, key_class):
+        self.invalidate_matching(key_class, lambda key: True)
+
+    def invalidate_matching(self, key_class, predicate):
+        """Drop the entries of key_class whose key tuple satisfies predicate"""
+        with self._lock:
+            self.generation += 1
+            for key in [k for k in self._entries if k[0] == key_class and predicate(k)]:
+                self._drop(key)
+
+    def register_source(self, key_class, sizer):
+        """Include an external cache (e.g. the quote cache) in memory reports"""
+        self._sources[key_class] = sizer
+
+    def memory_report(self):
+        """Entries, bytes and hit statistics per key class"""
+        report = {}
+        for key, (value, _) in list(self._entries.items()):
+            row = report.setdefault(key[0], {"keys": 0, "bytes": 0})
+            row["keys"] += 1
+            row["bytes"] += deep_sizeof(value)
+        for key_class, sizer in self._sources.items():
+            keys, size = sizer()
+            row = report.setdefault(key_class, {"keys": 0, "bytes": 0})
+            row["keys"] += keys
+            row["bytes"] += size
+        for key_class, stats in self._stats.items():
+            report.setdefault(key_class, {"keys": 0, "bytes": 0}).update(stats)
+        return report
+
+
+# One store per process, shared by every Streamlit session and CLI command
+shared_store = SharedStore()
@@ -2,39 +2,173 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from DAO.stock_dao import StockDAO
-import yfinance as yf
+from DAO.stock_dao import AsyncStockDAO, StockDAO
+from DAO.money import to_amount
+from Service.quote_cache import quote_cache
+from Service.shared_store import shared_store
+from Service.quote_provider import get_quote_provider
+from Service import market_calendar
+from Service import symbol_universe
+from Service.resilience import is_stale
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from Service.tracing import instrument, propagate
+from Service.metrics import CACHE_REQUESTS, REFRESH_DURATION, provider_call
 
+# Concurrent quote fetches per refresh job
+MAX_FETCH_WORKERS = 8
+# Company metadata barely changes intraday
+METADATA_TTL = 3600
+
+@instrument("service")
 class StockService:
     def __init__(self):
         self.stock_dao = StockDAO()
+        self.async_stock_dao = AsyncStockDAO()
+        self.quote_cache = quote_cache
+        self._pending_quotes = {}  # symbol -> in-flight async fetch
     
     def get_live_price(self, symbol):
-        """Fetch live stock price from Yahoo Finance with enhanced error handling"""
+        """Fetch live stock price from the configured quote provider.
+        
+        A price cached while the symbol's exchange was closed is returned
+        without a fetch until the next session opens.
+        """
+        settled = self.quote_cache.settled(symbol)
+        if settled is not None:
+            CACHE_REQUESTS.labels("quote", "hit").inc()
+            return settled.price
+        with provider_call("get_price"):
+            return get_quote_provider().get_price(symbol)
+    
+    def cache_price(self, symbol, price):
+        """Store a fetched price, marked settled until the next open if its market is closed.
+        
+        Stale prices (served while the provider's circuit is open) are not
+        stored, so the cached entry keeps its real age.
+        """
+        if is_stale(price):
+            return False
+        settled_until = None
+        if getattr(get_quote_provider(), "market_hours", True):
+            reopens = market_calendar.settled_until(symbol)
+            settled_until = reopens.timestamp() if reopens else None
+        return self.quote_cache.put(symbol, price, settled_until)
+    
+    def get_quotes(self, symbols):
+        """Get prices for symbols, only hitting the network for expired cache entries"""
+        symbols = sorted({s.upper() for s in symbols})
+        stale = self.quote_cache.stale_symbols(symbols)
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(stale))) as pool:
+                list(pool.map(propagate(self._refresh_quote), stale))
+        
+        quotes = {}
+        for symbol in symbols:
+            quote = self.quote_cache.peek(symbol)
+            if quote is not None:
+                quotes[symbol] = quote.price
+        return quotes
+    
+    async def get_quotes_async(self, symbols):
+        """get_quotes for event loops: stale symbols are awaited together on the async provider"""
+        import asyncio  # Imported here: the CLIs never run an event loop
+        symbols = sorted({s.upper() for s in symbols})
+        stale = self.quote_cache.stale_symbols(symbols)
+        if stale:
+            await asyncio.gather(*(self._refresh_quote_async(symbol) for symbol in stale))
+        
+        quotes = {}
+        for symbol in symbols:
+            quote = self.quote_cache.peek(symbol)
+            if quote is not None:
+                quotes[symbol] = quote.price
+        return quotes
+    
+    async def _refresh_quote_async(self, symbol):
+        # Concurrent requests for the same stale symbol await one fetch
+        import asyncio
+        pending = self._pending_quotes.get(symbol)
+        if pending is None:
+            pending = self._pending_quotes[symbol] = asyncio.ensure_future(self._fetch_into_cache_async(symbol))
+            pending.add_done_callback(lambda _: self._pending_quotes.pop(symbol, None))
+        await asyncio.shield(pending)
+    
+    async def _fetch_into_cache_async(self, symbol):
+        import asyncio
+        provider = get_quote_provider()
+        fetch = getattr(provider, "get_price_async", None)
         try:
-            stock = yf.Ticker(symbol)
-            info = stock.info
-            
-            # Try multiple price fields with fallbacks
-            current_price = (info.get('currentPrice') or 
-                           info.get('regularMarketPrice') or
-                           info.get('previousClose') or
-                           info.get('open'))
-            
-            if not current_price:
-                # Fallback to historical data
-                hist = stock.history(period="1d")
-                current_price = hist['Close'].iloc[-1] if not hist.empty else 0
-            
-            price_float = float(current_price)
-            if price_float <= 0:
-                raise ValueError(f"Invalid price for {symbol}")
-                
-            return price_float
-            
-        except Exception as e:
-            raise ValueError(f"Could not fetch price for {symbol}: {str(e)}")
+            with provider_call("get_price"):
+                if fetch is not None:
+                    price = await fetch(symbol)
+                else:
+                    price = await asyncio.get_running_loop().run_in_executor(None, propagate(provider.get_price), symbol)
+            self.cache_price(symbol, price)
+        except ValueError:
+            pass  # Keep the last known price (if any) for this symbol
+    
+    def _refresh_quote(self, symbol):
+        # Concurrent sessions asking for the same stale symbol share one fetch
+        shared_store.singleflight(
+            ("quote", symbol),
+            lambda: self._fetch_into_cache(symbol),
+            is_done=lambda: self.quote_cache.get(symbol) is not None
+        )
+    
+    def _fetch_into_cache(self, symbol):
+        try:
+            self.cache_price(symbol, self.get_live_price(symbol))
+        except ValueError:
+            pass  # Keep the last known price (if any) for this symbol
+    
+    def get_cached_stock_info(self, symbol, ttl=METADATA_TTL):
+        """Company metadata, fetched once per symbol per ttl for the whole process"""
+        symbol = symbol.upper()
+        return shared_store.get_or_load(("metadata", symbol), lambda: self.search_stock_info(symbol), ttl)
+    
+    def get_market_snapshot(self, symbols):
+        """Watchlist rows from cached metadata and cached live prices, fetched concurrently"""
+        symbols = [s.upper() for s in symbols]
+        quotes = self.get_quotes(symbols)
+        
+        def info_or_error(symbol):
+            try:
+                return self.get_cached_stock_info(symbol), None
+            except ValueError as e:
+                return None, str(e)
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(symbols) or 1)) as pool:
+            infos = dict(zip(symbols, pool.map(propagate(info_or_error), symbols)))
+        
+        rows = []
+        for symbol in symbols:
+            info, error = infos[symbol]
+            price = quotes.get(symbol) or (info['current_price'] if info else None)
+            previous_close = info['previous_close'] if info else 0
+            change = price - previous_close if price and previous_close else 0
+            rows.append({
+                'symbol': symbol,
+                'company_name': info['company_name'] if info else 'N/A',
+                'current_price': price,
+                'previous_close': previous_close,
+                'change': change,
+                'change_percent': (change / previous_close * 100) if previous_close else 0,
+                'error': error if price is None else None
+            })
+        return rows
+    
+    def sync_prices(self, stocks, quotes):
+        """Write quoted prices to stocks whose stored price moved; returns the updated stocks"""
+        updated = []
+        for stock in stocks:
+            price = quotes.get(stock.symbol)
+            if price is None or price == stock.price:
+                continue
+            self.stock_dao.update_stock(stock.stock_id, price=price)
+            stock.price = price  # total_value follows the new price
+            updated.append(stock)
+        return updated
     
     def add_stock(self, portfolio_id, symbol, quantity, price=None):
         """Add stock with optional live price fetching and quantity updates"""
@@ -52,10 +186,10 @@ class StockService:
         # Check for existing stock in portfolio
         existing_stocks = self.stock_dao.get_stock_by_portfolio(portfolio_id)
         for stock in existing_stocks:
-            if stock["symbol"] == symbol:
+            if stock.symbol == symbol:
                 # Update existing stock quantity and price
-                new_quantity = stock["quantity"] + quantity
-                return self.stock_dao.update_stock(stock["stock_id"], price=price, quantity=new_quantity)
+                new_quantity = stock.quantity + quantity
+                return self.stock_dao.update_stock(stock.stock_id, price=price, quantity=new_quantity)
         
         # Add new stock
         return self.stock_dao.add_stock(portfolio_id, symbol, price, quantity)
@@ -65,32 +199,81 @@ class StockService:
         return self.add_stock(portfolio_id, symbol, quantity, price=None)
     
     def get_stocks(self, portfolio_id):
-        """Get all stocks in portfolio with additional calculated fields"""
-        stocks = self.stock_dao.get_stock_by_portfolio(portfolio_id)
-        
-        # Add calculated fields for convenience
-        for stock in stocks:
-            stock['total_value'] = stock['price'] * stock['quantity']
-        
-        return stocks
+        """Get all stocks in portfolio (Holding.total_value is computed on access)"""
+        return self.stock_dao.get_stock_by_portfolio(portfolio_id)
+    
+    async def get_stocks_async(self, portfolio_id):
+        return await self.async_stock_dao.get_stock_by_portfolio(portfolio_id)
+    
+    def iter_stock_pages(self, portfolio_ids, page_size=1000, columns="*", **filters):
+        """Yield stocks across portfolios one page at a time using range queries"""
+        offset = 0
+        while True:
+            rows, total = self.stock_dao.get_stocks_page(portfolio_ids, offset, page_size, columns=columns, **filters)
+            if rows:
+                yield rows
+            offset += page_size
+            if not rows or offset >= (total or 0):
+                break
     
     def get_portfolio_value(self, portfolio_id):
         """Calculate total value of all stocks in portfolio"""
         stocks = self.get_stocks(portfolio_id)
-        return sum(stock['total_value'] for stock in stocks)
+        return to_amount(sum(stock.total_cents for stock in stocks))
     
-    def refresh_stock_prices(self, portfolio_id):
+    def refresh_stock_prices(self, portfolio_id, on_progress=None):
         """Refresh all stock prices in portfolio with live data"""
-        stocks = self.get_stocks(portfolio_id)
-        updated_count = 0
+        with REFRESH_DURATION.labels("portfolio").time():
+            stocks = self.get_stocks(portfolio_id)
+            return self.refresh_prices_for_stocks(stocks, on_progress)
+    
+    def fetch_live_prices(self, symbols, on_progress=None, max_workers=MAX_FETCH_WORKERS):
+        """Fetch each distinct symbol exactly once, concurrently.
+        
+        on_progress is called from the calling thread after every symbol with a
+        dict: symbol, price (None on failure), error, stale (last known price
+        served while the provider is unavailable), done, total.
+        """
+        symbols = sorted({s.upper() for s in symbols})
+        prices = {}
+        if not symbols:
+            return prices
         
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as pool:
+            fetch = propagate(self.get_live_price)
+            futures = {pool.submit(fetch, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                done += 1
+                try:
+                    price = future.result()
+                    prices[symbol] = price
+                    self.cache_price(symbol, price)
+                    error = None
+                except ValueError as e:
+                    price, error = None, str(e)
+                if on_progress:
+                    on_progress({'symbol': symbol, 'price': price, 'error': error, 'stale': is_stale(price),
+                                 'done': done, 'total': len(symbols)})
+        return prices
+    
+    def refresh_prices_for_stocks(self, stocks, on_progress=None):
+        """Refresh a batch of stock rows: one fetch per symbol, one write per moved symbol"""
+        by_symbol = {}
         for stock in stocks:
-            try:
-                live_price = self.get_live_price(stock['symbol'])
-                self.stock_dao.update_stock(stock['stock_id'], price=live_price)
-                updated_count += 1
-            except ValueError:
-                continue  # Skip if we can't get live price, keep existing price
+            by_symbol.setdefault(stock.symbol.upper(), []).append(stock)
+        
+        prices = self.fetch_live_prices(by_symbol.keys(), on_progress)
+        
+        updated_count = 0
+        for symbol, price in prices.items():
+            if is_stale(price):
+                continue  # Provider unavailable: the stored price stays as it is
+            rows = by_symbol[symbol]
+            moved_ids = [stock.stock_id for stock in rows if stock.price != price]
+            self.stock_dao.update_price_for_stocks(moved_ids, price)
+            updated_count += len(rows)  # Skipped symbols keep their existing price
         
         return updated_count
     
@@ -102,11 +285,11 @@ class StockService:
         
         stock = stock_data[0]
         try:
-            live_price = self.get_live_price(stock['symbol'])
+            live_price = self.get_live_price(stock.symbol)
             self.stock_dao.update_stock(stock_id, price=live_price)
             return live_price
         except ValueError as e:
-            raise ValueError(f"Could not refresh price for {stock['symbol']}: {str(e)}")
+            raise ValueError(f"Could not refresh price for {stock.symbol}: {str(e)}")
     
     def update_stock(self, stock_id, price=None, quantity=None):
         """Update stock with validation"""
@@ -131,21 +314,35 @@ class StockService:
             raise ValueError("Stock not found")
         
         stock = stock_data[0]
-        total_value = stock['price'] * stock['quantity']
+        total_value = stock.total_value
         
         return {
-            'symbol': stock['symbol'],
-            'quantity': stock['quantity'],
-            'current_price': stock['price'],
+            'symbol': stock.symbol,
+            'quantity': stock.quantity,
+            'current_price': stock.price,
             'total_value': total_value,
             'last_updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
     
+    def held_symbols(self, page_size=1000):
+        """Sorted distinct symbols across every user's portfolios, read page by page"""
+        found, offset = set(), 0
+        while True:
+            page, total = self.stock_dao.get_symbols_page(offset, page_size)
+            found.update(s.upper() for s in page if s)
+            offset += page_size
+            if not page or offset >= (total or 0):
+                return sorted(found)
+    
+    def search_symbols(self, query, limit=symbol_universe.SEARCH_LIMIT):
+        """Listed symbols matching a ticker prefix or company name, from the local universe (no network)"""
+        return [listing._asdict() for listing in symbol_universe.search(query, limit)]
+    
     def search_stock_info(self, symbol):
         """Get detailed information about a stock symbol"""
         try:
-            stock = yf.Ticker(symbol)
-            info = stock.info
+            with provider_call("get_info"):
+                info = get_quote_provider().get_info(symbol)
             
             return {
                 'symbol': symbol.upper(),
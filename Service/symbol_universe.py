@@ -0,0 +1,181 @@
+"""Local symbol universe with ticker autocomplete and fuzzy company-name search.
+
+Listings (ticker, company name, exchange, sector) are read on first search
+from the bundled ``Service/data/listings.csv``, or from the CSV named by
+``SYMBOL_LISTINGS`` (same columns) for a fuller universe. Tickers and the
+words of company names go into prefix tries, so a lookup walks one node per
+typed character. Names also go into a trigram index, so misspellings such
+as "nvidea" or "mircosoft" still find their company. Searching never touches
+the network; live data is fetched only for the symbol the user picks.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import NamedTuple
+
+from config import SYMBOL_LISTINGS
+
+LISTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "listings.csv")
+SEARCH_LIMIT = 10
+MIN_FUZZY_LENGTH = 3  # Shorter queries only match prefixes
+MIN_SIMILARITY = 0.5  # Share of the query's trigrams a fuzzy match must contain
+
+
+class Listing(NamedTuple):
+    symbol: str
+    name: str
+    exchange: str
+    sector: str
+
+
+def normalize(text):
+    """Lowercase ASCII words: accents and apostrophes folded, punctuation dropped ("L'Oréal S.A." -> "loreal s a")"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().replace("'", "")
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def trigrams(text):
+    """Trigrams of each word padded with two leading and one trailing space, so word starts weigh more"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _Node:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []  # Every listing below this node, in rank order
+
+
+class PrefixTrie:
+    """Listing ids by key prefix; each node keeps the ids below it, so a lookup is one walk"""
+
+    def __init__(self):
+        self.root = _Node()
+
+    def add(self, key, listing_id):
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            if not node.ids or node.ids[-1] != listing_id:  # Two words of one name can share a prefix
+                node.ids.append(listing_id)
+
+    def find(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+
+class SymbolUniverse:
+    """Searchable listings; earlier rows rank first among equally good matches"""
+
+    def __init__(self, listings):
+        self.listings = []
+        self._by_symbol = {}
+        self._symbols = PrefixTrie()
+        self._words = PrefixTrie()
+        self._trigrams = {}  # trigram -> ids of names containing it
+        self._name_grams = []  # id -> trigram count of the name
+        for listing in listings:
+            if listing.symbol in self._by_symbol:
+                continue
+            listing_id = len(self.listings)
+            self.listings.append(listing)
+            self._by_symbol[listing.symbol] = listing_id
+            self._symbols.add(listing.symbol, listing_id)
+            name = normalize(listing.name)
+            for word in name.split():
+                self._words.add(word, listing_id)
+            grams = trigrams(name)
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(listing_id)
+            self._name_grams.append(len(grams))
+
+    def __len__(self):
+        return len(self.listings)
+
+    def get(self, symbol):
+        listing_id = self._by_symbol.get(symbol.upper())
+        return None if listing_id is None else self.listings[listing_id]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Up to limit listings: exact ticker, then ticker prefixes, then name-word prefixes.
+
+        Fuzzy name matches are the fallback when nothing matches a prefix.
+        """
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+        found = []
+        seen = set()
+
+        def take(ids):
+            for listing_id in ids:
+                if len(found) >= limit:
+                    return
+                if listing_id not in seen:
+                    seen.add(listing_id)
+                    found.append(listing_id)
+
+        ticker = query.upper()
+        if ticker in self._by_symbol:
+            take([self._by_symbol[ticker]])
+        take(self._symbols.find(ticker))
+        text = normalize(query)
+        if text and len(found) < limit:
+            take(self._name_matches(text.split()))
+        if not found and " " in text:
+            take(self._words.find(text.replace(" ", "")))  # "jp morgan" -> JPMorgan
+        if not found and len(text.replace(" ", "")) >= MIN_FUZZY_LENGTH:
+            take(self._fuzzy_matches(text))
+        return [self.listings[listing_id] for listing_id in found]
+
+    def _name_matches(self, words):
+        """Ids whose name has a word starting with each query word, in rank order"""
+        candidates = [self._words.find(word) for word in words]
+        first = min(candidates, key=len)
+        others = [set(ids) for ids in candidates if ids is not first]
+        return [listing_id for listing_id in first if all(listing_id in ids for ids in others)]
+
+    def _fuzzy_matches(self, text):
+        """Ids sharing at least MIN_SIMILARITY of the query's trigrams, best first"""
+        grams = trigrams(text)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+        needed = MIN_SIMILARITY * len(grams)
+        scored = [(count / len(grams), 2 * count / (len(grams) + self._name_grams[listing_id]), -listing_id)
+                  for listing_id, count in shared.items() if count >= needed]
+        return [-negative_id for *_, negative_id in sorted(scored, reverse=True)]
+
+
+def load_listings(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [Listing(row["symbol"].strip().upper(), row["name"].strip(), (row.get("exchange") or "").strip(),
+                        (row.get("sector") or "").strip()) for row in csv.DictReader(f) if row.get("symbol")]
+
+
+@lru_cache(maxsize=None)
+def get_universe():
+    """The process-wide universe, loaded and indexed on first use"""
+    return SymbolUniverse(load_listings(SYMBOL_LISTINGS or LISTINGS_FILE))
+
+
+def search(query, limit=SEARCH_LIMIT):
+    return get_universe().search(query, limit)
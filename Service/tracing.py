@@ -0,0 +1,238 @@
+"""Lightweight tracing and profiling across the DAO, provider, Service and UI layers.
+
+Nothing is recorded unless a trace is active, so instrumented code costs one
+context-variable lookup per call. Inside ``trace()`` every instrumented call
+becomes a span in a call tree. Repeated calls to the same function under the
+same parent merge into one node with a call count, so a page issuing 500
+queries shows a single ``StockDAO.get_stock_by_id x500`` line.
+
+    with trace("summary") as t:
+        portfolio_service.get_portfolio_summary(user_id)
+    print(t.format())
+"""
+import contextvars
+import functools
+import importlib.util
+import inspect
+import io
+import threading
+import time
+from contextlib import contextmanager
+
+# Order in which layers are reported; "untraced" is time outside any span
+LAYERS = ("ui", "service", "cache", "provider", "dao")
+
+_current = contextvars.ContextVar("tracing_span", default=None)
+
+
+class Span:
+    """One call-tree node: every call of name under the same parent"""
+    __slots__ = ("name", "layer", "calls", "total", "errors", "children", "lock")
+
+    def __init__(self, name, layer, lock):
+        self.name = name
+        self.layer = layer
+        self.calls = 0
+        self.total = 0.0
+        self.errors = 0
+        self.children = {}
+        self.lock = lock
+
+    def child(self, name, layer):
+        with self.lock:
+            node = self.children.get(name)
+            if node is None:
+                node = self.children[name] = Span(name, layer, self.lock)
+            return node
+
+    @property
+    def self_time(self):
+        """Time not spent in child spans (clipped at 0 when children ran on worker threads)"""
+        return max(0.0, self.total - sum(c.total for c in self.children.values()))
+
+    def walk(self, depth=0):
+        yield depth, self
+        for child in sorted(self.children.values(), key=lambda c: c.total, reverse=True):
+            yield from child.walk(depth + 1)
+
+
+class Trace:
+    """Call tree of one request, CLI command or dashboard rerun"""
+
+    def __init__(self, name):
+        self.root = Span(name, "untraced", threading.Lock())
+
+    @property
+    def wall_ms(self):
+        return self.root.total * 1000
+
+    def rows(self, min_ms=0.0):
+        """Flattened tree as dicts (depth, name, layer, calls, total_ms, self_ms, errors)"""
+        return [{
+            'depth': depth, 'name': node.name, 'layer': node.layer, 'calls': node.calls,
+            'total_ms': node.total * 1000, 'self_ms': node.self_time * 1000, 'errors': node.errors,
+        } for depth, node in self.root.walk() if depth and node.total * 1000 >= min_ms]
+
+    def layer_totals(self):
+        """Self time per layer in milliseconds, plus untraced time and wall time"""
+        totals = dict.fromkeys(LAYERS, 0.0)
+        for depth, node in self.root.walk():
+            if depth:
+                totals[node.layer] = totals.get(node.layer, 0.0) + node.self_time * 1000
+        totals['untraced'] = self.root.self_time * 1000
+        totals['wall'] = self.wall_ms
+        return totals
+
+    def format(self, min_ms=0.1):
+        lines = [f"🔎 TRACE {self.root.name}: {self.wall_ms:,.1f} ms wall"]
+        lines.append(" | ".join(f"{layer} {ms:,.1f} ms" for layer, ms in self.layer_totals().items() if layer != 'wall'))
+        lines.append(f"{'Span':<60} {'Layer':<9} {'Calls':>6} {'Total ms':>10} {'Self ms':>10}")
+        lines.append("─" * 99)
+        for row in self.rows(min_ms):
+            name = ("  " * (row['depth'] - 1) + row['name'])[:60]
+            errors = f"  ⚠️ {row['errors']} errors" if row['errors'] else ""
+            lines.append(f"{name:<60} {row['layer']:<9} {row['calls']:>6} {row['total_ms']:>10.2f} "
+                         f"{row['self_ms']:>10.2f}{errors}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def trace(name="trace"):
+    """Record every instrumented call made inside the block (and its propagated workers)"""
+    run = Trace(name)
+    token = _current.set(run.root)
+    started = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.root.total = time.perf_counter() - started
+        run.root.calls = 1
+        _current.reset(token)
+
+
+@contextmanager
+def span(name, layer="service"):
+    """Time a block as a child of the current span; a no-op outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    node = parent.child(name, layer)
+    token = _current.set(node)
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield node
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _current.reset(token)
+        with node.lock:
+            node.calls += 1
+            node.total += elapsed
+            node.errors += failed
+
+
+def traced(layer, name=None):
+    """Decorator recording each call of the function as a span"""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return await fn(*args, **kwargs)
+                with span(label, layer):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with span(label, layer):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument(layer):
+    """Class decorator tracing every method except dunders and generators"""
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("__") or not inspect.isfunction(value) or inspect.isgeneratorfunction(value):
+                continue
+            setattr(cls, attr, traced(layer, f"{cls.__name__}.{attr}")(value))
+        return cls
+    return decorate
+
+
+def propagate(fn):
+    """Bind fn to the caller's current span so calls on pool threads join the trace"""
+    parent = _current.get()
+    if parent is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+def available_profilers():
+    """Profilers usable here: cprofile always, pyinstrument when installed"""
+    return ["cprofile"] + (["pyinstrument"] if importlib.util.find_spec("pyinstrument") else [])
+
+
+class ProfileResult:
+    def __init__(self, kind):
+        self.kind = kind
+        self.text = None
+
+
+@contextmanager
+def profile(kind="cprofile", limit=40):
+    """Profile the block with cProfile or pyinstrument (None disables); report in result.text"""
+    result = ProfileResult(kind)
+    if kind is None:
+        yield result
+        return
+    if kind not in ("cprofile", "pyinstrument"):
+        raise ValueError(f"Unknown profiler '{kind}'. Choose from: cprofile, pyinstrument")
+
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError("pyinstrument profiling needs pyinstrument: pip install pyinstrument")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            result.text = profiler.output_text(unicode=True, color=False)
+        return
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:  # Another profiler already owns this thread
+        raise ValueError(f"Could not start cProfile: {e}")
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        result.text = out.getvalue()
@@ -1,13 +1,29 @@
-from DAO.transaction_dao import TransactionDAO
-from DAO.stock_dao import StockDAO
+from config import LIVE_CACHE_TTL
+from DAO.transaction_dao import AsyncTransactionDAO, TransactionDAO
+from DAO.stock_dao import AsyncStockDAO, StockDAO
 from DAO.portfolio_dao import PortfolioDAO
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from DAO.money import to_amount
+from Service.tracing import instrument
+from Service.shared_store import shared_store
+from Service import change_feed
 
+
+def _newest_first(transactions):
+    """Sort by date descending (most recent first), undated last.
+
+    Compares the stored ISO text, which sorts chronologically, so no date is parsed.
+    """
+    return sorted(transactions, key=lambda t: t.date_text or "", reverse=True)
+
+@instrument("service")
 class TransactionService:
     def __init__(self):
         self.trans_dao = TransactionDAO()
         self.stock_dao = StockDAO()
         self.portfolio_dao = PortfolioDAO()
+        self.async_trans_dao = AsyncTransactionDAO()
+        self.async_stock_dao = AsyncStockDAO()
 
     def buy_stock(self, portfolio_id, stock_id, quantity, price):
         """Buy a stock: record transaction and increase stock quantity"""
@@ -24,7 +40,7 @@ class TransactionService:
         stock = stock_data[0]
 
         # Update stock quantity ONLY (preserve original purchase price for tracking)
-        new_qty = stock['quantity'] + quantity
+        new_qty = stock.quantity + quantity
         self.stock_dao.update_stock(stock_id, quantity=new_qty)
 
         # Add transaction
@@ -43,7 +59,7 @@ class TransactionService:
             raise ValueError("Stock not found in portfolio")
 
         stock = stock_data[0]
-        current_qty = stock['quantity']
+        current_qty = stock.quantity
         
         if quantity > current_qty:
             raise ValueError(f"Cannot sell {quantity} shares, only {current_qty} available")
@@ -60,130 +76,158 @@ class TransactionService:
 
     def get_portfolio_transactions(self, portfolio_id):
         """Get all transactions for a portfolio with enhanced sorting"""
-        transactions = self.trans_dao.get_transactions_by_portfolio(portfolio_id)
-        # Sort by date descending (most recent first)
-        return sorted(transactions, key=lambda x: x.get('date', ''), reverse=True)
+        return _newest_first(self.trans_dao.get_transactions_by_portfolio(portfolio_id))
+
+    def iter_transaction_pages(self, portfolio_ids, page_size=1000, order=(("date", False), ("trans_id", False))):
+        """Yield transactions across portfolios one page at a time using range queries"""
+        offset = 0
+        while True:
+            rows, total = self.trans_dao.get_transactions_page(portfolio_ids, offset, page_size, order=order)
+            if rows:
+                yield rows
+            offset += page_size
+            if not rows or offset >= (total or 0):
+                break
 
     def get_stock_transactions(self, stock_id):
         """Get all transactions for a stock"""
         return self.trans_dao.get_transactions_by_stock(stock_id)
     
     def get_portfolio_performance(self, portfolio_id):
-        """Calculate comprehensive portfolio performance metrics - FIXED VERSION"""
-        transactions = self.get_portfolio_transactions(portfolio_id)
-        
-        total_invested = 0
-        total_sold = 0
-        buy_volume = 0
-        sell_volume = 0
-        transaction_count = len(transactions)
-        
-        # Calculate from transactions
-        for trans in transactions:
-            trans_value = trans['quantity'] * trans['price']
-            if trans['type'] == 'Buy':
-                total_invested += trans_value
-                buy_volume += trans_value
-            else:  # Sell
-                total_sold += trans_value
-                sell_volume += trans_value
+        """Calculate comprehensive portfolio performance metrics - FIXED VERSION
         
-        # Calculate current holdings value - FIXED: Handle empty stocks case
+        While the change feed is live the result is a shared snapshot, kept
+        until a write to the portfolio invalidates it.
+        """
+        if change_feed.live():
+            return shared_store.get_or_load(("performance", portfolio_id),
+                                            lambda: self._load_performance(portfolio_id), LIVE_CACHE_TTL)
+        return self._load_performance(portfolio_id)
+    
+    def _load_performance(self, portfolio_id):
+        totals = self.trans_dao.get_totals_by_portfolio(portfolio_id, since=self._recent_cutoff())
         stocks = self.stock_dao.get_stock_by_portfolio(portfolio_id)
-        current_holdings_value = 0
-        if stocks:  # Added safety check
-            for stock in stocks:
-                current_holdings_value += stock['quantity'] * stock['price']
+        return self._performance(totals, stocks)
+    
+    async def get_portfolio_performance_async(self, portfolio_id):
+        """get_portfolio_performance with the transaction and stock queries in flight together"""
+        import asyncio  # Imported here: the CLIs never run an event loop
+        live = change_feed.live()
+        if live:
+            snapshot = shared_store.get(("performance", portfolio_id))
+            if snapshot is not None:
+                return snapshot
+        generation = shared_store.generation
+        totals, stocks = await asyncio.gather(
+            self.async_trans_dao.get_totals_by_portfolio(portfolio_id, since=self._recent_cutoff()),
+            self.async_stock_dao.get_stock_by_portfolio(portfolio_id)
+        )
+        performance = self._performance(totals, stocks)
+        if live:
+            shared_store.put(("performance", portfolio_id), performance, LIVE_CACHE_TTL, since=generation)
+        return performance
+    
+    def _performance(self, totals, stocks):
+        # Exact integer cents summed by the DAO: no float drift
+        invested_cents = totals.buy_cents
+        sold_cents = totals.sell_cents
         
-        # Calculate performance metrics
-        net_value = current_holdings_value + total_sold
-        total_gain_loss = net_value - total_invested
-        gain_loss_percentage = (total_gain_loss / total_invested * 100) if total_invested > 0 else 0
+        holdings_cents = sum(stock.total_cents for stock in stocks)
         
-        # Calculate recent activity (last 30 days)
-        recent_transactions = self._get_recent_transactions(transactions, days=30)
+        # Calculate performance metrics
+        gain_loss_cents = holdings_cents + sold_cents - invested_cents
+        gain_loss_percentage = (gain_loss_cents / invested_cents * 100) if invested_cents > 0 else 0
         
         return {
-            'total_invested': total_invested,
-            'current_holdings_value': current_holdings_value,
-            'current_value': current_holdings_value,  # FIXED: Changed key name
-            'total_sold': total_sold,
-            'net_value': net_value,
-            'total_gain_loss': total_gain_loss,
+            'total_invested': to_amount(invested_cents),
+            'current_holdings_value': to_amount(holdings_cents),
+            'current_value': to_amount(holdings_cents),  # FIXED: Changed key name
+            'total_sold': to_amount(sold_cents),
+            'net_value': to_amount(holdings_cents + sold_cents),
+            'total_gain_loss': to_amount(gain_loss_cents),
             'gain_loss_percentage': gain_loss_percentage,
-            'transaction_count': transaction_count,
-            'buy_volume': buy_volume,
-            'sell_volume': sell_volume,
-            'recent_activity': len(recent_transactions),
+            'transaction_count': totals.count,
+            'buy_volume': to_amount(invested_cents),
+            'sell_volume': to_amount(sold_cents),
+            'recent_activity': totals.recent,  # Last 30 days
             'stocks_held': len(stocks) if stocks else 0
         }
     
-    def _get_recent_transactions(self, transactions, days=30):
-        """Get transactions from the last N days"""
-        try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            recent = []
-            for trans in transactions:
-                trans_date = trans.get('date')
-                if trans_date:
-                    # Convert string to datetime if needed
-                    if isinstance(trans_date, str):
-                        trans_date = datetime.fromisoformat(trans_date.replace('Z', '+00:00'))
-                    if trans_date >= cutoff_date:
-                        recent.append(trans)
-            return recent
-        except:
-            return []
+    def _recent_cutoff(self, days=30):
+        """Start of the recent-activity window"""
+        return datetime.now(timezone.utc) - timedelta(days=days)
 
     def get_transaction_analytics(self, portfolio_id):
         """Get detailed transaction analytics and trends"""
         transactions = self.get_portfolio_transactions(portfolio_id)
         
+        # Symbol of every traded stock
+        symbols = {}
+        for trans in transactions:
+            stock_id = trans.stock_id
+            if stock_id not in symbols:
+                try:
+                    stock_data = self.stock_dao.get_stock_by_id(stock_id)
+                    symbols[stock_id] = stock_data[0].symbol if stock_data else f"Stock_{stock_id}"
+                except:
+                    symbols[stock_id] = f"Stock_{stock_id}"
+        return self._analytics(transactions, symbols)
+    
+    async def get_transaction_analytics_async(self, portfolio_id):
+        """get_transaction_analytics with symbols from one concurrent stocks query instead of one per stock"""
+        import asyncio
+        transactions, stocks = await asyncio.gather(
+            self.async_trans_dao.get_transactions_by_portfolio(portfolio_id),
+            self.async_stock_dao.get_stock_by_portfolio(portfolio_id)
+        )
+        # Transactions reference stocks of their own portfolio
+        symbols = {stock.stock_id: stock.symbol for stock in stocks}
+        for trans in transactions:
+            symbols.setdefault(trans.stock_id, f"Stock_{trans.stock_id}")
+        return self._analytics(_newest_first(transactions), symbols)
+    
+    def _analytics(self, transactions, symbols):
         if not transactions:
             return {"error": "No transactions found"}
         
         # Group by month
         monthly_data = {}
         for trans in transactions:
-            trans_date = trans.get('date')
-            if trans_date:
+            if trans.date_text:
                 try:
-                    if isinstance(trans_date, str):
-                        trans_date = datetime.fromisoformat(trans_date.replace('Z', '+00:00'))
-                    month_key = trans_date.strftime('%Y-%m')
+                    month_key = trans.date_text[:7]  # 'YYYY-MM' of the stored ISO text, without parsing
                     
                     if month_key not in monthly_data:
                         monthly_data[month_key] = {'buys': 0, 'sells': 0, 'buy_volume': 0, 'sell_volume': 0}
                     
-                    trans_value = trans['quantity'] * trans['price']
-                    if trans['type'] == 'Buy':
+                    if trans.type == 'Buy':
                         monthly_data[month_key]['buys'] += 1
-                        monthly_data[month_key]['buy_volume'] += trans_value
+                        monthly_data[month_key]['buy_volume'] += trans.value_cents
                     else:
                         monthly_data[month_key]['sells'] += 1
-                        monthly_data[month_key]['sell_volume'] += trans_value
+                        monthly_data[month_key]['sell_volume'] += trans.value_cents
                 except Exception as e:
                     continue
         
         # Most traded stocks
         stock_trades = {}
         for trans in transactions:
-            stock_id = trans['stock_id']
+            stock_id = trans.stock_id
             if stock_id not in stock_trades:
-                # Get stock symbol
-                try:
-                    stock_data = self.stock_dao.get_stock_by_id(stock_id)
-                    symbol = stock_data[0]['symbol'] if stock_data else f"Stock_{stock_id}"
-                    stock_trades[stock_id] = {'symbol': symbol, 'buys': 0, 'sells': 0, 'volume': 0}
-                except:
-                    stock_trades[stock_id] = {'symbol': f"Stock_{stock_id}", 'buys': 0, 'sells': 0, 'volume': 0}
+                stock_trades[stock_id] = {'symbol': symbols[stock_id], 'buys': 0, 'sells': 0, 'volume': 0}
             
-            trans_value = trans['quantity'] * trans['price']
-            if trans['type'] == 'Buy':
+            if trans.type == 'Buy':
                 stock_trades[stock_id]['buys'] += 1
             else:
                 stock_trades[stock_id]['sells'] += 1
-            stock_trades[stock_id]['volume'] += trans_value
+            stock_trades[stock_id]['volume'] += trans.value_cents
+        
+        # Volumes were summed in exact cents
+        for month in monthly_data.values():
+            month['buy_volume'] = to_amount(month['buy_volume'])
+            month['sell_volume'] = to_amount(month['sell_volume'])
+        for trades in stock_trades.values():
+            trades['volume'] = to_amount(trades['volume'])
         
         # Sort by volume
         most_traded = sorted(stock_trades.values(), key=lambda x: x['volume'], reverse=True)[:5]
@@ -197,8 +241,8 @@ class TransactionService:
     
     def _calculate_buy_sell_ratio(self, transactions):
         """Calculate buy vs sell ratio"""
-        buys = sum(1 for t in transactions if t['type'] == 'Buy')
-        sells = sum(1 for t in transactions if t['type'] == 'Sell')
+        buys = sum(1 for t in transactions if t.type == 'Buy')
+        sells = sum(1 for t in transactions if t.type == 'Sell')
         total = buys + sells
         if total == 0:
             return {'buy_ratio': 0, 'sell_ratio': 0}
@@ -209,41 +253,42 @@ class TransactionService:
     
     def get_stock_performance(self, stock_id):
         """Calculate performance for a specific stock - FIXED VERSION"""
-        transactions = self.get_stock_transactions(stock_id)
+        totals = self.trans_dao.get_totals_by_stock(stock_id)
         stock_data = self.stock_dao.get_stock_by_id(stock_id)
-        
-        if not stock_data or not transactions:
+        return self._stock_performance(totals, stock_data)
+    
+    async def get_stock_performance_async(self, stock_id):
+        import asyncio
+        totals, stock_data = await asyncio.gather(
+            self.async_trans_dao.get_totals_by_stock(stock_id),
+            self.async_stock_dao.get_stock_by_id(stock_id)
+        )
+        return self._stock_performance(totals, stock_data)
+    
+    def _stock_performance(self, totals, stock_data):
+        if not stock_data or not totals.count:
             return {"error": "No data available"}
         
         stock = stock_data[0]
-        total_shares_bought = 0
-        total_shares_sold = 0
-        total_cost = 0
-        total_proceeds = 0
-        
-        for trans in transactions:
-            if trans['type'] == 'Buy':
-                total_shares_bought += trans['quantity']
-                total_cost += trans['quantity'] * trans['price']
-            else:  # Sell
-                total_shares_sold += trans['quantity']
-                total_proceeds += trans['quantity'] * trans['price']
+        total_shares_bought = totals.bought
+        total_cost = to_amount(totals.buy_cents)
+        total_proceeds = to_amount(totals.sell_cents)
         
         # FIX: Use ACTUAL current shares from database, not calculated
-        current_shares = stock['quantity']  # This ensures consistency
+        current_shares = stock.quantity  # This ensures consistency
         average_buy_price = total_cost / total_shares_bought if total_shares_bought > 0 else 0
-        current_value = current_shares * stock['price']
+        current_value = stock.total_value
         unrealized_gain_loss = current_value - (current_shares * average_buy_price)
         
         return {
-            'symbol': stock['symbol'],
+            'symbol': stock.symbol,
             'current_shares': current_shares,  # Now shows correct actual quantity
-            'current_price': stock['price'],
+            'current_price': stock.price,
             'average_buy_price': average_buy_price,
             'total_invested': total_cost,
             'total_proceeds': total_proceeds,
             'current_value': current_value,
             'unrealized_gain_loss': unrealized_gain_loss,
             'unrealized_gain_loss_percent': (unrealized_gain_loss / (current_shares * average_buy_price)) * 100 if current_shares > 0 else 0,
-            'transaction_count': len(transactions)
+            'transaction_count': totals.count
         }
\ No newline at end of file
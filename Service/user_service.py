@@ -3,18 +3,23 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from DAO.user_dao import UserDAO
+from Service.tracing import instrument
 
 class NoUser(Exception):
     pass
 
+@instrument("service")
 class UserService():
     def __init__(self):
         self.user_dao = UserDAO()
     def register_user(self, name : str, email : str):
-        """Register a new user if email not taken"""
+        """Register a new user if email not taken; returns the new User"""
         if self.user_dao.get_user_by_email(email):
             raise ValueError("User already exists")
-        return self.user_dao.create_user(name,email)
+        created = self.user_dao.create_user(name,email)
+        if not created:
+            raise ValueError("User could not be created")
+        return created[0]
     def update_profile(self, user_id, name, email):
         """Update user profile"""
         return self.user_dao.update_user(user_id, name, email)
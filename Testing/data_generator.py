@@ -0,0 +1,353 @@
+"""Deterministic synthetic dataset for scale testing.
+
+Generates users -> portfolios -> stocks -> transactions at a configurable
+scale factor. Symbol popularity and per-user trading frequency both follow a
+Zipf distribution, so a few symbols and a few heavy traders dominate the way
+they do in real data. The same seed always produces the same rows, IDs
+included.
+
+Scale 1 is 100 users, about 1,000 portfolios and 100,000 transactions;
+scale 100 is 10k users, about 100k portfolios and 10M transactions. Rows are
+generated and inserted in batches, so memory stays flat at any scale.
+
+    python -m Testing.data_generator --scale 1 --exercise
+    python -m Testing.data_generator --scale 100 --target supabase --batch-size 5000
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import random
+import string
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from Testing.offline_quotes import base_price
+
+USERS_PER_SCALE = 100
+PORTFOLIOS_PER_USER = 10        # Mean; each user gets 1 .. 2 * mean - 1
+HOLDINGS_PER_PORTFOLIO = (3, 25)
+TRANSACTIONS_PER_SCALE = 100_000
+HISTORY_DAYS = 3 * 365
+
+# Most popular symbols first; the rest of the universe is synthetic tickers
+POPULAR_SYMBOLS = [
+    "AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "AMD", "NFLX", "JPM",
+    "V", "MA", "KO", "PEP", "WMT", "DIS", "BAC", "XOM", "CVX", "INTC",
+]
+
+# Yahoo sector names, for synthetic fundamentals
+SECTORS = [
+    "Technology", "Healthcare", "Financial Services", "Consumer Cyclical", "Industrials", "Communication Services",
+    "Consumer Defensive", "Energy", "Basic Materials", "Real Estate", "Utilities",
+]
+
+LOAD_ORDER = ("users", "portfolios", "stocks", "transactions")
+PORTFOLIO_NAMES = ["Growth", "Dividends", "Retirement", "Tech", "Speculative", "Index", "Value", "Trading"]
+
+
+class ZipfSampler:
+    """Draw ranks 0..n-1 with P(rank k) proportional to 1 / (k + 1) ** s"""
+
+    def __init__(self, n, s):
+        self.cumulative = []
+        total = 0.0
+        for k in range(1, n + 1):
+            total += 1.0 / k ** s
+            self.cumulative.append(total)
+        self.total = total
+
+    def weight(self, rank):
+        previous = self.cumulative[rank - 1] if rank else 0.0
+        return (self.cumulative[rank] - previous) / self.total
+
+    def sample(self, rng):
+        return bisect.bisect_left(self.cumulative, rng.random() * self.total)
+
+
+def symbol_universe(size, seed):
+    """POPULAR_SYMBOLS followed by unique synthetic 3-4 letter tickers"""
+    rng = random.Random(f"{seed}:symbols")
+    symbols, seen = list(POPULAR_SYMBOLS[:size]), set(POPULAR_SYMBOLS)
+    while len(symbols) < size:
+        ticker = "".join(rng.choices(string.ascii_uppercase, k=rng.choice((3, 4))))
+        if ticker not in seen:
+            seen.add(ticker)
+            symbols.append(ticker)
+    return symbols
+
+
+def fundamentals_rows(count, seed=42):
+    """count synthetic fundamentals table rows over symbol_universe(count) for screener tests"""
+    rng = random.Random(f"{seed}:fundamentals")
+    updated_at = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for symbol in symbol_universe(count, seed):
+        price = base_price(symbol)
+        sector = rng.choice(SECTORS)
+        rows.append({
+            "symbol": symbol, "name": f"{symbol} Holdings Inc.", "exchange": rng.choice(("XNAS", "XNYS")),
+            "sector": sector, "industry": f"{sector} {rng.randint(1, 12)}", "price": price,
+            "market_cap": round(price * 10 ** rng.uniform(6, 10)),
+            "pe_ratio": round(rng.uniform(-20, 80), 2) if rng.random() < 0.9 else None,
+            "forward_pe": round(rng.uniform(5, 60), 2) if rng.random() < 0.8 else None,
+            "dividend_yield": round(rng.uniform(0, 6), 2) if rng.random() < 0.5 else None,
+            "beta": round(rng.uniform(0.2, 2.5), 2), "volume": rng.randint(10_000, 50_000_000),
+            "high_52w": round(price * rng.uniform(1, 1.6), 2), "low_52w": round(price * rng.uniform(0.5, 1), 2),
+            "updated_at": updated_at,
+        })
+    return rows
+
+
+
+def history_frame(symbols, days, seed=42):
+    """date x symbol frame of synthetic daily closes (random walks from base_price) for backtest tests"""
+    import numpy as np  # Imported here: only backtest benchmarks need numpy/pandas
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    tickers = symbol_universe(symbols, seed)
+    moves = rng.normal(0.0003, 0.02, (days, symbols))
+    closes = np.array([base_price(t) for t in tickers]) * np.exp(np.cumsum(moves, axis=0))
+    return pd.DataFrame(closes.round(2), index=pd.bdate_range(end="2024-12-31", periods=days, name="date"),
+                        columns=tickers)
+
+def _harmonic(n):
+    """Cumulative 1/k weights for n items"""
+    total, weights = 0.0, []
+    for k in range(1, n + 1):
+        total += 1.0 / k
+        weights.append(total)
+    return weights
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class DatasetGenerator:
+    """Seeded generator of schema-shaped rows; iterate batches() for (table, rows) in load order"""
+
+    def __init__(self, scale=1.0, seed=42, universe=500, symbol_skew=1.1, activity_skew=0.9,
+                 start=None, days=HISTORY_DAYS):
+        if scale <= 0:
+            raise ValueError("Scale must be positive")
+        self.scale = scale
+        self.seed = seed
+        self.users = max(1, round(USERS_PER_SCALE * scale))
+        self.transactions = max(1, round(TRANSACTIONS_PER_SCALE * scale))
+        self.symbols = symbol_universe(universe, seed)
+        self.symbol_zipf = ZipfSampler(len(self.symbols), symbol_skew)
+        self.activity_zipf = ZipfSampler(self.users, activity_skew)
+        self.days = days
+        self.start = start or datetime(2022, 1, 3, tzinfo=timezone.utc)
+
+        # Activity rank of every user (rank 0 trades most), fixed by the seed
+        ranks = list(range(self.users))
+        random.Random(f"{seed}:ranks").shuffle(ranks)
+        self.activity_rank = ranks
+
+    def price(self, symbol, day):
+        """Deterministic daily close: a slow cycle around the symbol's base price"""
+        phase = (sum(map(ord, symbol)) % 97) / 97 * 2 * math.pi
+        return round(base_price(symbol) * (1 + 0.25 * math.sin(day / 60 + phase)), 2)
+
+    def user_transactions(self, user_index):
+        """Transaction budget of one user from their Zipf activity rank"""
+        return max(1, round(self.transactions * self.activity_zipf.weight(self.activity_rank[user_index])))
+
+    def busiest_users(self, n=100):
+        """Indexes of the n most active users, busiest first"""
+        order = sorted(range(self.users), key=lambda u: self.activity_rank[u])
+        return order[:n]
+
+    def _stock_trades(self, rng, portfolio_id, stock_id, symbol, count):
+        """A buy-first trade sequence that never sells more than is held; returns (rows, quantity)"""
+        days = sorted(rng.randrange(self.days) for _ in range(count))
+        rows, held = [], 0
+        for day in days:
+            price = round(self.price(symbol, day) * rng.uniform(0.98, 1.02), 2)
+            if held > 0 and rng.random() < 0.3:
+                trans_type, quantity = "Sell", rng.randint(1, held)
+                held -= quantity
+            else:
+                trans_type, quantity = "Buy", rng.randint(1, 50)
+                held += quantity
+            stamp = self.start + timedelta(days=day, seconds=rng.randrange(34_200, 57_600))
+            rows.append({
+                "trans_id": _uuid(rng), "portfolio_id": portfolio_id, "stock_id": stock_id,
+                "type": trans_type, "quantity": quantity, "price": price, "date": stamp.isoformat(),
+            })
+        return rows, held
+
+    def user_batches(self, user_index):
+        """(table, rows) batches for one user, parents before children"""
+        rng = random.Random(f"{self.seed}:user:{user_index}")
+        user_id = _uuid(rng)
+        yield "users", [{"user_id": user_id, "name": f"Scale User {user_index}",
+                         "email": f"scale{user_index}@example.com"}]
+
+        portfolio_count = rng.randint(1, 2 * PORTFOLIOS_PER_USER - 1)
+        portfolios = [{"portfolio_id": _uuid(rng), "user_id": user_id,
+                       "portfolio_name": f"{rng.choice(PORTFOLIO_NAMES)} {p + 1}"}
+                      for p in range(portfolio_count)]
+        yield "portfolios", portfolios
+
+        # Spread the user's trades over portfolios, then over Zipf-popular symbols
+        budget = self.user_transactions(user_index)
+        per_portfolio = [0] * portfolio_count
+        for p in rng.choices(range(portfolio_count), k=budget):
+            per_portfolio[p] += 1
+
+        last_day = self.days - 1
+        for portfolio, trades in zip(portfolios, per_portfolio):
+            if not trades:
+                continue
+            # A handful of distinct holdings, concentrated in the first ones picked
+            holdings = []
+            target = min(trades, rng.randint(*HOLDINGS_PER_PORTFOLIO))
+            for _ in range(target * 4):
+                symbol = self.symbols[self.symbol_zipf.sample(rng)]
+                if symbol not in holdings:
+                    holdings.append(symbol)
+                    if len(holdings) == target:
+                        break
+            per_symbol = dict.fromkeys(holdings, 0)
+            for k in rng.choices(range(len(holdings)), cum_weights=_harmonic(len(holdings)), k=trades):
+                per_symbol[holdings[k]] += 1
+
+            stocks, transactions = [], []
+            for symbol, count in per_symbol.items():
+                if not count:
+                    continue
+                stock_id = _uuid(rng)
+                rows, held = self._stock_trades(rng, portfolio["portfolio_id"], stock_id, symbol, count)
+                stocks.append({"stock_id": stock_id, "portfolio_id": portfolio["portfolio_id"], "symbol": symbol,
+                               "price": self.price(symbol, last_day), "quantity": held})
+                transactions.extend(rows)
+            yield "stocks", stocks
+            yield "transactions", transactions
+
+    def batches(self):
+        for user_index in range(self.users):
+            yield from self.user_batches(user_index)
+
+
+def bulk_load(client, batches, batch_size=1000, on_progress=None):
+    """Insert generated batches through a Supabase-style client; returns row counts per table.
+
+    Rows are buffered per table and written batch_size at a time. A child
+    table is only flushed after its parents, so foreign keys always resolve.
+    """
+    buffers = {table: [] for table in LOAD_ORDER}
+    counts = {table: 0 for table in LOAD_ORDER}
+
+    def flush(upto):
+        for table in LOAD_ORDER[:LOAD_ORDER.index(upto) + 1]:
+            rows = buffers[table]
+            for i in range(0, len(rows), batch_size):
+                client.table(table).insert(rows[i:i + batch_size], returning="minimal").execute()
+            counts[table] += len(rows)
+            rows.clear()
+        if on_progress and upto == LOAD_ORDER[-1]:
+            on_progress(dict(counts))
+
+    for table, rows in batches:
+        buffers[table].extend(rows)
+        if len(buffers[table]) >= batch_size:
+            flush(table)
+    flush(LOAD_ORDER[-1])
+    return counts
+
+
+def load_dataset(client, scale=1.0, seed=42, batch_size=1000, on_progress=None, busiest=10, **options):
+    """Generate and insert a dataset; returns stats including the busiest user IDs"""
+    generator = DatasetGenerator(scale, seed, **options)
+    started = time.perf_counter()
+    counts = bulk_load(client, generator.batches(), batch_size, on_progress)
+    elapsed = time.perf_counter() - started
+    busiest = [next(generator.user_batches(u))[1][0]["user_id"] for u in generator.busiest_users(busiest)]
+    return {
+        "scale": scale,
+        "seed": seed,
+        "rows": counts,
+        "seconds": elapsed,
+        "rows_per_sec": sum(counts.values()) / elapsed if elapsed else 0.0,
+        "busiest_users": busiest,
+    }
+
+
+def exercise(user_ids):
+    """Time the portfolio summary and performance hot paths for each user"""
+    from Service.portfolio_service import PortfolioService
+
+    service = PortfolioService()
+    timings = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        summaries = service.get_portfolio_summary(user_id)
+        summary_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        for summary in summaries:
+            service.transaction_service.get_portfolio_performance(summary["portfolio_id"])
+        timings.append({"user_id": user_id, "portfolios": len(summaries), "summary_ms": summary_ms,
+                        "performance_ms": (time.perf_counter() - started) * 1000})
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load a deterministic synthetic dataset")
+    parser.add_argument("--scale", type=float, default=1.0, help="1 = 100 users / ~1k portfolios / 100k transactions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", choices=["local", "supabase"], default="local",
+                        help="in-memory backend or the Supabase project from .env")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per insert request")
+    parser.add_argument("--universe", type=int, default=500, help="number of distinct symbols")
+    parser.add_argument("--symbol-skew", type=float, default=1.1, help="Zipf exponent of symbol popularity")
+    parser.add_argument("--activity-skew", type=float, default=0.9, help="Zipf exponent of trading frequency")
+    parser.add_argument("--exercise", action="store_true", help="time portfolio hot paths for the busiest users")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    from config import get_supabase, set_supabase_client
+    from Testing.fake_supabase import FakeSupabase
+
+    local = args.target == "local"
+    client = FakeSupabase() if local else get_supabase()
+
+    def show_progress(counts):
+        print(" | ".join(f"{table} {n:,}" for table, n in counts.items()), end="\r", file=sys.stderr)
+
+    try:
+        stats = load_dataset(client, args.scale, args.seed, args.batch_size,
+                             None if args.json else show_progress, universe=args.universe,
+                             symbol_skew=args.symbol_skew, activity_skew=args.activity_skew)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.exercise:
+        if local:
+            set_supabase_client(client)
+        stats["exercise"] = exercise(stats["busiest_users"][:3])
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+    print(f"\n✅ Loaded {sum(stats['rows'].values()):,} rows in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec) into {args.target}")
+    for table, n in stats["rows"].items():
+        print(f"   {table:<13} {n:>12,}")
+    for timing in stats.get("exercise", []):
+        print(f"   ⏱️  {timing['user_id']}: {timing['portfolios']} portfolios | "
+              f"summary {timing['summary_ms']:.1f} ms | performance {timing['performance_ms']:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+# Primary key and indexed lookup columns of the Smart Stock Tracker schema
+SCHEMA = {
+    "users": {"pk": "user_id", "indexes": ["email"]},
+    "portfolios": {"pk": "portfolio_id", "indexes": ["user_id"]},
+    "stocks": {"pk": "stock_id", "indexes": ["portfolio_id", "symbol"]},
+    "transactions": {"pk": "trans_id", "indexes": ["portfolio_id", "stock_id", "import_hash"]},
+    "scheduler_leases": {"pk": "name", "indexes": []},
+    "fundamentals": {"pk": "symbol", "indexes": []},
+}
+
+# Rows removed along with their parent, mirroring ON DELETE CASCADE
+CASCADES = {
+    "users": [("portfolios", "user_id")],
+    "portfolios": [("stocks", "portfolio_id"), ("transactions", "portfolio_id")],
+    "stocks": [("transactions", "stock_id")],
+}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeTable:
+    """In-memory table with hash indexes on its lookup columns"""
+
+    def __init__(self, name, on_change=None):
+        spec = SCHEMA.get(name, {"pk": "id", "indexes": []})
+        self.name = name
+        self.on_change = on_change  # (table, type, record, old_record) after every write
+        self.pk = spec["pk"]
+        self.rows = {}
+        self.indexes = {col: {} for col in [self.pk] + spec["indexes"]}
+
+    def _index_add(self, row):
+        for col, index in self.indexes.items():
+            index.setdefault(row.get(col), set()).add(row[self.pk])
+
+    def _index_remove(self, row):
+        for col, index in self.indexes.items():
+            keys = index.get(row.get(col))
+            if keys:
+                keys.discard(row[self.pk])
+
+    def insert(self, row):
+        row = dict(row)
+        row.setdefault(self.pk, str(uuid.uuid4()))
+        row.setdefault("created_at", _now())
+        if self.name == "transactions":
+            row.setdefault("date", row["created_at"])
+        if row[self.pk] in self.rows:
+            raise ValueError(f"duplicate key value violates unique constraint on {self.name}.{self.pk}")
+        self.rows[row[self.pk]] = row
+        self._index_add(row)
+        if self.on_change:
+            self.on_change(self.name, "INSERT", dict(row), None)
+        return row
+
+    def update(self, row, values):
+        old = dict(row) if self.on_change else None
+        self._index_remove(row)
+        row.update(values)
+        self._index_add(row)
+        if self.on_change:
+            self.on_change(self.name, "UPDATE", dict(row), old)
+        return row
+
+    def delete(self, row):
+        self._index_remove(row)
+        self.rows.pop(row[self.pk], None)
+        if self.on_change:
+            self.on_change(self.name, "DELETE", None, dict(row))
+
+    def candidates(self, filters):
+        """Rows that may match filters, narrowed through an index when possible"""
+        for op, col, value in filters:
+            if col in self.indexes and op in ("eq", "in"):
+                index = self.indexes[col]
+                values = [value] if op == "eq" else value
+                keys = set()
+                for v in values:
+                    keys |= index.get(v, set())
+                return [self.rows[k] for k in keys]
+        return list(self.rows.values())
+
+
+def _matches(row, filters):
+    for op, col, value in filters:
+        field = row.get(col)
+        if op == "eq" and field != value:
+            return False
+        if op == "neq" and field == value:
+            return False
+        if op == "in" and field not in value:
+            return False
+        if op == "ilike":
+            needle = value.strip("%").lower()
+            if field is None or needle not in str(field).lower():
+                return False
+        if op in ("gt", "gte", "lt", "lte"):
+            if field is None:
+                return False
+            if op == "gt" and not field > value:
+                return False
+            if op == "gte" and not field >= value:
+                return False
+            if op == "lt" and not field < value:
+                return False
+            if op == "lte" and not field <= value:
+                return False
+    return True
+
+
+class FakeQuery:
+    """Chainable stand-in for the postgrest query builder"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.op = "select"
+        self.columns = "*"
+        self.count = None
+        self.payload = None
+        self.filters = []
+        self.ordering = []
+        self.offset = 0
+        self.limit_value = None
+        self.on_conflict = None
+        self.ignore_duplicates = False
+        self.returning = "representation"
+
+    # Statement builders
+    def select(self, columns="*", count=None):
+        self.op, self.columns, self.count = "select", columns, count
+        return self
+
+    def insert(self, data, returning="representation"):
+        self.op, self.payload, self.returning = "insert", data, returning
+        return self
+
+    def upsert(self, data, on_conflict=None, ignore_duplicates=False):
+        self.op, self.payload = "upsert", data
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, data):
+        self.op, self.payload = "update", data
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    # Filters and modifiers
+    def _filter(self, op, col, value):
+        self.filters.append((op, col, value))
+        return self
+
+    def eq(self, col, value):
+        return self._filter("eq", col, value)
+
+    def neq(self, col, value):
+        return self._filter("neq", col, value)
+
+    def in_(self, col, values):
+        return self._filter("in", col, set(values))
+
+    def ilike(self, col, pattern):
+        return self._filter("ilike", col, pattern)
+
+    def gt(self, col, value):
+        return self._filter("gt", col, value)
+
+    def gte(self, col, value):
+        return self._filter("gte", col, value)
+
+    def lt(self, col, value):
+        return self._filter("lt", col, value)
+
+    def lte(self, col, value):
+        return self._filter("lte", col, value)
+
+    def order(self, col, desc=False):
+        self.ordering.append((col, desc))
+        return self
+
+    def range(self, start, end):
+        self.offset, self.limit_value = start, end - start + 1
+        return self
+
+    def limit(self, n):
+        self.limit_value = n
+        return self
+
+    def execute(self):
+        return self.client._execute(self)
+
+
+class FakeSupabase:
+    """In-memory Supabase client covering the calls made by the DAO layer.
+
+    Counts every execute() per (table, operation) and can add a fixed
+    latency per round trip to approximate a remote database. Listeners
+    added with subscribe() receive every row change once the write
+    completes, standing in for the realtime change feed (deletes carry the
+    whole old row, as with REPLICA IDENTITY FULL).
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {name: FakeTable(name, self._changed) for name in SCHEMA}
+        self.calls = Counter()
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._changes = []
+
+    def table(self, name):
+        if name not in self.tables:
+            self.tables[name] = FakeTable(name, self._changed)
+        return FakeQuery(self, self.tables[name])
+
+    def subscribe(self, listener):
+        """Call listener(table, type, record, old_record) for every change; returns an unsubscribe function"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _changed(self, *change):
+        if self._listeners:
+            self._changes.append(change)
+
+    def reset_counts(self):
+        self.calls.clear()
+
+    def as_async(self):
+        """View of this backend for the async DAOs: same tables and counts, awaited latency"""
+        return AsyncFakeSupabase(self)
+
+    def _execute(self, query):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._run(query)
+
+    def _run(self, query):
+        with self._lock:
+            self.calls[(query.table.name, query.op)] += 1
+            handler = getattr(self, f"_do_{query.op}")
+            response = handler(query)
+            changes, self._changes = self._changes, []
+        for change in changes:  # Outside the lock, like a feed delivering after commit
+            for listener in list(self._listeners):
+                listener(*change)
+        return response
+
+    def _selected(self, query):
+        table = query.table
+        return [row for row in table.candidates(query.filters) if _matches(row, query.filters)]
+
+    def _do_select(self, query):
+        rows = self._selected(query)
+        for col, desc in reversed(query.ordering):
+            rows.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+        total = len(rows) if query.count else None
+        if query.limit_value is not None:
+            rows = rows[query.offset:query.offset + query.limit_value]
+        elif query.offset:
+            rows = rows[query.offset:]
+        if query.columns.strip() != "*":
+            cols = [c.strip() for c in query.columns.split(",")]
+            rows = [{c: row.get(c) for c in cols} for row in rows]
+        else:
+            rows = [dict(row) for row in rows]
+        return FakeResponse(rows, total)
+
+    def _do_insert(self, query):
+        payload = query.payload if isinstance(query.payload, list) else [query.payload]
+        rows = [query.table.insert(row) for row in payload]
+        return FakeResponse([] if query.returning == "minimal" else [dict(row) for row in rows])
+
+    def _do_upsert(self, query):
+        table = query.table
+        key = query.on_conflict or table.pk
+        payload = query.payload if isinstance(query.payload, list) else [query.payload]
+        written = []
+        for row in payload:
+            existing = [r for r in table.candidates([("eq", key, row.get(key))]) if r.get(key) == row.get(key)]
+            if existing and query.ignore_duplicates:
+                continue
+            if existing:
+                written.append(dict(table.update(existing[0], row)))
+            else:
+                written.append(dict(table.insert(row)))
+        return FakeResponse(written)
+
+    def _do_update(self, query):
+        rows = self._selected(query)
+        return FakeResponse([dict(query.table.update(row, query.payload)) for row in rows])
+
+    def _do_delete(self, query):
+        rows = self._selected(query)
+        for row in rows:
+            self._cascade(query.table, row)
+            query.table.delete(row)
+        return FakeResponse([dict(row) for row in rows])
+
+    def _cascade(self, table, row):
+        for child_name, fk in CASCADES.get(table.name, []):
+            child = self.tables[child_name]
+            for child_row in child.candidates([("eq", fk, row[table.pk])]):
+                self._cascade(child, child_row)
+                child.delete(child_row)
+
+
+class AsyncFakeQuery(FakeQuery):
+    async def execute(self):
+        if self.client.latency:
+            await asyncio.sleep(self.client.latency)
+        return self.client._run(self)
+
+
+class AsyncFakeSupabase:
+    """FakeSupabase as the async client: execute() is awaited, so round trips overlap"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def table(self, name):
+        return AsyncFakeQuery(self.backend, self.backend.table(name).table)
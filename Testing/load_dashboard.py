@@ -0,0 +1,233 @@
+"""Headless load test for web_dashboard.py.
+
+Drives every AnimatedStockTracker page through streamlit.testing.v1.AppTest
+for N concurrent sessions against an in-memory Supabase backend and an
+offline quote provider, then reports p50/p95/p99 render time per page and
+how many DAO round trips and provider calls each render cost.
+
+AppTest's script runner is not thread-safe, so sessions interleave but
+each render runs alone; render times therefore exclude waiting for other
+sessions. All sessions share the backend and the process-wide caches.
+
+    python -m Testing.load_dashboard --sessions 20 --portfolios 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from config import set_supabase_client
+from DAO.models import User
+from Service.quote_provider import set_quote_provider
+from Service.change_feed import start_change_feed, stop_change_feed
+from Testing.fake_supabase import FakeSupabase
+from Testing.offline_quotes import OfflineQuoteProvider, base_price
+from Testing.data_generator import load_dataset
+
+DASHBOARD = os.path.join(ROOT, "web_dashboard.py")
+# One AppTest run at a time: concurrent runs corrupt each other (empty pages, SystemError on 3.11)
+_render_lock = threading.Lock()
+
+PAGES = ["🏠 Dashboard", "💼 Portfolios", "📈 Live Market", "📊 Analytics", "🔎 Screener", "⚡ Actions", "⚙️ Settings"]
+
+SYMBOLS = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "NFLX", "AMD", "INTC",
+    "JPM", "BAC", "WMT", "KO", "PEP", "DIS", "V", "MA", "XOM", "CVX",
+]
+
+
+def seed_backend(backend, users, portfolios, stocks, transactions, seed=7):
+    """Fill backend with users -> portfolios -> stocks -> transactions; returns user rows"""
+    rng = random.Random(seed)
+    user_rows = []
+    for u in range(users):
+        user = backend.table("users").insert({"name": f"Load User {u}", "email": f"load{u}@example.com"}).execute().data[0]
+        user_rows.append(user)
+        for p in range(portfolios):
+            portfolio = backend.table("portfolios").insert(
+                {"user_id": user["user_id"], "portfolio_name": f"Portfolio {p}"}
+            ).execute().data[0]
+            stock_rows = backend.table("stocks").insert([
+                {"portfolio_id": portfolio["portfolio_id"], "symbol": symbol,
+                 "price": base_price(symbol), "quantity": rng.randint(1, 200)}
+                for symbol in rng.sample(SYMBOLS, min(stocks, len(SYMBOLS)))
+            ]).execute().data
+            trades = []
+            for stock in stock_rows:
+                for _ in range(transactions):
+                    trades.append({
+                        "portfolio_id": portfolio["portfolio_id"], "stock_id": stock["stock_id"],
+                        "type": "Buy" if rng.random() < 0.7 else "Sell",
+                        "quantity": rng.randint(1, 20),
+                        "price": round(stock["price"] * rng.uniform(0.8, 1.2), 2),
+                    })
+            if trades:
+                backend.table("transactions").insert(trades).execute()
+    backend.reset_counts()
+    return user_rows
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def render(at):
+    """Run the script once; returns (seconds, errors) with a failed run reported as an error"""
+    with _render_lock:
+        start = time.perf_counter()
+        try:
+            at.run()
+        except Exception as e:
+            return time.perf_counter() - start, [f"{type(e).__name__}: {e}"]
+        return time.perf_counter() - start, [str(e.value) for e in at.exception]
+
+
+def run_session(user, pages, iterations, timeout):
+    """Log one session in and render every page; returns [(page, seconds or None, errors)]"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(DASHBOARD, default_timeout=timeout)
+    at.session_state["user"] = User.from_row(user)
+    _, errors = render(at)
+
+    samples = []
+    for _ in range(iterations):
+        for page in pages:
+            try:
+                at.radio(key="animated_nav").set_value(page)
+            except KeyError:
+                # The previous render came out empty; count it against this page and start over
+                samples.append((page, None, errors or ["navigation missing from the rendered page"]))
+                _, errors = render(at)
+                continue
+            elapsed, errors = render(at)
+            samples.append((page, elapsed, errors))
+    return samples
+
+
+def run_load_test(sessions=20, portfolios=50, stocks=5, transactions=3, iterations=1,
+                  pages=PAGES, db_latency=0.0, quote_latency=0.0, timeout=120, scale=None, change_feed=False):
+    backend = FakeSupabase(latency=db_latency)
+    provider = OfflineQuoteProvider(latency=quote_latency)
+    set_supabase_client(backend)
+    set_quote_provider(provider)
+    try:
+        if scale:
+            # Synthetic dataset: one session per busiest trader
+            stats = load_dataset(backend, scale, busiest=sessions)
+            ids = stats["busiest_users"]
+            rows = {u["user_id"]: u for u in backend.table("users").select("*").in_("user_id", ids).execute().data}
+            users = [rows[i] for i in ids]
+            backend.reset_counts()
+        else:
+            users = seed_backend(backend, sessions, portfolios, stocks, transactions)
+        if change_feed:
+            start_change_feed()  # Subscribes to the fake backend's writes
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            results = list(pool.map(lambda u: run_session(u, pages, iterations, timeout), users))
+        wall = time.perf_counter() - started
+    finally:
+        stop_change_feed()
+        set_supabase_client(None)
+        set_quote_provider(None)
+
+    timings = defaultdict(list)
+    errors = defaultdict(list)
+    for samples in results:
+        for page, elapsed, page_errors in samples:
+            page_timings = timings[page]  # Listed even when every render failed
+            if elapsed is not None:
+                page_timings.append(elapsed)
+            errors[page].extend(page_errors)
+
+    renders = sum(len(v) for v in timings.values())
+    return {
+        "sessions": sessions,
+        "portfolios_per_user": portfolios,
+        "wall_seconds": wall,
+        "pages": {
+            page: {
+                "renders": len(values),
+                "p50_ms": percentile(values, 50) * 1000 if values else 0.0,
+                "p95_ms": percentile(values, 95) * 1000 if values else 0.0,
+                "p99_ms": percentile(values, 99) * 1000 if values else 0.0,
+                "errors": sorted(set(errors[page])),
+            }
+            for page, values in timings.items()
+        },
+        "dao_calls": {f"{table}.{op}": n for (table, op), n in sorted(backend.calls.items())},
+        "dao_calls_per_render": sum(backend.calls.values()) / renders if renders else 0,
+        "provider_calls": dict(provider.calls),
+    }
+
+
+def print_report(report):
+    print(f"\n📊 DASHBOARD LOAD TEST - {report['sessions']} sessions x "
+          f"{report['portfolios_per_user']} portfolios ({report['wall_seconds']:.1f}s wall)")
+    print("=" * 72)
+    print(f"{'Page':<18} {'Renders':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'Errors':>8}")
+    print("─" * 72)
+    for page, stats in report["pages"].items():
+        print(f"{page:<18} {stats['renders']:>8} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+              f"{stats['p99_ms']:>10.1f} {len(stats['errors']):>8}")
+    print("─" * 72)
+    print(f"DAO round trips: {sum(report['dao_calls'].values())} "
+          f"({report['dao_calls_per_render']:.1f} per render)")
+    for name, count in report["dao_calls"].items():
+        print(f"   {name:<28} {count:>8}")
+    print(f"Quote provider calls: {report['provider_calls']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless load test for the Streamlit dashboard")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions, one user each (interleaved; renders run one at a time)")
+    parser.add_argument("--portfolios", type=int, default=50, help="portfolios per user")
+    parser.add_argument("--stocks", type=int, default=5, help="stocks per portfolio")
+    parser.add_argument("--transactions", type=int, default=3, help="transactions per stock")
+    parser.add_argument("--scale", type=float, help="use the synthetic dataset at this scale instead of --portfolios/--stocks/--transactions")
+    parser.add_argument("--iterations", type=int, default=1, help="passes over every page per session")
+    parser.add_argument("--page", action="append", choices=PAGES, help="only render these pages")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds added per DAO round trip")
+    parser.add_argument("--quote-latency", type=float, default=0.0, help="seconds added per provider call")
+    parser.add_argument("--change-feed", action="store_true", help="invalidate caches from backend writes (longer cache TTLs)")
+    parser.add_argument("--max-p95-ms", type=float, help="exit 1 if any page p95 exceeds this budget")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        sessions=args.sessions, portfolios=args.portfolios, stocks=args.stocks,
+        transactions=args.transactions, iterations=args.iterations, pages=args.page or PAGES,
+        db_latency=args.db_latency, quote_latency=args.quote_latency, scale=args.scale,
+        change_feed=args.change_feed,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    failed = any(stats["errors"] for stats in report["pages"].values())
+    if args.max_p95_ms is not None:
+        over = [p for p, stats in report["pages"].items() if stats["p95_ms"] > args.max_p95_ms]
+        for page in over:
+            print(f"❌ {page}: p95 {report['pages'][page]['p95_ms']:.1f}ms exceeds {args.max_p95_ms:.1f}ms")
+        failed = failed or bool(over)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
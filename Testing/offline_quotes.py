@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from Service.tracing import instrument
+
+
+def base_price(symbol):
+    """Stable pseudo price in [5, 505) derived from the symbol"""
+    digest = hashlib.sha256(symbol.upper().encode()).digest()
+    return 5 + int.from_bytes(digest[:4], "big") % 50000 / 100
+
+
+def history_price(symbol, day):
+    """Stable pseudo daily close: a yearly drift plus slow and fast cycles around base_price"""
+    digest = hashlib.sha256(symbol.upper().encode()).digest()
+    drift = -0.05 + digest[4] / 255 * 0.2  # -5% .. +15% a year
+    phase = digest[5] / 255 * 2 * math.pi
+    years = (day.toordinal() - 738000) / 365  # Years since 2021-07-24
+    cycles = 1 + 0.2 * math.sin(years * 6 + phase) + 0.03 * math.sin(day.toordinal() / 5 + phase)
+    return round(base_price(symbol) * (1 + drift) ** years * cycles, 2)
+
+
+@instrument("provider")
+class OfflineQuoteProvider:
+    """Deterministic quote provider that never touches the network.
+
+    Prices drift by a small step every ``drift_every`` calls per symbol so
+    refresh paths see real changes. ``latency`` simulates a slow upstream.
+    Its market never closes unless ``market_hours`` is set, so call counts
+    do not depend on the day the tests run.
+    """
+
+    def __init__(self, latency=0.0, drift_every=0, fail_symbols=(), market_hours=False):
+        self.latency = latency
+        self.market_hours = market_hours
+        self.drift_every = drift_every
+        self.fail_symbols = {s.upper() for s in fail_symbols}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, method):
+        with self._lock:
+            self.calls[method] += 1
+            return self.calls[method]
+
+    def _price(self, symbol, n):
+        price = base_price(symbol)
+        if self.drift_every:
+            step = n // self.drift_every
+            price *= 1 + ((step % 7) - 3) / 1000
+        return round(price, 2)
+
+    def get_price(self, symbol):
+        n = self._count("get_price")
+        if self.latency:
+            time.sleep(self.latency)
+        if symbol.upper() in self.fail_symbols:
+            raise ValueError(f"Could not fetch price for {symbol}: offline provider failure")
+        return self._price(symbol, n)
+
+    async def get_price_async(self, symbol):
+        """Native async variant: latency is awaited, so concurrent lookups share one thread"""
+        n = self._count("get_price")
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if symbol.upper() in self.fail_symbols:
+            raise ValueError(f"Could not fetch price for {symbol}: offline provider failure")
+        return self._price(symbol, n)
+
+    def get_info(self, symbol):
+        self._count("get_info")
+        if self.latency:
+            time.sleep(self.latency)
+        price = base_price(symbol)
+        return {
+            "longName": f"{symbol.upper()} Holdings Inc.",
+            "currentPrice": price,
+            "regularMarketPrice": price,
+            "previousClose": round(price * 0.99, 2),
+            "marketCap": int(price * 1e8),
+            "sector": "Technology",
+            "industry": "Software",
+            "longBusinessSummary": f"Offline test company for {symbol.upper()}.",
+        }
+
+    def get_history(self, symbol, start, end=None):
+        self._count("get_history")
+        if self.latency:
+            time.sleep(self.latency)
+        if symbol.upper() in self.fail_symbols:
+            raise ValueError(f"Could not fetch price history for {symbol}: offline provider failure")
+        day, end = start, end or date.today() + timedelta(days=1)  # end is exclusive, as with Yahoo
+        closes = []
+        while day < end:
+            if day.weekday() < 5:
+                closes.append((day.isoformat(), history_price(symbol, day)))
+            day += timedelta(days=1)
+        return closes
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
@@ -0,0 +1,66 @@
+"""Trade import against the in-memory backend: python -m pytest Testing"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from config import set_supabase_client
+from DAO.stock_dao import StockDAO
+from Service.import_service import TradeImporter, iter_trades
+from Testing.fake_supabase import FakeSupabase
+
+HEADER = "date,type,symbol,quantity,price\n"
+
+
+@pytest.fixture
+def portfolio_id():
+    backend = FakeSupabase()
+    set_supabase_client(backend)
+    user = backend.table("users").insert({"name": "Importer", "email": "import@example.com"}).execute().data[0]
+    portfolio = backend.table("portfolios").insert(
+        {"user_id": user["user_id"], "portfolio_name": "Imported"}
+    ).execute().data[0]
+    yield portfolio["portfolio_id"]
+    set_supabase_client(None)
+
+
+def import_csv(tmp_path, portfolio_id, rows, **options):
+    path = tmp_path / "trades.csv"
+    path.write_text(HEADER + "".join(f"{row}\n" for row in rows))
+    return TradeImporter(portfolio_id, **options).run(iter_trades(str(path)))
+
+
+def holdings(portfolio_id):
+    return {stock.symbol: stock.quantity for stock in StockDAO().get_stock_by_portfolio(portfolio_id)}
+
+
+@pytest.mark.parametrize("batch_size", [500, 1])
+def test_unsorted_file_keeps_identical_fills(tmp_path, portfolio_id, batch_size):
+    rows = ["2024-01-02,Buy,AAPL,10,150", "2024-01-03,Buy,MSFT,5,300", "2024-01-02,Buy,AAPL,10,150"]
+
+    stats = import_csv(tmp_path, portfolio_id, rows, batch_size=batch_size)
+
+    assert (stats['inserted'], stats['duplicates']) == (3, 0)
+    assert holdings(portfolio_id) == {'AAPL': 20, 'MSFT': 5}
+    rerun = import_csv(tmp_path, portfolio_id, rows, batch_size=batch_size)
+    assert (rerun['inserted'], rerun['duplicates']) == (0, 3)
+    assert holdings(portfolio_id) == {'AAPL': 20, 'MSFT': 5}
+
+
+def test_rejected_sell_creates_no_holding(tmp_path, portfolio_id):
+    rows = ["2024-01-02,Buy,AAPL,10,150", "2024-01-03,Sell,TSLA,5,200", "2024-01-03,Buy,MSFT,5,300"]
+
+    stats = import_csv(tmp_path, portfolio_id, rows)
+
+    assert (stats['inserted'], stats['rejected'], stats['stocks_created']) == (2, 1, 2)
+    assert holdings(portfolio_id) == {'AAPL': 10, 'MSFT': 5}
+
+
+def test_newest_first_file_is_replayed_oldest_first(tmp_path, portfolio_id):
+    rows = ["2024-01-05,Sell,AAPL,5,160", "2024-01-05,Buy,AAPL,10,150", "2024-01-02,Buy,MSFT,1,300"]
+
+    stats = import_csv(tmp_path, portfolio_id, rows)
+
+    assert (stats['inserted'], stats['rejected']) == (3, 0)
+    assert holdings(portfolio_id) == {'AAPL': 5, 'MSFT': 1}
@@ -1,18 +1,104 @@
 import os
+import threading
+import weakref
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from Service.metrics import MeteredAsyncClient, MeteredClient
+
+if TYPE_CHECKING:
+    from supabase import Client
  
 load_dotenv()  # loads .env from project root
  
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
  
-def get_supabase() -> Client:
+# Symbols shown by Market Trends and watch mode (comma separated in .env)
+WATCHLIST = [s.strip().upper() for s in os.getenv(
+    "WATCHLIST", "AAPL,MSFT,GOOGL,AMZN,TSLA,META,NVDA,NFLX,AMD,INTC"
+).split(",") if s.strip()]
+ 
+# Prometheus /metrics endpoint, off unless a port is set
+METRICS_PORT = int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None
+METRICS_ADDR = os.getenv("METRICS_ADDR", "127.0.0.1")
+ 
+# REST API: seconds a response (and its ETag) is reused, and most responses kept at once
+API_CACHE_TTL = float(os.getenv("API_CACHE_TTL", "15"))
+API_CACHE_MAX_KEYS = int(os.getenv("API_CACHE_MAX_KEYS", "10000"))
+ 
+# Quote provider resilience: seconds before a lookup is abandoned, and before the
+# history() fallback is raced against a slow lookup (unset: no hedging)
+QUOTE_TIMEOUT = float(os.getenv("QUOTE_TIMEOUT", "8"))
+QUOTE_HEDGE_AFTER = float(os.getenv("QUOTE_HEDGE_AFTER")) if os.getenv("QUOTE_HEDGE_AFTER") else None
+ 
+# Background price scheduler: seconds between refreshes while markets are open, symbols per fetch batch
+SCHEDULER_INTERVAL = float(os.getenv("SCHEDULER_INTERVAL", "60"))
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "50"))
+ 
+# Symbol search: CSV of listings (symbol,name,exchange,sector) replacing the bundled Service/data/listings.csv
+SYMBOL_LISTINGS = os.getenv("SYMBOL_LISTINGS")
+ 
+# Screener: seconds before a symbol's cached fundamentals are fetched again
+FUNDAMENTALS_MAX_AGE = float(os.getenv("FUNDAMENTALS_MAX_AGE", "86400"))
+ 
+# Backtests: directory of daily close files (one CSV per symbol), and years fetched for a new symbol
+PRICE_HISTORY_DIR = os.getenv("PRICE_HISTORY_DIR", os.path.join(os.path.expanduser("~"), ".stock_tracker", "history"))
+HISTORY_YEARS = int(os.getenv("HISTORY_YEARS", "10"))
+ 
+# Realtime change feed: invalidate caches on every write, so cached reads can live for LIVE_CACHE_TTL seconds
+CHANGE_FEED = os.getenv("CHANGE_FEED", "").lower() in ("1", "true", "yes")
+LIVE_CACHE_TTL = float(os.getenv("LIVE_CACHE_TTL", "600"))
+ 
+# Client returned instead of a real connection (in-memory backends for load tests)
+_client_override = None
+_async_override = None
+ 
+# One connection shared by every DAO, created on the first query
+_client = None
+_client_lock = threading.Lock()
+# Async clients per event loop: their HTTP connections belong to the loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+ 
+def set_supabase_client(client) -> None:
     """
-    Return a supabase client. Raises RuntimeError if config missing.
+    Make every DAO use client instead of connecting to Supabase. Pass None to reset.
     """
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in environment (.env)")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# pip install -r requirements.txt
+    global _client_override, _async_override
+    _client_override = MeteredClient(client) if client is not None else None
+    as_async = getattr(client, "as_async", None)
+    _async_override = MeteredAsyncClient(as_async()) if as_async else None
+ 
+def get_supabase() -> "Client":
+    """
+    Return the shared supabase client, connecting on first use. Raises RuntimeError if config missing.
+    """
+    global _client
+    if _client_override is not None:
+        return _client_override
+    if _client is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in environment (.env)")
+        from supabase import create_client  # Imported here: the SDK is slow to load
+        with _client_lock:
+            if _client is None:
+                _client = MeteredClient(create_client(SUPABASE_URL, SUPABASE_KEY))
+    return _client
+ 
+async def get_async_supabase():
+    """
+    Return the async supabase client for the running event loop, connecting on first use.
+    """
+    if _client_override is not None:
+        if _async_override is None:
+            raise RuntimeError("The Supabase client override has no async variant (as_async)")
+        return _async_override
+    import asyncio
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in environment (.env)")
+        from supabase import acreate_client
+        client = MeteredAsyncClient(await acreate_client(SUPABASE_URL, SUPABASE_KEY))
+        client = _async_clients.setdefault(loop, client)  # Another task may have connected meanwhile
+    return client
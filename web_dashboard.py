@@ -16,6 +16,15 @@ from Service.user_service import UserService
 from Service.portfolio_service import PortfolioService
 from Service.stock_service import StockService
 from Service.transaction_service import TransactionService
+from Service.shared_store import shared_store
+from Service.change_feed import cache_ttl, start_change_feed
+from Service.export_service import ExportService, REPORT_FIELDS, EXPORT_FORMATS
+from Service.screener import ScreenerService, COLUMNS as SCREEN_COLUMNS
+from Service.backtest import BacktestService, DEFAULT_COST_BPS
+from Service import tracing
+from Service import metrics
+from DAO.money import cents_column, column_total, format_cents, to_cents
+from config import CHANGE_FEED, METRICS_PORT, METRICS_ADDR
 
 # Page configuration with advanced settings
 st.set_page_config(
@@ -25,6 +34,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Prometheus scrape endpoint, started once per server process (reruns reuse it)
+if METRICS_PORT:
+    try:
+        metrics.start_http_server(METRICS_PORT, METRICS_ADDR)
+    except OSError as e:
+        print(f"⚠️  Metrics endpoint not started on port {METRICS_PORT}: {e}")
+
+# Writes from any process invalidate cached summaries and holdings, so they can live longer
+if CHANGE_FEED:
+    start_change_feed()
+
 # Advanced CSS with animations and modern design
 st.markdown("""
 <style>
@@ -287,7 +307,68 @@ user_service = UserService()
 portfolio_service = PortfolioService()
 stock_service = StockService()
 transaction_service = TransactionService()
+export_service = ExportService(portfolio_service)
+screener_service = ScreenerService(stock_service)
+backtest_service = BacktestService(stock_service)
+
+# Auto-refresh choices for the live holdings panel (seconds, None = off)
+LIVE_REFRESH_OPTIONS = {"Off": None, "15 seconds": 15, "30 seconds": 30, "60 seconds": 60}
+
+# What-if backtest strategies shown on the Analytics page
+BACKTEST_STRATEGIES = {"Rebalance to today's weights": "rebalance", "Buy and hold": "hold",
+                       "Moving-average crossover": "sma"}
+
+EXPORT_MIME_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/octet-stream",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+# Shared store TTLs (seconds) for per-user data reused across sessions, while the change feed is off
+SUMMARY_TTL = 30
+HOLDINGS_TTL = 60
+
+def get_portfolio_summary(user_id):
+    """Per-user portfolio summary shared by every session logged in as that user"""
+    return shared_store.get_or_load(("summary", user_id), lambda: portfolio_service.get_portfolio_summary(user_id),
+                                    cache_ttl(SUMMARY_TTL))
 
+# Holdings table paging and sortable columns (label -> frame column)
+HOLDINGS_PAGE_SIZES = [25, 50, 100, 250]
+HOLDINGS_SORT_COLUMNS = {
+    "Total Value": "total_value",
+    "Symbol": "symbol",
+    "Portfolio": "portfolio",
+    "Quantity": "quantity",
+    "Price": "price"
+}
+
+def load_holdings_frame(user_id):
+    """Columnar holdings frame for a user, shared by every session logged in as that user"""
+    return shared_store.get_or_load(("holdings", user_id), lambda: build_holdings_frame(user_id), cache_ttl(HOLDINGS_TTL))
+
+def build_holdings_frame(user_id):
+    """Columnar holdings frame for a user, built page by page from the stocks table"""
+    portfolios = portfolio_service.get_user_portfolios(user_id)
+    names = {p.portfolio_id: p.portfolio_name for p in portfolios}
+    
+    columns = {'stock_id': [], 'symbol': [], 'portfolio_id': [], 'quantity': [], 'price': []}
+    total_cents = []
+    for page in stock_service.iter_stock_pages(list(names), columns=",".join(columns)):
+        for key, values in columns.items():
+            values.extend(getattr(row, key) for row in page)
+        total_cents.extend(row.total_cents for row in page)
+    
+    df = pd.DataFrame(columns)
+    df['total_cents'] = cents_column(total_cents, len(total_cents))  # Exact values for totals
+    df['symbol'] = df['symbol'].astype('category')
+    df['portfolio'] = df['portfolio_id'].map(names).astype('category')
+    df['quantity'] = pd.to_numeric(df['quantity'])
+    df['price'] = pd.to_numeric(df['price'], downcast='float')
+    df['total_value'] = df['total_cents'] / 100
+    return df.drop(columns='portfolio_id')
+
+@tracing.instrument("ui")
 class AnimatedStockTracker:
     def __init__(self):
         self.current_user = None
@@ -301,7 +382,42 @@ class AnimatedStockTracker:
             self.show_animated_landing_page()
         else:
             self.current_user = st.session_state.user
+            page = st.session_state.get('current_page', '🏠 Dashboard')
+            with metrics.PAGE_RENDER.labels(page.split(" ", 1)[-1]).time():
+                if st.session_state.get('debug_trace'):
+                    self.run_traced()
+                else:
+                    self.show_animated_dashboard()
+    
+    def run_traced(self):
+        """Render the dashboard inside a trace (and optional profiler), then show the debug panel"""
+        page = st.session_state.get('current_page', '🏠 Dashboard')
+        profiler = st.session_state.get('debug_profiler', 'off')
+        with tracing.trace(f"rerun {page}") as run_trace, \
+                tracing.profile(None if profiler == 'off' else profiler) as run_profile:
             self.show_animated_dashboard()
+        self.show_debug_panel(run_trace, run_profile)
+    
+    def show_debug_panel(self, run_trace, run_profile):
+        """Layer totals, span tree and profiler output of this rerun"""
+        with st.expander(f"🐞 Trace of this run — {run_trace.wall_ms:,.0f} ms", expanded=True):
+            totals = run_trace.layer_totals()
+            columns = st.columns(len(totals))
+            for column, (layer, ms) in zip(columns, totals.items()):
+                column.metric(layer.title(), f"{ms:,.0f} ms")
+            
+            rows = run_trace.rows(min_ms=0.05)
+            if rows:
+                st.dataframe(pd.DataFrame([{
+                    'Span': "\u2003" * (row['depth'] - 1) + row['name'],
+                    'Layer': row['layer'],
+                    'Calls': row['calls'],
+                    'Total ms': round(row['total_ms'], 2),
+                    'Self ms': round(row['self_ms'], 2),
+                    'Errors': row['errors'],
+                } for row in rows]), use_container_width=True, hide_index=True)
+            if run_profile.text:
+                st.code(run_profile.text, language=None)
     
     def setup_animated_sidebar(self):
         """Advanced animated sidebar with micro-interactions"""
@@ -337,7 +453,7 @@ class AnimatedStockTracker:
                         user = user_service.user_dao.get_user_by_email(login_email)
                         if user:
                             st.session_state.user = user
-                            st.success(f"🎉 Welcome back, {user['name']}!")
+                            st.success(f"🎉 Welcome back, {user.name}!")
                             time.sleep(1)
                             st.rerun()
                         else:
@@ -369,9 +485,9 @@ class AnimatedStockTracker:
             <div style='display: flex; align-items: center; gap: 15px;'>
                 <div style='font-size: 2em;'>👤</div>
                 <div>
-                    <h4 style='color: white; margin: 0;'>{user['name']}</h4>
-                    <p style='color: #bdc3c7; margin: 5px 0;'>{user['email']}</p>
-                    <p style='color: #bdc3c7; margin: 0; font-size: 0.8em;'>ID: {user['user_id'][:8]}...</p>
+                    <h4 style='color: white; margin: 0;'>{user.name}</h4>
+                    <p style='color: #bdc3c7; margin: 5px 0;'>{user.email}</p>
+                    <p style='color: #bdc3c7; margin: 0; font-size: 0.8em;'>ID: {user.user_id[:8]}...</p>
                 </div>
             </div>
         </div>
@@ -380,7 +496,8 @@ class AnimatedStockTracker:
         st.markdown("---")
         
         # Animated navigation
-        nav_options = ["🏠 Dashboard", "💼 Portfolios", "📈 Live Market", "📊 Analytics", "⚡ Actions", "⚙️ Settings"]
+        nav_options = ["🏠 Dashboard", "💼 Portfolios", "📈 Live Market", "📊 Analytics", "🔎 Screener", "⚡ Actions",
+                       "⚙️ Settings"]
         selected_nav = st.radio(
             "Navigation",
             nav_options,
@@ -402,6 +519,17 @@ class AnimatedStockTracker:
             if st.button("📊 New Portfolio", use_container_width=True):
                 st.session_state.show_portfolio_creator = True
         
+        st.selectbox(
+            "⏱️ Live Price Refresh",
+            options=list(LIVE_REFRESH_OPTIONS.keys()),
+            index=2,
+            key="live_refresh_choice"
+        )
+        
+        with st.expander("🐞 Debug"):
+            st.toggle("Trace page renders", key="debug_trace")
+            st.selectbox("Profiler", ['off'] + tracing.available_profilers(), key="debug_profiler")
+        
         # Animated market status
         self.show_animated_market_status()
         
@@ -496,14 +624,14 @@ class AnimatedStockTracker:
         # Animated header with user welcome
         st.markdown(f"""
         <div style='animation: fadeInUp 0.8s ease-out;'>
-            <h1 style='margin-bottom: 0;'>Welcome back, {user['name']}! 👋</h1>
+            <h1 style='margin-bottom: 0;'>Welcome back, {user.name}! 👋</h1>
             <p style='color: #666; margin-top: 0;'>Your investment command center</p>
         </div>
         """, unsafe_allow_html=True)
         
         # Get portfolio data with loading animation
         with st.spinner("🔄 Loading your portfolio data..."):
-            portfolio_summaries = portfolio_service.get_portfolio_summary(user['user_id'])
+            portfolio_summaries = get_portfolio_summary(user.user_id)
             time.sleep(1)  # Simulate loading for animation
         
         # Animated summary metrics
@@ -516,15 +644,19 @@ class AnimatedStockTracker:
         current_page = st.session_state.get('current_page', '🏠 Dashboard')
 
         if current_page == "🏠 Dashboard":
+            self.show_live_holdings_panel(user.user_id)
+            st.markdown("---")
             self.show_animated_portfolio_overview(portfolio_summaries)
         elif current_page == "💼 Portfolios":
-            self.show_animated_holdings_view(user['user_id'])
+            self.show_animated_holdings_view(user.user_id)
         elif current_page == "📈 Live Market":
             self.show_animated_market_intel()
         elif current_page == "📊 Analytics":
-            self.show_animated_performance_dashboard(user['user_id'])
+            self.show_animated_performance_dashboard(user.user_id)
+        elif current_page == "🔎 Screener":
+            self.show_screener_page()
         elif current_page == "⚡ Actions":
-            self.show_animated_quick_actions(user['user_id'])
+            self.show_animated_quick_actions(user.user_id)
         elif current_page == "⚙️ Settings":
             self.show_settings_page(user)
     def show_settings_page(self, user):
@@ -536,14 +668,14 @@ class AnimatedStockTracker:
         with col1:
             with st.form("update_profile"):
                 st.markdown("### ✏️ Update Profile")
-                new_name = st.text_input("Name", value=user['name'])
-                new_email = st.text_input("Email", value=user['email'])
+                new_name = st.text_input("Name", value=user.name)
+                new_email = st.text_input("Email", value=user.email)
                 
                 if st.form_submit_button("💾 Save Changes", use_container_width=True):
                     try:
-                        self.user_service.update_profile(user['user_id'], new_name, new_email)
-                        st.session_state.user['name'] = new_name
-                        st.session_state.user['email'] = new_email
+                        self.user_service.update_profile(user.user_id, new_name, new_email)
+                        st.session_state.user.name = new_name
+                        st.session_state.user.email = new_email
                         st.success("✅ Profile updated successfully!")
                     except Exception as e:
                         st.error(f"❌ Error: {e}")
@@ -557,16 +689,25 @@ class AnimatedStockTracker:
                 confirm = st.text_input("Type 'DELETE' to confirm:")
                 if confirm == "DELETE":
                     try:
-                        self.user_service.delete_account(user['user_id'])
+                        self.user_service.delete_account(user.user_id)
                         del st.session_state.user
                         st.rerun()
                     except Exception as e:
                         st.error(f"❌ Error: {e}")
+        
+        with st.expander("🧠 Shared Cache Memory"):
+            report = shared_store.memory_report()
+            if report:
+                st.dataframe(pd.DataFrame([
+                    {'Key Class': key_class, **stats} for key_class, stats in sorted(report.items())
+                ]), use_container_width=True, hide_index=True)
+            else:
+                st.info("Shared cache is empty")
     
     def show_animated_summary_metrics(self, portfolio_summaries):
         """Animated summary metrics with advanced visual effects"""
-        total_net_worth = sum(p['current_value'] for p in portfolio_summaries if 'error' not in p)
-        total_gain_loss = sum(p['total_gain_loss'] for p in portfolio_summaries if 'error' not in p)
+        net_worth_cents = sum(to_cents(p['current_value']) for p in portfolio_summaries if 'error' not in p)
+        gain_loss_cents = sum(to_cents(p['total_gain_loss']) for p in portfolio_summaries if 'error' not in p)
         total_portfolios = len(portfolio_summaries)
         total_stocks = sum(p['stock_count'] for p in portfolio_summaries if 'error' not in p)
         
@@ -576,18 +717,18 @@ class AnimatedStockTracker:
         with col1:
             self.animated_metric_card(
                 "💰 Total Net Worth", 
-                f"${total_net_worth:,.2f}", 
+                format_cents(net_worth_cents), 
                 "primary",
                 "Your complete portfolio value"
             )
         
         with col2:
-            gain_color = "success" if total_gain_loss >= 0 else "danger"
+            gain_color = "success" if gain_loss_cents >= 0 else "danger"
             self.animated_metric_card(
                 "📈 Total P&L", 
-                f"${total_gain_loss:,.2f}", 
+                format_cents(gain_loss_cents), 
                 gain_color,
-                f"Overall {'gain' if total_gain_loss >= 0 else 'loss'}"
+                f"Overall {'gain' if gain_loss_cents >= 0 else 'loss'}"
             )
         
         with col3:
@@ -764,7 +905,7 @@ class AnimatedStockTracker:
             st.info("📊 No portfolios available for analytics")
             return
         
-        portfolio_options = {p['portfolio_name']: p['portfolio_id'] for p in portfolios}
+        portfolio_options = {p.portfolio_name: p.portfolio_id for p in portfolios}
         selected_portfolio = st.selectbox(
             "🎯 Select Portfolio for Deep Analysis",
             options=list(portfolio_options.keys()),
@@ -845,13 +986,13 @@ class AnimatedStockTracker:
                 stock_data = []
                 for stock in stocks:
                     try:
-                        stock_perf = transaction_service.get_stock_performance(stock['stock_id'])
+                        stock_perf = transaction_service.get_stock_performance(stock.stock_id)
                         if 'error' not in stock_perf:
                             stock_data.append({
-                                'Symbol': stock['symbol'],
+                                'Symbol': stock.symbol,
                                 'Shares': stock_perf['current_shares'],
                                 'Avg Cost': stock_perf['average_buy_price'],
-                                'Current Price': stock['price'],
+                                'Current Price': stock.price,
                                 'Unrealized P&L': stock_perf['unrealized_gain_loss'],
                                 'Return %': stock_perf['unrealized_gain_loss_percent']
                             })
@@ -869,10 +1010,54 @@ class AnimatedStockTracker:
                         }),
                         use_container_width=True
                     )
+            
+            self.show_backtest_panel(portfolio_id)
         
         except Exception as e:
             st.error(f"❌ Error loading analytics: {e}")
     
+    def show_backtest_panel(self, portfolio_id):
+        """Replay the portfolio's current weights over stored price history, next to buy-and-hold"""
+        with st.expander("🧪 What-if Backtest"):
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                strategy = BACKTEST_STRATEGIES[st.selectbox("Strategy", list(BACKTEST_STRATEGIES), key="backtest_strategy")]
+            with col2:
+                rebalance = st.selectbox("Rebalance", ["monthly", "quarterly", "yearly", "weekly", "daily"],
+                                         key="backtest_rebalance", disabled=strategy == "hold")
+            with col3:
+                years = st.slider("Years", 1, 10, 5, key="backtest_years")
+            with col4:
+                cost_bps = st.number_input("Cost (bps)", 0.0, 100.0, float(DEFAULT_COST_BPS), key="backtest_cost")
+            params = {}
+            if strategy == "sma":
+                col1, col2 = st.columns(2)
+                params['fast'] = col1.number_input("Fast average (days)", 5, 200, 50, key="backtest_fast")
+                params['slow'] = col2.number_input("Slow average (days)", 20, 400, 200, key="backtest_slow")
+            
+            if not st.button("▶️ Run Backtest", key="backtest_run"):
+                return
+            try:
+                with st.spinner("🧪 Replaying history..."):
+                    result = backtest_service.backtest_portfolio(portfolio_id, strategy, rebalance, years, cost_bps,
+                                                                 **params)
+            except ValueError as e:
+                st.warning(f"⚠️ {e}")
+                return
+            if result['missing']:
+                st.caption(f"No stored history for {', '.join(result['missing'])}; left out and the rest scaled up")
+            
+            runs = {"Strategy": result['strategy'], "Buy and hold": result['buy_and_hold']}
+            fig = go.Figure()
+            for (name, run), color in zip(runs.items(), ['#667eea', '#C34A36']):
+                fig.add_trace(go.Scatter(x=run.equity.index, y=run.equity.values, mode='lines', name=name,
+                                         line=dict(color=color, width=2)))
+            fig.update_layout(height=350, yaxis_title="Value ($)", paper_bgcolor='rgba(0,0,0,0)',
+                              plot_bgcolor='rgba(0,0,0,0)')
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(pd.DataFrame([{'Run': name, **run.stats} for name, run in runs.items()]),
+                         use_container_width=True, hide_index=True)
+    
     def show_advanced_analytics_charts(self, portfolio_id):
         """Show advanced animated analytics charts"""
         try:
@@ -921,24 +1106,13 @@ class AnimatedStockTracker:
             st.warning(f"⚠️ Some analytics features unavailable: {e}")
     
     def show_animated_holdings_view(self, user_id):
-        """Advanced animated holdings view"""
+        """Paginated holdings view; only the visible page is styled and rendered"""
         st.subheader("💼 Advanced Holdings Analysis")
         
         with st.spinner("🔄 Loading your stock holdings..."):
-            portfolios = portfolio_service.get_user_portfolios(user_id)
-            all_stocks = []
-            
-            for portfolio in portfolios:
-                try:
-                    stocks = stock_service.get_stocks(portfolio['portfolio_id'])
-                    for stock in stocks:
-                        stock['Portfolio'] = portfolio['portfolio_name']
-                        stock['Total Value'] = stock['price'] * stock['quantity']
-                        all_stocks.append(stock)
-                except:
-                    continue
+            holdings = load_holdings_frame(user_id)
         
-        if not all_stocks:
+        if holdings.empty:
             self.show_animated_empty_state("No stock holdings found")
             return
         
@@ -946,29 +1120,50 @@ class AnimatedStockTracker:
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            # Interactive holdings table with animations
-            holdings_data = []
-            for stock in all_stocks:
-                holdings_data.append({
-                    'Symbol': stock['symbol'],
-                    'Portfolio': stock['Portfolio'],
-                    'Quantity': stock['quantity'],
-                    'Price': stock['price'],
-                    'Total Value': stock['Total Value']
-                })
+            f1, f2, f3, f4 = st.columns([2, 2, 1, 1])
+            with f1:
+                search = st.text_input("🔍 Filter", placeholder="Symbol or portfolio", key="holdings_filter")
+            with f2:
+                sort_label = st.selectbox("Sort by", options=list(HOLDINGS_SORT_COLUMNS.keys()), key="holdings_sort")
+            with f3:
+                descending = st.checkbox("Desc", value=True, key="holdings_desc")
+            with f4:
+                page_size = st.selectbox("Rows", options=HOLDINGS_PAGE_SIZES, key="holdings_page_size")
+            
+            view = holdings
+            if search:
+                needle = search.strip().upper()
+                mask = (view['symbol'].str.contains(needle, regex=False) |
+                        view['portfolio'].str.upper().str.contains(needle, regex=False))
+                view = view[mask]
+            view = view.sort_values(HOLDINGS_SORT_COLUMNS[sort_label], ascending=not descending, kind='stable')
+            
+            page_count = max(1, -(-len(view) // page_size))
+            if st.session_state.get('holdings_page', 1) > page_count:
+                st.session_state.holdings_page = 1
+            page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="holdings_page")
+            start = (page - 1) * page_size
             
-            df = pd.DataFrame(holdings_data)
+            page_df = view.iloc[start:start + page_size].rename(columns={
+                'symbol': 'Symbol',
+                'portfolio': 'Portfolio',
+                'quantity': 'Quantity',
+                'price': 'Price',
+                'total_value': 'Total Value'
+            })[['Symbol', 'Portfolio', 'Quantity', 'Price', 'Total Value']]
             
-            # Apply advanced styling
-            # FIXED CODE:
+            # Style only the visible page, scaled against the whole account
             try:
-                styled_df = df.style.format({
+                styled_df = page_df.style.format({
                     'Price': '${:.2f}',
                     'Total Value': '${:,.2f}'
-                }).background_gradient(subset=['Total Value'], cmap='Blues')
+                }).background_gradient(
+                    subset=['Total Value'], cmap='Blues',
+                    vmin=0, vmax=float(holdings['total_value'].max())
+                )
             except ImportError:
                 # Fallback if matplotlib still has issues
-                styled_df = df.style.format({
+                styled_df = page_df.style.format({
                     'Price': '${:.2f}',
                     'Total Value': '${:,.2f}'
                 }).set_properties(**{
@@ -976,19 +1171,109 @@ class AnimatedStockTracker:
                     'color': '#2c3e50'
                 }, subset=['Total Value'])
             
-            st.dataframe(styled_df, use_container_width=True)
+            st.dataframe(styled_df, use_container_width=True, hide_index=True)
+            st.caption(f"Showing {min(start + 1, len(view))}–{min(start + page_size, len(view))} "
+                       f"of {len(view):,} positions")
         
         with col2:
-            # Holdings summary with animations
-            total_value = df['Total Value'].sum()
-            unique_stocks = df['Symbol'].nunique()
-            total_positions = len(all_stocks)
+            # Holdings summary from the columnar frame
+            total_cents = column_total(holdings['total_cents'].to_numpy())
+            unique_stocks = holdings['symbol'].nunique()
+            total_positions = len(holdings)
             
             st.markdown("### 📊 Holdings Summary")
-            self.animated_metric_card("Total Value", f"${total_value:,.2f}", "primary")
+            self.animated_metric_card("Total Value", format_cents(total_cents), "primary")
             self.animated_metric_card("Unique Stocks", str(unique_stocks), "info")
             self.animated_metric_card("Total Positions", str(total_positions), "warning")
     
+    def load_live_holdings(self, user_id):
+        """Load holdings for the live panel once per session (keyed by stock_id)"""
+        if st.session_state.get('live_holdings_user') != user_id:
+            holdings, names = {}, {}
+            for portfolio in portfolio_service.get_user_portfolios(user_id):
+                names[portfolio.portfolio_id] = portfolio.portfolio_name
+                try:
+                    for stock in stock_service.get_stocks(portfolio.portfolio_id):
+                        holdings[stock.stock_id] = stock
+                except:
+                    continue
+            st.session_state.live_holdings = holdings
+            st.session_state.live_portfolio_names = names
+            st.session_state.live_holdings_user = user_id
+            st.session_state.live_quotes_version = 0
+        return st.session_state.live_holdings
+    
+    def invalidate_holdings(self):
+        """Force the live panel and holdings table to reload from the database"""
+        st.session_state.pop('live_holdings_user', None)
+        if 'user' in st.session_state:
+            shared_store.invalidate(("holdings", st.session_state.user.user_id))
+            shared_store.invalidate(("summary", st.session_state.user.user_id))
+    
+    def tick_live_holdings(self, holdings):
+        """Apply quotes that moved since the last tick; returns {stock_id: previous price} of moved rows"""
+        symbols = {stock.symbol for stock in holdings.values()}
+        stock_service.get_quotes(symbols)  # Network only for expired cache entries
+        
+        changed, version = stock_service.quote_cache.changed_since(
+            st.session_state.live_quotes_version, symbols
+        )
+        st.session_state.live_quotes_version = version
+        if not changed:
+            return {}
+        
+        affected = [stock for stock in holdings.values() if stock.symbol in changed]
+        before = {stock.stock_id: stock.price for stock in affected}
+        # Only rows whose price actually moved are written back to the database
+        moved = stock_service.sync_prices(affected, {s: q.price for s, q in changed.items()})
+        return {stock.stock_id: before[stock.stock_id] for stock in moved}
+    
+    def show_live_holdings_panel(self, user_id):
+        """Auto-refreshing holdings panel; each tick reruns only this fragment"""
+        run_every = LIVE_REFRESH_OPTIONS.get(st.session_state.get('live_refresh_choice'), 30)
+        
+        @st.fragment(run_every=run_every)
+        def live_holdings_fragment():
+            holdings = self.load_live_holdings(user_id)
+            if not holdings:
+                return
+            
+            previous = self.tick_live_holdings(holdings)
+            names = st.session_state.live_portfolio_names
+            
+            total_cents = sum(stock.total_cents for stock in holdings.values())
+            tick_change = sum((holdings[stock_id].price - price) * holdings[stock_id].quantity
+                              for stock_id, price in previous.items())
+            
+            st.subheader("⚡ Live Holdings")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Live Value", format_cents(total_cents), f"{tick_change:+,.2f}" if previous else None)
+            with col2:
+                st.metric("Prices Moved", str(len(previous)))
+            with col3:
+                st.metric("Last Tick", datetime.now().strftime("%H:%M:%S"))
+            
+            df = pd.DataFrame([{
+                'Symbol': stock.symbol,
+                'Portfolio': names.get(stock.portfolio_id),
+                'Quantity': stock.quantity,
+                'Price': stock.price,
+                'Change': stock.price - previous[stock.stock_id] if stock.stock_id in previous else 0.0,
+                'Total Value': stock.total_value
+            } for stock in holdings.values()])
+            st.dataframe(
+                df.style.format({
+                    'Price': '${:.2f}',
+                    'Change': '{:+.2f}',
+                    'Total Value': '${:,.2f}'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        live_holdings_fragment()
+    
     def show_animated_market_intel(self):
         """Advanced animated market intelligence"""
         st.subheader("📈 Live Market Intelligence")
@@ -1042,6 +1327,43 @@ class AnimatedStockTracker:
         
         st.plotly_chart(fig, use_container_width=True)
     
+    def show_screener_page(self):
+        """Filter the cached fundamentals universe with a screen expression"""
+        st.subheader("🔎 Stock Screener")
+        
+        col1, col2, col3, col4 = st.columns([4, 2, 1, 1])
+        with col1:
+            expression = st.text_input(
+                "Screen", placeholder="sector ~ tech and price < 50 and market_cap > 10B",
+                key="screen_expression",
+                help="Conditions joined by 'and'. Numbers: < <= > >= = != (10k, 2.5B). "
+                     "Text: = != and ~ for contains, | for alternatives (sector ~ tech|health); "
+                     "quote values containing 'and' or | (industry = \"Oil & Gas E&P\")."
+            )
+        with col2:
+            sort_by = st.selectbox("Sort by", list(SCREEN_COLUMNS), index=list(SCREEN_COLUMNS).index("market_cap"),
+                                   key="screen_sort")
+        with col3:
+            descending = st.toggle("Largest first", value=True, key="screen_descending")
+        with col4:
+            limit = st.number_input("Rows", min_value=10, max_value=1000, value=100, step=10, key="screen_limit")
+        
+        started = time.perf_counter()
+        try:
+            rows, total = screener_service.screen(expression or "", sort_by, descending, int(limit))
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        universe = screener_service.fundamentals()
+        if not len(universe):
+            st.info("No fundamentals cached yet. Fill the table with: python -m Client.batch_cli fundamentals")
+            return
+        as_of = universe.updated.strftime('%Y-%m-%d %H:%M UTC') if universe.updated is not None else "unknown"
+        st.caption(f"{total:,} of {len(universe):,} match · {elapsed_ms:.1f} ms · as of {as_of}")
+        st.dataframe(rows.drop(columns=["updated_at"]), use_container_width=True, hide_index=True)
+    
     def show_animated_quick_actions(self, user_id):
         """Advanced animated quick actions panel"""
         st.subheader("⚡ Smart Quick Actions")
@@ -1058,6 +1380,7 @@ class AnimatedStockTracker:
                         with st.spinner("Creating your portfolio..."):
                             try:
                                 portfolio_service.create_portfolio(user_id, portfolio_name)
+                                self.invalidate_holdings()
                                 st.success("✅ Portfolio created successfully!")
                                 time.sleep(1)
                                 st.rerun()
@@ -1068,7 +1391,7 @@ class AnimatedStockTracker:
             with st.expander("📈 Add Stock", expanded=True):
                 portfolios = portfolio_service.get_user_portfolios(user_id)
                 if portfolios:
-                    portfolio_options = {p['portfolio_name']: p['portfolio_id'] for p in portfolios}
+                    portfolio_options = {p.portfolio_name: p.portfolio_id for p in portfolios}
                     selected_portfolio = st.selectbox("Select Portfolio", options=list(portfolio_options.keys()))
                     
                     with st.form("quick_add_stock"):
@@ -1080,6 +1403,7 @@ class AnimatedStockTracker:
                                 try:
                                     portfolio_id = portfolio_options[selected_portfolio]
                                     stock_service.add_stock_with_live_price(portfolio_id, symbol, quantity)
+                                    self.invalidate_holdings()
                                     st.success(f"✅ Added {quantity} shares of {symbol}!")
                                     time.sleep(1)
                                     st.rerun()
@@ -1090,16 +1414,21 @@ class AnimatedStockTracker:
         
         with col3:
             with st.expander("🔍 Market Research", expanded=True):
-                with st.form("quick_research"):
-                    search_symbol = st.text_input("Research Symbol", placeholder="TSLA").upper()
-                    
-                    if st.form_submit_button("🔎 Research Stock", use_container_width=True):
-                        with st.spinner(f"Researching {search_symbol}..."):
-                            try:
-                                stock_info = stock_service.search_stock_info(search_symbol)
-                                st.session_state.researched_stock = stock_info
-                            except ValueError as e:
-                                st.error(f"❌ {str(e)}")
+                # Matches come from the local listings; only the picked symbol hits the network
+                query = st.text_input("Research Symbol", placeholder="TSLA or Tesla", key="research_query")
+                matches = {m['symbol']: m for m in stock_service.search_symbols(query)} if query.strip() else {}
+                search_symbol = st.selectbox(
+                    "Matches", options=list(matches), key="research_pick",
+                    format_func=lambda s: f"{s} · {matches[s]['name']} ({matches[s]['exchange']})"
+                ) if matches else query.strip().upper()
+
+                if st.button("🔎 Research Stock", use_container_width=True, disabled=not search_symbol):
+                    with st.spinner(f"Researching {search_symbol}..."):
+                        try:
+                            stock_info = stock_service.get_cached_stock_info(search_symbol)
+                            st.session_state.researched_stock = stock_info
+                        except ValueError as e:
+                            st.error(f"❌ {str(e)}")
                 
                 if 'researched_stock' in st.session_state:
                     stock = st.session_state.researched_stock
@@ -1115,6 +1444,41 @@ class AnimatedStockTracker:
                         </p>
                     </div>
                     """, unsafe_allow_html=True)
+        
+        st.markdown("---")
+        self.show_export_panel(user_id)
+    
+    def show_export_panel(self, user_id):
+        """Report export with a download button"""
+        st.subheader("📤 Export Reports")
+        
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            report = st.selectbox("Report", options=list(REPORT_FIELDS.keys()),
+                                  format_func=lambda r: r.title(), key="export_report")
+        with col2:
+            file_format = st.selectbox("Format", options=list(EXPORT_FORMATS), key="export_format")
+        with col3:
+            st.write("")
+            prepare = st.button("⚙️ Prepare Export", use_container_width=True)
+        
+        if prepare:
+            with st.spinner(f"Exporting {report}..."):
+                try:
+                    data = export_service.export_bytes(report, user_id, file_format)
+                    st.session_state.export_file = (f"{report}.{file_format}", data)
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+        
+        if 'export_file' in st.session_state:
+            file_name, data = st.session_state.export_file
+            st.download_button(
+                f"⬇️ Download {file_name}",
+                data=data,
+                file_name=file_name,
+                mime=EXPORT_MIME_TYPES[file_name.rsplit('.', 1)[1]],
+                use_container_width=True
+            )
     
     def show_animated_empty_state(self, message: str = "No portfolios found"):
         """Show animated empty state"""
@@ -1130,42 +1494,36 @@ class AnimatedStockTracker:
         """Advanced animated price refresh"""
         try:
             user = st.session_state.user
-            portfolios = portfolio_service.get_user_portfolios(user['user_id'])
+            portfolios = portfolio_service.get_user_portfolios(user.user_id)
             
             if not portfolios:
                 st.warning("⚠️ No portfolios to refresh")
                 return
             
-            # Advanced progress animation
+            # Progress advances once per distinct symbol as quotes arrive
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            total_portfolios = len(portfolios)
-            for i, portfolio in enumerate(portfolios):
+            def show_progress(event):
+                icon = "❌" if event['error'] else "✅"
                 status_text.markdown(f"""
                 <div style='animation: fadeInUp 0.3s ease-out;'>
-                    🔄 Refreshing <strong>{portfolio['portfolio_name']}</strong>...
+                    {icon} <strong>{event['symbol']}</strong> ({event['done']}/{event['total']})
                 </div>
                 """, unsafe_allow_html=True)
-                
-                try:
-                    portfolio_service.refresh_portfolio_prices(portfolio['portfolio_id'])
-                except:
-                    pass  # Continue with other portfolios
-                
-                progress = (i + 1) / total_portfolios
-                progress_bar.progress(progress)
-                
-                # Simulate processing time for animation
-                time.sleep(0.5)
+                progress_bar.progress(event['done'] / event['total'])
+            
+            result = portfolio_service.refresh_user_prices(user.user_id, show_progress)
+            progress_bar.progress(1.0)
             
             # Success animation
-            status_text.markdown("""
+            status_text.markdown(f"""
             <div style='animation: fadeInUp 0.5s ease-out; color: #00C9A7; font-weight: bold;'>
-                ✅ All prices refreshed successfully!
+                ✅ Refreshed {result['stocks_updated']} positions ({result['symbol_count']} symbols)!
             </div>
             """, unsafe_allow_html=True)
             
+            self.invalidate_holdings()
             time.sleep(2)
             st.rerun()
             